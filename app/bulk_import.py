@@ -0,0 +1,154 @@
+import asyncio
+import json
+import time
+
+from .config import BULK_IMPORT_CHUNK_SIZE, BULK_IMPORT_WRITE_BATCH
+from .decrypt_worker import decrypt_many_with_active_key
+from .executors import BoundedExecutor, ExecutorSaturated
+from .seed_store import SeedStore
+
+# Only the first errors are kept in the report; the rest are just counted
+MAX_REPORTED_ERRORS = 100
+PROGRESS_EVERY = 1000
+
+
+class ImportReport:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.read = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+
+    def add_error(self, line: int, record_id, error: str) -> dict:
+        self.failed += 1
+        entry = {"line": line, "id": record_id, "error": error}
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(entry)
+        return entry
+
+    def as_dict(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        done = self.imported + self.failed
+        return {
+            "read": self.read,
+            "imported": self.imported,
+            "failed": self.failed,
+            "elapsed_seconds": round(elapsed, 3),
+            "records_per_second": round(done / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+def _parse_record(line) -> tuple[str, str] | None:
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    record_id, encrypted_seed = record.get("id"), record.get("encrypted_seed")
+    if not isinstance(record_id, str) or not record_id:
+        return None
+    if not isinstance(encrypted_seed, str) or not encrypted_seed:
+        return None
+    return record_id, encrypted_seed
+
+
+async def _decrypt_chunk(executor: BoundedExecutor, chunk: list[tuple[int, str, str]]):
+    records = [(record_id, encrypted_seed) for _, record_id, encrypted_seed in chunk]
+    while True:
+        try:
+            results = await executor.run(decrypt_many_with_active_key, records)
+            break
+        except ExecutorSaturated:
+            # Shared pool is busy (e.g. with /decrypt-seed): back off, don't fail
+            await asyncio.sleep(0.05)
+        except Exception:
+            # Whole job failed (no key, worker died): fail its records only
+            results = [(record_id, None) for record_id, _ in records]
+            break
+    return [(line, record_id, hex_seed) for (line, _, _), (record_id, hex_seed) in zip(chunk, results)]
+
+
+async def import_seeds(
+    lines,
+    executor: BoundedExecutor,
+    store: SeedStore,
+    chunk_size: int = BULK_IMPORT_CHUNK_SIZE,
+    write_batch: int = BULK_IMPORT_WRITE_BATCH,
+):
+    """
+    Stream JSONL records {"id": ..., "encrypted_seed": ...} from the async
+    iterable `lines`, decrypt them on `executor` in chunks and write the
+    seeds to `store` (keyed by id) in batches.
+
+    Only a bounded number of chunks is in flight at a time, so memory does
+    not depend on the input size. Yields events as they happen:
+        ("error",    {"line", "id", "error"})   per failed record
+        ("progress", report dict)                every PROGRESS_EVERY records
+        ("done",     report dict + "errors")     once, at the end
+    """
+    report = ImportReport()
+    max_in_flight = max(1, executor.max_workers)
+    in_flight: set[asyncio.Future] = set()
+    to_write: list[tuple[str, bytes]] = []
+    chunk: list[tuple[int, str, str]] = []
+    next_progress = PROGRESS_EVERY
+
+    async def flush_writes():
+        if to_write:
+            batch = list(to_write)
+            to_write.clear()
+            await asyncio.to_thread(store.put_many, batch)
+            report.imported += len(batch)
+
+    async def collect(wait_for_all: bool) -> list:
+        events = []
+        while in_flight and (wait_for_all or len(in_flight) >= max_in_flight):
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            in_flight.difference_update(done)
+            for task in done:
+                for line_no, record_id, hex_seed in task.result():
+                    if hex_seed is None:
+                        events.append(("error", report.add_error(line_no, record_id, "Decryption failed")))
+                    else:
+                        to_write.append((record_id, bytes.fromhex(hex_seed)))
+            if len(to_write) >= write_batch:
+                await flush_writes()
+        return events
+
+    try:
+        line_no = 0
+        async for line in lines:
+            line_no += 1
+            if not line.strip():
+                continue
+            report.read += 1
+
+            record = _parse_record(line)
+            if record is None:
+                yield "error", report.add_error(line_no, None, "Invalid record")
+            else:
+                chunk.append((line_no, *record))
+
+            if len(chunk) >= chunk_size:
+                in_flight.add(asyncio.ensure_future(_decrypt_chunk(executor, chunk)))
+                chunk = []
+                for event in await collect(wait_for_all=False):
+                    yield event
+
+            if report.read >= next_progress:
+                next_progress += PROGRESS_EVERY
+                yield "progress", report.as_dict()
+
+        if chunk:
+            in_flight.add(asyncio.ensure_future(_decrypt_chunk(executor, chunk)))
+        for event in await collect(wait_for_all=True):
+            yield event
+        await flush_writes()
+    finally:
+        # Consumer went away (e.g. client disconnected): drop pending work
+        for task in in_flight:
+            task.cancel()
+
+    yield "done", {**report.as_dict(), "errors": report.errors}
@@ -0,0 +1,330 @@
+import bisect
+import logging
+import mmap
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+TIMESTAMP_SIZE = 19
+# "2025-01-01 12:34:00 - 2FA Code: 123456\n"
+RECORD_SIZE = len(" - 2FA Code: ") + TIMESTAMP_SIZE + 6 + 1
+SEGMENT_PREFIX = "codes-"
+SEGMENT_SUFFIX = ".log"
+
+
+def format_code_log_line(when: datetime, code: str) -> str:
+    """
+    One code log line, e.g. "2025-01-01 12:34:00 - 2FA Code: 123456".
+    This is the format scripts/log_2fa_cron.py has always printed.
+    """
+    timestamp_str = when.astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+    return f"{timestamp_str} - 2FA Code: {code}"
+
+
+class BufferedLineWriter:
+    """
+    Collects lines in memory and appends them to `path` on flush().
+    The file is opened per flush, so it may be rotated or removed between
+    flushes without the writer holding a stale handle.
+
+    With `max_lines`, the file is cut back to its last `max_lines` lines
+    whenever it holds about twice that many, so it stays bounded without
+    rewriting it on every flush.
+    """
+
+    def __init__(self, path: Path, max_lines: int = 0):
+        self.path = path
+        self.max_lines = max_lines
+        self._lock = threading.Lock()
+        self._lines: list[str] = []
+
+    def write_line(self, line: str) -> None:
+        with self._lock:
+            self._lines.append(line)
+
+    def flush(self) -> None:
+        with self._lock:
+            lines, self._lines = self._lines, []
+        if not lines:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in lines))
+                size = f.tell()
+        except Exception:
+            # Keep the lines for the next attempt rather than losing them
+            with self._lock:
+                self._lines[:0] = lines
+            raise
+        if self.max_lines and size > 2 * self.max_lines * RECORD_SIZE:
+            self._trim()
+
+    def _trim(self) -> None:
+        # Written aside and renamed over: readers see the old or new file
+        kept = self.path.read_bytes().splitlines(keepends=True)[-self.max_lines:]
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_bytes(b"".join(kept))
+        os.replace(tmp_path, self.path)
+
+
+class RotatingCodeLog:
+    """
+    The code log as a directory of rotated, searchable segments.
+
+    Every segment holds only fixed-width lines in the usual format
+    (RECORD_SIZE bytes each, oldest first), so record i starts at byte
+    i * RECORD_SIZE and the leading "YYYY-MM-DD HH:MM:SS" of a record
+    sorts like its time. A lookup binary-searches the segment list (names
+    carry each segment's first timestamp), then binary-searches inside the
+    memory-mapped segment. No index file is needed and nothing is read
+    beyond the records returned.
+
+    A new segment is started every `segment_seconds` or after
+    `max_records` lines. Only the newest `max_segments` are kept.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_seconds: int = 86400,
+        max_records: int = 100_000,
+        max_segments: int = 90,
+    ):
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.max_records = max_records
+        self.max_segments = max_segments
+
+        self._lock = threading.Lock()
+        self._pending: list[tuple[datetime, str]] = []
+        self._last_key: bytes | None = None
+
+    # ---------- writing ----------
+
+    def append(self, when: datetime, code: str) -> None:
+        """Buffer one entry; it is written on the next flush()."""
+        with self._lock:
+            self._pending.append((when, code))
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if pending:
+                self._write(pending)
+
+    def _write(self, entries: list[tuple[datetime, str]]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = self.segments()
+        current = segments[-1] if segments else None
+        last_key = self._last_key
+        if last_key is None and current is not None:
+            last_key = _last_record_key(current)
+
+        count = _record_count(current) if current is not None else 0
+        handle = None
+        try:
+            for when, code in entries:
+                line = format_code_log_line(when, code) + "\n"
+                if len(line) != RECORD_SIZE:
+                    logger.warning("Skipping code log entry of unexpected size: %r", line)
+                    continue
+                data = line.encode("ascii")
+                key = data[:TIMESTAMP_SIZE]
+                if last_key is not None and key <= last_key:
+                    # Segments must stay sorted; drop entries from a clock jump back
+                    logger.warning("Skipping out-of-order code log entry %s", key.decode())
+                    continue
+
+                if current is None or self._should_rotate(current, count, when):
+                    if handle is not None:
+                        handle.close()
+                        handle = None
+                    current = self.directory / _segment_name(when)
+                    count = 0
+                if handle is None:
+                    handle = open(current, "ab")
+                handle.write(data)
+                count += 1
+                last_key = key
+        finally:
+            if handle is not None:
+                handle.close()
+
+        self._last_key = last_key
+        self._prune()
+
+    def _should_rotate(self, segment: Path, count: int, when: datetime) -> bool:
+        started = _segment_start(segment)
+        if (when - started).total_seconds() >= self.segment_seconds:
+            return True
+        return count >= self.max_records
+
+    def _prune(self) -> None:
+        segments = self.segments()
+        for old in segments[: max(0, len(segments) - self.max_segments)]:
+            old.unlink(missing_ok=True)
+
+    # ---------- reading ----------
+
+    def segments(self) -> list[Path]:
+        """Segment files, oldest first."""
+        if not self.directory.is_dir():
+            return []
+        return sorted(
+            p for p in self.directory.iterdir()
+            if p.name.startswith(SEGMENT_PREFIX) and p.name.endswith(SEGMENT_SUFFIX)
+        )
+
+    def find_at(self, when: datetime) -> str | None:
+        """
+        The newest line logged at or before `when`, without its newline.
+        """
+        key = _time_key(when)
+        segments = self.segments()
+        starts = [_segment_start_key(p) for p in segments]
+        i = bisect.bisect_right(starts, key) - 1
+        while i >= 0:
+            with _SegmentView(segments[i]) as view:
+                index = view.bisect_right(key) - 1
+                if index >= 0:
+                    return view.record(index)
+            i -= 1
+        return None
+
+    def iter_range(self, start: datetime, end: datetime):
+        """
+        Yield lines (with newline) logged in [start, end], oldest first,
+        one segment mapped at a time.
+        """
+        low, high = _time_key(start), _time_key(end)
+        segments = self.segments()
+        starts = [_segment_start_key(p) for p in segments]
+        first = max(0, bisect.bisect_right(starts, low) - 1)
+
+        for segment, segment_start in zip(segments[first:], starts[first:]):
+            if segment_start > high:
+                break
+            with _SegmentView(segment) as view:
+                index = view.bisect_left(low)
+                while index < view.count:
+                    line = view.record(index)
+                    if line[:TIMESTAMP_SIZE].encode("ascii") > high:
+                        return
+                    yield line + "\n"
+                    index += 1
+
+
+class _SegmentView:
+    """Read-only mmap of one segment, addressed by record index."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._mm = None
+        self.count = 0
+
+    def __enter__(self):
+        try:
+            with open(self.path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size >= RECORD_SIZE:
+                    self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    # Ignore a torn last record
+                    self.count = size // RECORD_SIZE
+        except FileNotFoundError:
+            pass  # pruned while we were looking
+        return self
+
+    def __exit__(self, *exc):
+        if self._mm is not None:
+            self._mm.close()
+
+    def key(self, index: int) -> bytes:
+        offset = index * RECORD_SIZE
+        return self._mm[offset:offset + TIMESTAMP_SIZE]
+
+    def record(self, index: int) -> str:
+        offset = index * RECORD_SIZE
+        return self._mm[offset:offset + RECORD_SIZE - 1].decode("ascii")
+
+    def bisect_left(self, key: bytes) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def bisect_right(self, key: bytes) -> int:
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if key < self.key(mid):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+
+def _time_key(when: datetime) -> bytes:
+    # Not strftime: "%Y" is not zero-padded before year 1000, and keys must
+    # sort byte-wise like times
+    when = when.astimezone(timezone.utc)
+    return (
+        f"{when.year:04d}-{when.month:02d}-{when.day:02d} "
+        f"{when.hour:02d}:{when.minute:02d}:{when.second:02d}"
+    ).encode("ascii")
+
+
+def _segment_name(when: datetime) -> str:
+    return f"{SEGMENT_PREFIX}{when.astimezone(timezone.utc):%Y%m%dT%H%M%S}{SEGMENT_SUFFIX}"
+
+
+def _segment_start(path: Path) -> datetime:
+    stamp = path.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]
+    return datetime.strptime(stamp, "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+
+
+def _segment_start_key(path: Path) -> bytes:
+    return _time_key(_segment_start(path))
+
+
+def _record_count(path: Path) -> int:
+    try:
+        return path.stat().st_size // RECORD_SIZE
+    except FileNotFoundError:
+        return 0
+
+
+def _last_record_key(path: Path) -> bytes | None:
+    with _SegmentView(path) as view:
+        return view.key(view.count - 1) if view.count else None
+
+
+def parse_log_time(value: str) -> datetime:
+    """
+    Parse a query time: Unix seconds ("1700000000") or ISO 8601
+    ("2025-01-01T12:34:00Z"; naive values are taken as UTC). Returns it
+    in UTC; ValueError for anything unparsable or outside what datetime
+    can represent in UTC.
+    """
+    try:
+        seconds = float(value)
+    except ValueError:
+        when = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if when.tzinfo is None:
+            return when.replace(tzinfo=timezone.utc)
+        try:
+            return when.astimezone(timezone.utc)
+        except OverflowError as e:
+            raise ValueError(f"time out of range: {value!r}") from e
+    try:
+        return datetime.fromtimestamp(seconds, timezone.utc)
+    except (OverflowError, OSError) as e:
+        raise ValueError(f"time out of range: {value!r}") from e
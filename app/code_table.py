@@ -0,0 +1,115 @@
+import hmac
+import threading
+import unicodedata
+
+from .totp_engine import TOTPEngine
+
+# Steps kept around the most recent step seen; older ones are dropped.
+KEEP_STEPS = 4
+# Hard cap so lookups far from "now" (e.g. historic for_time) cannot grow it
+MAX_ENTRIES = 32
+
+
+class CodeTable:
+    """
+    Codes of one seed keyed by TOTP time step.
+
+    A step's code is computed the first time any request needs it and then
+    reused by every /generate-2fa and /verify-2fa call until it falls out of
+    the window, so a period costs one HMAC per step instead of one per
+    request (verify with valid_window=1 otherwise needs 3).
+
+    Steps older than `latest - KEEP_STEPS` are pruned whenever a newer step
+    is seen, which keeps the table at a handful of entries.
+    """
+
+    __slots__ = ("engine", "_codes", "_latest", "_lock")
+
+    def __init__(self, engine: TOTPEngine):
+        self.engine = engine
+        self._codes: dict[int, str] = {}
+        self._latest = -1
+        self._lock = threading.Lock()
+
+    def code_at_step(self, step: int) -> str:
+        code = self._codes.get(step)
+        if code is not None:
+            return code
+
+        code = self.engine.code_at_step(step)
+        with self._lock:
+            if step > self._latest:
+                self._latest = step
+                low = step - KEEP_STEPS
+                for old in [s for s in self._codes if s < low]:
+                    del self._codes[old]
+            if len(self._codes) >= MAX_ENTRIES:
+                self._codes.clear()
+            self._codes[step] = code
+        return code
+
+    def now(self, for_time: float | None = None) -> str:
+        return self.code_at_step(self.engine.time_step(for_time))
+
+    def window(self, valid_window: int, for_time: float | None = None) -> list[str]:
+        """
+        Codes for steps [t - valid_window, t + valid_window], oldest first.
+        """
+        step = self.engine.time_step(for_time)
+        return [self.code_at_step(step + i) for i in range(-valid_window, valid_window + 1)]
+
+    def verify(self, code: str, valid_window: int = 0, for_time: float | None = None) -> bool:
+        """
+        Same result as TOTPEngine.verify, but against cached codes. Every
+        window code is compared (no early exit) with hmac.compare_digest.
+        """
+        return match_code(code, self.window(valid_window, for_time))
+
+    def match_offset(self, code: str, offsets, for_time: float | None = None) -> int | None:
+        """
+        Compare `code` with the codes of steps t + offset, in the order
+        given, and return the first offset that matches (None if none
+        does). Used with the most likely offset first, so the usual case
+        is one comparison.
+        """
+        code = _normalize(code)
+        if code is None:
+            return None
+        step = self.engine.time_step(for_time)
+        for offset in offsets:
+            if hmac.compare_digest(code, self.code_at_step(step + offset)):
+                return offset
+        return None
+
+
+def _normalize(code: str) -> str | None:
+    # Same NFKC normalisation pyotp applies; None if still not ASCII
+    if not code.isascii():
+        code = unicodedata.normalize("NFKC", code)
+        if not code.isascii():
+            return None
+    return code
+
+
+def match_code(code: str, expected_codes: list[str]) -> bool:
+    """
+    Constant-time check of `code` against each of `expected_codes`
+    (after the NFKC normalisation pyotp applies).
+    """
+    return match_index(code, expected_codes) is not None
+
+
+def match_index(code: str, expected_codes: list[str]) -> int | None:
+    """
+    Like match_code, but returns the index of the matching code (None if
+    none matches). Every code is still compared.
+    """
+    code = _normalize(code)
+    if code is None:
+        return None
+
+    matched = None
+    for index, expected in enumerate(expected_codes):
+        if hmac.compare_digest(code, expected) and matched is None:
+            matched = index
+    return matched
@@ -8,4 +8,139 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_SEED_PATH = PROJECT_ROOT / "data" / "seed.txt"
 
 SEED_FILE_PATH = Path(os.getenv("SEED_FILE_PATH", DEFAULT_SEED_PATH))
-STUDENT_PRIVATE_KEY_PATH = PROJECT_ROOT / "student_private.pem"
+STUDENT_PRIVATE_KEY_PATH = Path(
+    os.getenv("STUDENT_PRIVATE_KEY_PATH", PROJECT_ROOT / "student_private.pem")
+)
+
+# How often (seconds) the in-memory seed cache stat()s SEED_FILE_PATH to
+# notice changes made outside the API. 0 = check on every request.
+SEED_CACHE_CHECK_INTERVAL = float(os.getenv("SEED_CACHE_CHECK_INTERVAL", "1.0"))
+
+# Additional private keys (os.pathsep-separated PEM paths) parsed at startup
+# so that swapping STUDENT_PRIVATE_KEY_PATH to one of them needs no re-parse.
+EXTRA_PRIVATE_KEY_PATHS = [
+    Path(p) for p in os.getenv("EXTRA_PRIVATE_KEY_PATHS", "").split(os.pathsep) if p
+]
+
+# How often (seconds) the key manager stat()s the private key PEM to pick
+# up a replaced file.
+PRIVATE_KEY_CHECK_INTERVAL = float(os.getenv("PRIVATE_KEY_CHECK_INTERVAL", "5.0"))
+
+# Skip the RSA consistency checks when parsing private keys. They take most
+# of a 4096-bit key's load time (~0.5 s, paid at startup and in every decrypt
+# worker); only safe for keys you generated yourself (scripts/generate_keys.py).
+PRIVATE_KEY_SKIP_VALIDATION = os.getenv("PRIVATE_KEY_SKIP_VALIDATION", "0") == "1"
+
+# Multi-tenant seed store (memory-mapped hash table), used when a request
+# carries a user_id. Lives next to the single seed file by default.
+SEED_STORE_PATH = Path(os.getenv("SEED_STORE_PATH", SEED_FILE_PATH.parent / "seeds.idx"))
+SEED_STORE_INITIAL_CAPACITY = int(os.getenv("SEED_STORE_INITIAL_CAPACITY", "1024"))
+
+# Pool for RSA private-key operations (/decrypt-seed). "process" spreads the
+# work over cores; "thread" keeps it in-process. Requests beyond
+# DECRYPT_QUEUE_SIZE outstanding jobs are rejected with 503.
+DECRYPT_EXECUTOR = os.getenv("DECRYPT_EXECUTOR", "process")
+DECRYPT_WORKERS = int(os.getenv("DECRYPT_WORKERS", os.cpu_count() or 1))
+DECRYPT_QUEUE_SIZE = int(os.getenv("DECRYPT_QUEUE_SIZE", DECRYPT_WORKERS * 4))
+
+# Background decrypt jobs (POST /decrypt-seed?async=1, GET /jobs/{id}).
+# State files live in JOBS_DIR so any worker can answer a poll; finished
+# jobs are kept JOBS_TTL seconds. More than JOBS_MAX_QUEUED waiting jobs
+# are rejected with 503; a long-poll waits at most JOBS_MAX_WAIT seconds.
+JOBS_DIR = Path(os.getenv("JOBS_DIR", SEED_FILE_PATH.parent / "jobs"))
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", DECRYPT_WORKERS))
+JOBS_MAX_QUEUED = int(os.getenv("JOBS_MAX_QUEUED", "1000"))
+JOBS_TTL = float(os.getenv("JOBS_TTL", "300"))
+JOBS_MAX_WAIT = float(os.getenv("JOBS_MAX_WAIT", "30"))
+
+# Maximum number of items accepted by POST /verify-2fa/batch (the NDJSON
+# streaming variant has no limit).
+VERIFY_BATCH_MAX_ITEMS = int(os.getenv("VERIFY_BATCH_MAX_ITEMS", "1000"))
+
+# Bulk seed import (/decrypt-seed/bulk, scripts/bulk_import_seeds.py):
+# records per decrypt job and seeds per seed-store write.
+BULK_IMPORT_CHUNK_SIZE = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "16"))
+BULK_IMPORT_WRITE_BATCH = int(os.getenv("BULK_IMPORT_WRITE_BATCH", "500"))
+
+# In-process replacement for cron/2fa-cron: when enabled, the API appends
+# "<UTC time> - 2FA Code: <code>" to CODE_LOG_PATH at every minute boundary.
+# Lines are buffered and written every CODE_LOG_FLUSH_INTERVAL seconds.
+CRON_IN_PROCESS = os.getenv("CRON_IN_PROCESS", "0") == "1"
+CODE_LOG_PATH = Path(os.getenv("CODE_LOG_PATH", PROJECT_ROOT / "cron" / "last_code.txt"))
+CODE_LOG_FLUSH_INTERVAL = float(os.getenv("CODE_LOG_FLUSH_INTERVAL", "60"))
+
+# CODE_LOG_PATH only keeps about its last CODE_LOG_MAX_LINES lines (cut back
+# once it holds twice that; 0 = never); the full history is in the segments.
+CODE_LOG_MAX_LINES = int(os.getenv("CODE_LOG_MAX_LINES", "10080"))
+
+# Rotated, searchable copy of the code log written by the in-process
+# scheduler or scripts/log_2fa_cron.py, and served by GET /code-log.
+CODE_LOG_DIR = Path(os.getenv("CODE_LOG_DIR", CODE_LOG_PATH.parent / "segments"))
+CODE_LOG_SEGMENT_SECONDS = int(os.getenv("CODE_LOG_SEGMENT_SECONDS", "86400"))
+CODE_LOG_SEGMENT_MAX_RECORDS = int(os.getenv("CODE_LOG_SEGMENT_MAX_RECORDS", "100000"))
+CODE_LOG_MAX_SEGMENTS = int(os.getenv("CODE_LOG_MAX_SEGMENTS", "90"))
+
+# Prometheus-style metrics: per-route latency middleware and GET /metrics.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Lean mode: GET /generate-2fa and POST /verify-2fa are answered by a small
+# ASGI handler (no pydantic parsing/serialization, pre-encoded JSON bodies).
+# Same status codes and bodies; anything unusual falls through to FastAPI.
+LEAN_MODE = os.getenv("LEAN_MODE", "0") == "1"
+
+# Unix domain socket for the binary verification protocol (app/uds_protocol.py),
+# for sidecar callers on the same host. Unset = no socket listener.
+UDS_PATH = Path(os.environ["UDS_PATH"]) if os.getenv("UDS_PATH") else None
+
+# Per-user clock drift tracking for /verify-2fa: the step offset each user's
+# codes usually match is tried first. DRIFT_MAX_WINDOW bounds the offsets
+# ever accepted; above 1 (the normal ±1 window), users whose drift has been
+# seen DRIFT_ADAPT_CONFIDENCE times get a ±1 window centred on their drift.
+DRIFT_TRACKING = os.getenv("DRIFT_TRACKING", "1") == "1"
+DRIFT_TABLE_SIZE = int(os.getenv("DRIFT_TABLE_SIZE", "65536"))
+DRIFT_MAX_WINDOW = int(os.getenv("DRIFT_MAX_WINDOW", "1"))
+DRIFT_ADAPT_CONFIDENCE = int(os.getenv("DRIFT_ADAPT_CONFIDENCE", "3"))
+
+# Replay protection for /verify-2fa: a code accepted once is refused for the
+# rest of its window. The cache holds at most REPLAY_CACHE_MAX_ENTRIES codes
+# (fixed memory, shared by all workers); when a time step's share is used up,
+# REPLAY_CACHE_FULL_POLICY decides: "reject" new codes (fail closed) or
+# "allow" them without replay protection (fail open).
+REPLAY_PROTECTION = os.getenv("REPLAY_PROTECTION", "0") == "1"
+REPLAY_CACHE_MAX_ENTRIES = int(os.getenv("REPLAY_CACHE_MAX_ENTRIES", "262144"))
+REPLAY_CACHE_FULL_POLICY = os.getenv("REPLAY_CACHE_FULL_POLICY", "reject")
+
+# Rate limiting of verification attempts (POST /verify-2fa and the batch
+# endpoints): token buckets of RATE_LIMIT_BURST attempts, refilled at
+# RATE_LIMIT_RATE per second, per client IP and/or user id (RATE_LIMIT_KEYS,
+# comma separated "ip", "user"). Buckets live in a fixed table of
+# RATE_LIMIT_SLOTS entries shared by all workers. Over the limit: 429.
+RATE_LIMIT = os.getenv("RATE_LIMIT", "0") == "1"
+RATE_LIMIT_KEYS = tuple(k.strip() for k in os.getenv("RATE_LIMIT_KEYS", "ip,user").split(",") if k.strip())
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "0.2"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "10"))
+RATE_LIMIT_SLOTS = int(os.getenv("RATE_LIMIT_SLOTS", "65536"))
+
+# Pre-generated RSA keypair pool (app/key_pool.py, scripts/key_pool.py):
+# KEY_POOL_SIZE keys of KEY_POOL_KEY_SIZE bits are kept ready in KEY_POOL_DIR,
+# encrypted with KEY_POOL_PASSPHRASE, and refilled in the background by
+# KEY_POOL_WORKERS processes. 0 = no pool (keys are generated inline).
+KEY_POOL_DIR = Path(os.getenv("KEY_POOL_DIR", SEED_FILE_PATH.parent / "key_pool"))
+KEY_POOL_SIZE = int(os.getenv("KEY_POOL_SIZE", "0"))
+KEY_POOL_KEY_SIZE = int(os.getenv("KEY_POOL_KEY_SIZE", "4096"))
+KEY_POOL_WORKERS = int(os.getenv("KEY_POOL_WORKERS", "1"))
+KEY_POOL_PASSPHRASE = os.getenv("KEY_POOL_PASSPHRASE")
+
+# Profiling surface, all off by default. PROFILING_ENABLED=1 adds
+# GET /debug/profile?seconds=N: samples every thread's stack for at most
+# PROFILING_MAX_SECONDS and returns collapsed stacks (flamegraph input).
+# SLOW_REQUEST_MS > 0 records the stage timings of each request slower than
+# that in a ring buffer of SLOW_REQUEST_BUFFER entries per worker, served by
+# GET /debug/slow-requests. Both require the header "Authorization: Bearer
+# <ADMIN_TOKEN>"; without ADMIN_TOKEN neither endpoint is registered (slow
+# requests are then only counted in /metrics).
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "60"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+SLOW_REQUEST_BUFFER = int(os.getenv("SLOW_REQUEST_BUFFER", "256"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
@@ -1,4 +1,5 @@
 import base64
+import hashlib
 from pathlib import Path
 
 from cryptography.hazmat.primitives import hashes, serialization
@@ -12,10 +13,20 @@ def load_private_key(path: Path):
     if not path.exists():
         raise FileNotFoundError(f"Private key file not found at {path}")
 
-    pem_data = path.read_bytes()
+    return load_private_key_from_pem(path.read_bytes())
+
+
+def load_private_key_from_pem(pem_data: bytes, skip_validation: bool = False):
+    """
+    Parse an RSA private key from PEM bytes.
+
+    skip_validation skips the RSA consistency checks (much faster for large
+    keys); only for keys from a trusted source.
+    """
     private_key = serialization.load_pem_private_key(
         pem_data,
         password=None,  # we didn't set a password when generating
+        unsafe_skip_rsa_key_validation=skip_validation,
     )
     if not isinstance(private_key, rsa.RSAPrivateKey):
         raise TypeError("Loaded key is not an RSA private key")
@@ -23,6 +34,17 @@ def load_private_key(path: Path):
     return private_key
 
 
+def public_key_fingerprint(private_key) -> str:
+    """
+    SHA-256 fingerprint (hex) of the key's DER-encoded SubjectPublicKeyInfo.
+    """
+    der = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.DER,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return hashlib.sha256(der).hexdigest()
+
+
 def decrypt_seed(encrypted_seed_b64: str, private_key) -> str:
     """
     Decrypt base64-encoded encrypted seed using RSA/OAEP.
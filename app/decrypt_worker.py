@@ -0,0 +1,76 @@
+"""
+Functions executed inside the decrypt executor's worker processes.
+
+Each worker has its own KeyManager instance (module globals are per
+process), so the private key is parsed once per worker, not per job.
+Keys the API process has already validated are parsed without repeating
+the RSA consistency checks (most of a 4096-bit key's load time).
+
+cryptography is imported by the first decryption (or key load), not with
+this module: app.main imports it, and the TOTP paths never need it.
+"""
+import logging
+import os
+import time
+
+from .key_manager import key_manager
+
+logger = logging.getLogger(__name__)
+
+
+def init_decrypt_worker(trusted_pem_digests: frozenset[bytes] = frozenset()) -> None:
+    key_manager.trust(trusted_pem_digests)
+    try:
+        key_manager.load()
+    except Exception as e:
+        # Not fatal: jobs will fail with the usual "Decryption failed"
+        # until the key appears, and get() retries the load.
+        logger.warning("Private key not loaded in decrypt worker: %s", e)
+
+
+def warm_up_worker() -> int:
+    """
+    No-op job for BoundedExecutor.prestart: by the time it runs, this
+    worker's initializer has loaded the key. Holds the worker a moment so
+    the other workers pick up their own warm-up job.
+    """
+    time.sleep(0.05)
+    return os.getpid()
+
+
+def decrypt_with_active_key(encrypted_seed_b64: str) -> str:
+    """
+    Decrypt a base64 RSA-OAEP encrypted seed with the active private key.
+    Returns the 64-character hex seed; raises like crypto_utils.decrypt_seed.
+    """
+    from .crypto_utils import decrypt_seed
+
+    return decrypt_seed(encrypted_seed_b64, key_manager.get())
+
+
+def decrypt_with_active_key_timed(encrypted_seed_b64: str) -> tuple[str, float]:
+    """
+    decrypt_with_active_key, also returning the seconds spent decrypting
+    inside the worker (so the API can tell decrypt time from queue wait).
+    """
+    start = time.perf_counter()
+    hex_seed = decrypt_with_active_key(encrypted_seed_b64)
+    return hex_seed, time.perf_counter() - start
+
+
+def decrypt_many_with_active_key(records: list[tuple[str, str]]) -> list[tuple[str, str | None]]:
+    """
+    Decrypt a chunk of (record_id, encrypted_seed_b64) pairs in one job.
+    Returns (record_id, hex_seed) pairs; hex_seed is None when that record
+    failed (details are not returned, as for /decrypt-seed).
+    """
+    from .crypto_utils import decrypt_seed
+
+    private_key = key_manager.get()
+    results = []
+    for record_id, encrypted_seed_b64 in records:
+        try:
+            results.append((record_id, decrypt_seed(encrypted_seed_b64, private_key)))
+        except Exception:
+            results.append((record_id, None))
+    return results
@@ -0,0 +1,90 @@
+from array import array
+
+from .config import DRIFT_ADAPT_CONFIDENCE, DRIFT_MAX_WINDOW, DRIFT_TABLE_SIZE
+
+# Confidence saturates here, so a long-stable client re-learns a new drift
+# after a handful of verifications at the new offset
+MAX_CONFIDENCE = 7
+
+
+class DriftTracker:
+    """
+    Which TOTP step offset each user's codes usually match.
+
+    A fixed array of `size` 32-bit slots indexed by a hash of the user id
+    (None = the single seed file), so memory does not grow with users.
+    Each slot packs a 16-bit tag (other hash bits, to tell colliding users
+    apart), the offset (+128) and a small confidence counter. A success at
+    the stored offset raises confidence, at another offset lowers it, and
+    the offset is replaced once confidence reaches zero. A slot is one
+    array element, so readers never see a half-written slot.
+
+    User ids are hashed with Python's hash(), salted per process tree like
+    the rate limiter's keys, so clients cannot choose ids that share (and
+    keep resetting) someone else's slot.
+
+    lookup() orders the window so the likely offset comes first. With
+    max_window > valid_window, a user whose drift is confirmed
+    (confidence >= adapt_confidence) gets the ±valid_window window centred
+    on that drift, never reaching beyond ±max_window.
+    """
+
+    def __init__(self, size: int, valid_window: int = 1, max_window: int = 1, adapt_confidence: int = 3):
+        self.size = max(1, size)
+        self.valid_window = valid_window
+        self.max_window = max(valid_window, min(max_window, 127))
+        self.adapt_confidence = adapt_confidence
+        self._slots = array("L", [0]) * self.size
+        self._orders: dict[tuple[int, int], tuple[int, ...]] = {}
+        self._default = self._order(0, 0)
+
+    def lookup(self, user_id: str | None) -> tuple[int, tuple[int, ...]]:
+        """
+        (key, offsets): step offsets to try for `user_id`, most likely
+        first, and the key to pass to record() after a successful match.
+        """
+        key = hash(user_id) & 0xFFFFFFFF if user_id else 0
+        slot = self._slots[key % self.size]
+        if slot >> 16 != key >> 16 or not slot & 0xFF:
+            return key, self._default
+        offset = ((slot >> 8) & 0xFF) - 128
+        center = offset if (slot & 0xFF) >= self.adapt_confidence else 0
+        return key, self._order(offset, center)
+
+    def record(self, key: int, offset: int) -> None:
+        """Note a successful verification at step `offset`."""
+        index, tag = key % self.size, key >> 16
+        slot = self._slots[index]
+        stored = ((slot >> 8) & 0xFF) - 128
+        confidence = slot & 0xFF
+        if slot >> 16 != tag or confidence == 0:
+            stored, confidence = offset, 1
+        elif stored == offset:
+            if confidence == MAX_CONFIDENCE:
+                return
+            confidence += 1
+        else:
+            confidence -= 1
+            if confidence == 0:
+                stored, confidence = offset, 1
+        self._slots[index] = (tag << 16) | ((stored + 128) << 8) | confidence
+
+    def _order(self, likely: int, center: int) -> tuple[int, ...]:
+        key = (likely, center)
+        order = self._orders.get(key)
+        if order is None:
+            low = max(center - self.valid_window, -self.max_window)
+            high = min(center + self.valid_window, self.max_window)
+            # Likely offset first, then the rest nearest-first
+            order = tuple(sorted(range(low, high + 1), key=lambda o: (abs(o - likely), abs(o))))
+            self._orders[key] = order
+        return order
+
+
+# ±1 step, the window /verify-2fa accepts
+drift_tracker = DriftTracker(
+    DRIFT_TABLE_SIZE,
+    valid_window=1,
+    max_window=DRIFT_MAX_WINDOW,
+    adapt_confidence=DRIFT_ADAPT_CONFIDENCE,
+)
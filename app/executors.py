@@ -0,0 +1,136 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from .config import DECRYPT_EXECUTOR, DECRYPT_QUEUE_SIZE, DECRYPT_WORKERS
+from .decrypt_worker import init_decrypt_worker
+
+
+class ExecutorSaturated(Exception):
+    """Raised by BoundedExecutor.submit when no queue slot is free."""
+
+
+class BoundedExecutor:
+    """
+    Process (or thread) pool with a hard cap on in-flight + queued work.
+
+    submit() fails fast with ExecutorSaturated once `max_pending` jobs are
+    outstanding, so callers can answer 503 immediately instead of piling
+    requests up behind CPU-heavy RSA operations. The pool itself is created
+    on first use and re-created if a worker process dies; `initargs` are
+    read each time it is created.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_pending: int,
+        kind: str = "process",
+        initializer=None,
+        initargs: tuple = (),
+        name: str = "executor",
+    ):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"executor kind must be 'process' or 'thread', got {kind!r}")
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(self.max_workers, max_pending)
+        self.kind = kind
+        self.initializer = initializer
+        self.initargs = initargs
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs submitted and not finished yet (running + queued)."""
+        return self._pending
+
+    def submit(self, fn, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise ExecutorSaturated(f"{self.name} queue is full")
+            self._pending += 1
+
+        try:
+            future = self._submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args):
+        """Submit and await the result from asyncio code."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def prestart(self, fn) -> list[Future]:
+        """
+        Start the pool now rather than on first use: submits `fn` once per
+        worker, so every worker is started and runs the initializer while
+        the caller goes on. `fn` should hold its worker briefly, so that
+        each job lands on a different worker. Jobs submitted meanwhile
+        queue behind the warm-up, which is never slower than a cold start.
+        """
+        return [self.submit(fn) for _ in range(self.max_workers)]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ---------- internals ----------
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _submit(self, fn, *args) -> Future:
+        try:
+            return self._get_executor().submit(fn, *args)
+        except BrokenExecutor:
+            # A worker process died; start a fresh pool and retry once
+            with self._lock:
+                self._executor = None
+            return self._get_executor().submit(fn, *args)
+
+    def _get_executor(self):
+        executor = self._executor
+        if executor is not None:
+            return executor
+        with self._lock:
+            if self._executor is None:
+                if self.kind == "process":
+                    # forkserver: workers never fork from a process that has
+                    # live threads (uvicorn's threadpool, lock holders, ...)
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("forkserver"),
+                        initializer=self.initializer,
+                        initargs=self.initargs,
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=self.name,
+                        initializer=self.initializer,
+                        initargs=self.initargs,
+                    )
+            return self._executor
+
+
+# Private-key operations (RSA-OAEP seed decryption) run here, away from the
+# threadpool that serves /generate-2fa and /verify-2fa.
+decrypt_executor = BoundedExecutor(
+    max_workers=DECRYPT_WORKERS,
+    max_pending=DECRYPT_QUEUE_SIZE,
+    kind=DECRYPT_EXECUTOR,
+    initializer=init_decrypt_worker,
+    name="decrypt",
+)
@@ -0,0 +1,251 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from pathlib import Path
+
+from .executors import ExecutorSaturated
+
+logger = logging.getLogger(__name__)
+
+_JOB_ID = re.compile(r"^[A-Za-z0-9_-]{22}$")
+_FINISHED = ("done", "failed")
+# How often a long-poll re-reads a job run by another worker process
+_REMOTE_POLL_INTERVAL = 0.1
+# Queued and running jobs expire too, so records whose owner vanished
+# unnoticed are swept eventually; no job waits or runs anywhere near this
+_STALE_AFTER = 3600.0
+
+
+class JobQueueFull(Exception):
+    """Raised by JobManager.submit when JOBS_MAX_QUEUED jobs are waiting."""
+
+
+class JobManager:
+    """
+    Background /decrypt-seed jobs (POST /decrypt-seed?async=1).
+
+    Jobs wait in a bounded in-memory queue and are run by `workers` tasks,
+    each awaiting `process(encrypted_seed, user_id)` (the same decrypt +
+    store as the synchronous endpoint; ExecutorSaturated is retried, any
+    other exception fails the job). Job state lives in small JSON files in
+    `directory`, so GET /jobs/{id} works from any worker process, and
+    finished jobs are deleted `ttl` seconds after they finish.
+
+    Each record names the process that owns the job by pid and start
+    time, so after a restart (when JOBS_DIR is persisted and pids are
+    reused) a job of the old process reads as failed rather than queued
+    forever. Unfinished records also expire, `stale_after` seconds after
+    their last update.
+
+    Failed jobs only ever report "Decryption failed", like the endpoint.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        process,
+        workers: int,
+        max_queued: int,
+        ttl: float,
+        max_wait: float,
+        stale_after: float = _STALE_AFTER,
+    ):
+        self.directory = directory
+        self.process = process
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.max_wait = max_wait
+        self.stale_after = max(ttl, stale_after)
+        self._queue: asyncio.Queue | None = None
+        self._events: dict[str, asyncio.Event] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._queue = asyncio.Queue(self.max_queued)
+        self._tasks = [asyncio.create_task(self._run_jobs()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, encrypted_seed_b64: str, user_id: str | None) -> dict:
+        """
+        Queue a job and return its state. Raises JobQueueFull when the
+        queue is at capacity.
+        """
+        if self._queue is None:
+            self.start()
+        if self._queue.full():
+            raise JobQueueFull()
+        job_id = secrets.token_urlsafe(16)
+        state = {"job_id": job_id, "status": "queued"}
+        await asyncio.to_thread(self._write, job_id, state)
+        self._events[job_id] = asyncio.Event()
+        self._queue.put_nowait((job_id, encrypted_seed_b64, user_id))
+        return state
+
+    async def get(self, job_id: str, wait: float = 0.0) -> dict | None:
+        """
+        Current state of a job, or None if unknown or expired. With `wait`,
+        returns as soon as the job finishes or after `wait` seconds.
+        """
+        if not _JOB_ID.match(job_id):
+            return None
+        state = await asyncio.to_thread(self._read, job_id)
+        wait = min(max(0.0, wait), self.max_wait)
+        if state is None or state["status"] in _FINISHED or wait == 0:
+            return state
+
+        event = self._events.get(job_id)
+        if event is not None:
+            # Running in this process: wake up exactly when it finishes
+            try:
+                await asyncio.wait_for(event.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+            return await asyncio.to_thread(self._read, job_id)
+
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(_REMOTE_POLL_INTERVAL, deadline - time.monotonic()))
+            state = await asyncio.to_thread(self._read, job_id)
+            if state is None or state["status"] in _FINISHED:
+                break
+        return state
+
+    # ---------- internals ----------
+
+    async def _run_jobs(self) -> None:
+        while True:
+            job_id, encrypted_seed_b64, user_id = await self._queue.get()
+            try:
+                await asyncio.to_thread(self._write, job_id, {"job_id": job_id, "status": "running"})
+                await self._process(encrypted_seed_b64, user_id)
+                state = {"job_id": job_id, "status": "done"}
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Do NOT leak internal error details per spec
+                state = {"job_id": job_id, "status": "failed", "error": "Decryption failed"}
+            try:
+                await asyncio.to_thread(self._write, job_id, state, time.time() + self.ttl)
+            except OSError as e:
+                logger.warning("Could not record result of job %s: %s", job_id, e)
+            event = self._events.pop(job_id, None)
+            if event is not None:
+                event.set()
+
+    async def _process(self, encrypted_seed_b64: str, user_id: str | None) -> None:
+        while True:
+            try:
+                return await self.process(encrypted_seed_b64, user_id)
+            except ExecutorSaturated:
+                # Synchronous requests have the pool busy: wait, don't fail
+                await asyncio.sleep(0.05)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.ttl, 60.0))
+            try:
+                await asyncio.to_thread(self._sweep)
+            except Exception:
+                logger.exception("Job sweep failed")
+
+    def _sweep(self) -> None:
+        for path in self.directory.glob("*.json"):
+            self._read(path.stem)  # deletes the file if expired
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def _write(self, job_id: str, state: dict, expires_at: float | None = None) -> None:
+        pid, started = _own_identity()
+        if expires_at is None:
+            expires_at = time.time() + self.stale_after
+        record = {**state, "pid": pid, "started": started, "expires_at": expires_at}
+        path = self._path(job_id)
+        tmp = path.with_name(f".{job_id}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(record), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _read(self, job_id: str) -> dict | None:
+        path = self._path(job_id)
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+        expires_at = record.pop("expires_at", None)
+        owner = (record.pop("pid", None), record.pop("started", None))
+        if expires_at is None:
+            # Unfinished record from before they expired
+            try:
+                expires_at = path.stat().st_mtime + self.stale_after
+            except FileNotFoundError:
+                return None
+        if time.time() >= expires_at:
+            path.unlink(missing_ok=True)
+            return None
+        if record["status"] not in _FINISHED and owner != _own_identity() and not _owner_alive(*owner):
+            # The worker that owned the queued job is gone; the job is lost
+            record = {"job_id": job_id, "status": "failed", "error": "Decryption failed"}
+            self._write(job_id, record, time.time() + self.ttl)
+        return record
+
+
+def _start_time(pid: int) -> int | None:
+    """Start time of process `pid` (clock ticks after boot), None if unknown."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_bytes()
+    except OSError:
+        return None
+    # Field 22; the command name (field 2) may contain spaces and ")"
+    return int(stat.rsplit(b")", 1)[1].split()[19])
+
+
+_identity: tuple[int, int | None] | None = None
+
+
+def _own_identity() -> tuple[int, int | None]:
+    """(pid, start time) of this process; recomputed after a fork."""
+    global _identity
+    pid = os.getpid()
+    if _identity is None or _identity[0] != pid:
+        _identity = (pid, _start_time(pid))
+    return _identity
+
+
+def _owner_alive(pid, started) -> bool:
+    if not pid_alive(pid):
+        return False
+    # A live pid that started at another time was reused by a new process
+    return started is None or _start_time(pid) in (None, started)
+
+
+def pid_alive(pid) -> bool:
+    """Whether a process with this pid exists (False for a non-int)."""
+    if not isinstance(pid, int):
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
@@ -0,0 +1,159 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from .config import (
+    EXTRA_PRIVATE_KEY_PATHS,
+    PRIVATE_KEY_CHECK_INTERVAL,
+    PRIVATE_KEY_SKIP_VALIDATION,
+    STUDENT_PRIVATE_KEY_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class KeyManager:
+    """
+    Keeps parsed RSA private keys in memory, identified by fingerprint.
+
+    - The active key is the one at `path`; it is parsed once (at startup via
+      `load()`, or lazily on the first `get()`).
+    - `path` is stat()-ed at most every `check_interval` seconds. When the
+      file was replaced, its PEM bytes are hashed first: if they match a key
+      we already parsed (e.g. one listed in `extra_paths`), switching is a
+      dict lookup instead of a 4096-bit re-parse.
+    - A replacement that fails to parse (half-written file, wrong type) is
+      ignored and the previous key stays active; it is retried on the next
+      check.
+    - PEMs another process already parsed with full validation (passed to
+      `trust()` by their SHA-256, as the decrypt workers get them from the
+      API process) are parsed without repeating the RSA consistency checks.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        check_interval: float = 5.0,
+        extra_paths: list[Path] | None = None,
+    ):
+        self.path = path
+        self.check_interval = check_interval
+        self.extra_paths = list(extra_paths or [])
+
+        self._lock = threading.Lock()
+        self._keys: dict[str, object] = {}  # fingerprint -> RSAPrivateKey
+        self._pem_index: dict[bytes, str] = {}  # sha256(PEM) -> fingerprint
+        self._validated: set[bytes] = set()  # sha256(PEM) parsed with validation here
+        self._trusted: frozenset[bytes] = frozenset()  # ... or elsewhere
+        self._active: str | None = None
+        self._file_id: tuple[int, int, int] | None = None
+        self._next_check = 0.0
+
+    def load(self) -> str:
+        """
+        Parse the active key and any extra keys. Returns the active key's
+        fingerprint. Raises if the active key cannot be loaded.
+        """
+        with self._lock:
+            for extra in self.extra_paths:
+                try:
+                    self._add_pem(extra.read_bytes())
+                except Exception as e:
+                    logger.warning("Could not load extra private key %s: %s", extra, e)
+            self._refresh(force=True)
+            return self._active
+
+    def get(self, fingerprint: str | None = None):
+        """
+        Return the active private key, or the key with `fingerprint`.
+
+        Raises:
+            FileNotFoundError: no usable key at `path`
+            KeyError: unknown fingerprint
+        """
+        if fingerprint is not None:
+            return self._keys[fingerprint]
+
+        active = self._active
+        if active is not None and time.monotonic() < self._next_check:
+            return self._keys[active]
+
+        with self._lock:
+            self._refresh(force=False)
+            return self._keys[self._active]
+
+    @property
+    def active_fingerprint(self) -> str | None:
+        return self._active
+
+    def fingerprints(self) -> list[str]:
+        return list(self._keys)
+
+    def validated_digests(self) -> frozenset[bytes]:
+        """SHA-256 digests of the PEMs this process parsed with full validation."""
+        with self._lock:
+            return frozenset(self._validated)
+
+    def trust(self, digests) -> None:
+        """Parse PEMs with these SHA-256 digests without re-validating them."""
+        with self._lock:
+            self._trusted = frozenset(digests)
+
+    # ---------- internals (called with self._lock held) ----------
+
+    def _add_pem(self, pem_data: bytes) -> str:
+        digest = hashlib.sha256(pem_data).digest()
+        fingerprint = self._pem_index.get(digest)
+        if fingerprint is None:
+            from .crypto_utils import load_private_key_from_pem, public_key_fingerprint
+
+            skip_validation = PRIVATE_KEY_SKIP_VALIDATION or digest in self._trusted
+            private_key = load_private_key_from_pem(pem_data, skip_validation)
+            if not skip_validation:
+                self._validated.add(digest)
+            fingerprint = public_key_fingerprint(private_key)
+            self._keys.setdefault(fingerprint, private_key)
+            self._pem_index[digest] = fingerprint
+        return fingerprint
+
+    def _refresh(self, force: bool) -> None:
+        now = time.monotonic()
+        if not force and self._active is not None and now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self._active is None:
+                raise FileNotFoundError(f"Private key file not found at {self.path}")
+            # Keep serving the key we have; the file may be mid-replacement
+            return
+
+        file_id = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if file_id == self._file_id and self._active is not None:
+            return
+
+        try:
+            fingerprint = self._add_pem(self.path.read_bytes())
+        except Exception as e:
+            if self._active is None:
+                raise
+            logger.warning("Ignoring unreadable private key at %s: %s", self.path, e)
+            return
+
+        if fingerprint != self._active:
+            logger.info("Active private key is now %s", fingerprint)
+        self._active = fingerprint
+        self._file_id = file_id
+
+
+# Shared instance used by /decrypt-seed
+key_manager = KeyManager(
+    STUDENT_PRIVATE_KEY_PATH,
+    PRIVATE_KEY_CHECK_INTERVAL,
+    EXTRA_PRIVATE_KEY_PATHS,
+)
@@ -0,0 +1,251 @@
+import asyncio
+import fcntl
+import logging
+import os
+import secrets
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .config import (
+    KEY_POOL_DIR,
+    KEY_POOL_KEY_SIZE,
+    KEY_POOL_PASSPHRASE,
+    KEY_POOL_SIZE,
+    KEY_POOL_WORKERS,
+)
+from .executors import BoundedExecutor
+from .jobs import pid_alive
+from .metrics import Counter, CounterFunction, Gauge, registry, stage
+
+logger = logging.getLogger(__name__)
+
+KEY_POOL_DEPTH = registry.register(Gauge(
+    "key_pool_depth",
+    "RSA keypairs ready in the key pool spool directory",
+))
+KEY_POOL_GENERATED = registry.register(CounterFunction(
+    "key_pool_generated_total",
+    "RSA keypairs generated into the key pool by this process",
+))
+KEY_POOL_CLAIMS = registry.register(Counter(
+    "key_pool_claims_total",
+    "Key pool claims by result (hit = a ready pair, empty = none left)",
+    labelnames=("result",),
+))
+_GENERATE_TIMER = stage("key_pool_generate")
+
+_SUFFIX = ".key"
+# How often a full pool re-checks its depth (claims may come from other processes)
+_POLL_INTERVAL = 1.0
+# How often a process that does not hold the refill lock tries to take it
+_LOCK_RETRY_INTERVAL = 5.0
+
+
+@dataclass(frozen=True)
+class KeyPair:
+    fingerprint: str
+    private_pem: bytes  # PKCS8, unencrypted
+    public_pem: bytes  # SubjectPublicKeyInfo
+
+
+def generate_encrypted_key(directory: Path, key_size: int, passphrase: bytes) -> float:
+    """
+    Pool worker: generate one RSA key and publish it in `directory` as an
+    encrypted PKCS8 PEM (written to a temp file, then renamed into place).
+    Returns the generation time in seconds.
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    start = time.perf_counter()
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=key_size)
+    elapsed = time.perf_counter() - start
+    pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.BestAvailableEncryption(passphrase),
+    )
+    name = secrets.token_hex(16)
+    tmp = directory / f".{name}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    os.replace(tmp, directory / f"{name}{_SUFFIX}")
+    return elapsed
+
+
+class KeyPool:
+    """
+    RSA keypairs generated ahead of time, so onboarding does not wait for
+    key generation (seconds per 4096-bit key).
+
+    Ready keys are files in `directory`, encrypted at rest with
+    `passphrase` (PKCS8, best available encryption). claim() takes one by
+    renaming it out of the spool, which is atomic, so any number of
+    processes can claim concurrently without handing out a key twice;
+    it then decrypts it (about a millisecond; validation of the RSA
+    parameters is skipped, the pool generated them) and deletes the file
+    only once that succeeded. A key that fails to decrypt is put back.
+
+    run() keeps `size` keys ready, generating up to `workers` at a time on
+    a process pool. Only one process refills a directory at a time (an
+    flock on `.refill.lock`); the others keep trying to take over, so the
+    pool is refilled as long as any of them is running.
+    """
+
+    def __init__(self, directory: Path, size: int, key_size: int, workers: int, passphrase: str | None):
+        self.directory = directory
+        self.size = size
+        self.key_size = key_size
+        self.workers = max(1, workers)
+        self.passphrase = passphrase.encode("utf-8") if passphrase else None
+        self.generated = 0
+        self._executor = BoundedExecutor(
+            max_workers=self.workers,
+            max_pending=self.workers,
+            kind="process",
+            name="key-pool",
+        )
+        self._task: asyncio.Task | None = None
+        self._hits = KEY_POOL_CLAIMS.labels("hit")
+        self._empty = KEY_POOL_CLAIMS.labels("empty")
+
+    def depth(self) -> int:
+        try:
+            return sum(1 for entry in os.scandir(self.directory) if _is_ready(entry.name))
+        except FileNotFoundError:
+            return 0
+
+    def claim(self) -> KeyPair | None:
+        """A ready keypair, or None if the pool is empty."""
+        from cryptography.hazmat.primitives import serialization
+
+        from .crypto_utils import public_key_fingerprint
+
+        self._require_passphrase()
+        try:
+            entries = [e for e in os.scandir(self.directory) if _is_ready(e.name)]
+        except FileNotFoundError:
+            entries = []
+
+        for entry in entries:
+            claimed = self.directory / f".claimed-{os.getpid()}-{entry.name}"
+            try:
+                os.rename(entry.path, claimed)
+            except FileNotFoundError:
+                continue  # another process got it first
+            try:
+                private_key = serialization.load_pem_private_key(
+                    claimed.read_bytes(),
+                    password=self.passphrase,
+                    unsafe_skip_rsa_key_validation=True,
+                )
+            except BaseException:
+                # E.g. a wrong passphrase: put the key back rather than lose it
+                os.rename(claimed, entry.path)
+                raise
+            claimed.unlink(missing_ok=True)
+            self._hits.inc()
+            return KeyPair(
+                fingerprint=public_key_fingerprint(private_key),
+                private_pem=private_key.private_bytes(
+                    encoding=serialization.Encoding.PEM,
+                    format=serialization.PrivateFormat.PKCS8,
+                    encryption_algorithm=serialization.NoEncryption(),
+                ),
+                public_pem=private_key.public_key().public_bytes(
+                    encoding=serialization.Encoding.PEM,
+                    format=serialization.PublicFormat.SubjectPublicKeyInfo,
+                ),
+            )
+
+        self._empty.inc()
+        return None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._require_passphrase()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._executor.shutdown()
+
+    async def run(self, until_full: bool = False) -> None:
+        """Keep the pool at `size` (return once full with `until_full`)."""
+        self._require_passphrase()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lock = open(self.directory / ".refill.lock", "a")
+        try:
+            while not _try_lock(lock):
+                if until_full and self.depth() >= self.size:
+                    return
+                await asyncio.sleep(_LOCK_RETRY_INTERVAL)
+            self._remove_stale_files()
+            await self._refill_loop(until_full)
+        finally:
+            lock.close()  # releases the flock
+
+    async def _refill_loop(self, until_full: bool) -> None:
+        in_flight: set[asyncio.Future] = set()
+        try:
+            while True:
+                missing = self.size - self.depth() - len(in_flight)
+                for _ in range(max(0, min(missing, self.workers - len(in_flight)))):
+                    in_flight.add(asyncio.ensure_future(self._executor.run(
+                        generate_encrypted_key, self.directory, self.key_size, self.passphrase
+                    )))
+                if not in_flight:
+                    if until_full:
+                        return
+                    await asyncio.sleep(_POLL_INTERVAL)
+                    continue
+
+                done, in_flight = await asyncio.wait(in_flight, timeout=_POLL_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        _GENERATE_TIMER.observe(future.result())
+                        self.generated += 1
+                    except Exception:
+                        logger.exception("Key pool generation failed")
+                        await asyncio.sleep(_POLL_INTERVAL)
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def _remove_stale_files(self) -> None:
+        # Temp files of interrupted generations; claims of dead processes
+        # were never handed out, so they go back into the pool
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".claimed-"):
+                _, pid, name = entry.name.split("-", 2)
+                if not (pid.isdigit() and pid_alive(int(pid))) and _is_ready(name):
+                    os.rename(entry.path, self.directory / name)
+            elif entry.name.endswith(".tmp"):
+                Path(entry.path).unlink(missing_ok=True)
+
+    def _require_passphrase(self) -> None:
+        if self.passphrase is None:
+            raise RuntimeError("KEY_POOL_PASSPHRASE is not set; pooled keys are encrypted at rest")
+
+
+def _is_ready(name: str) -> bool:
+    # Temp files and claimed keys are hidden (".<name>")
+    return name.endswith(_SUFFIX) and not name.startswith(".")
+
+
+def _try_lock(lock_file) -> bool:
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+key_pool = KeyPool(KEY_POOL_DIR, KEY_POOL_SIZE, KEY_POOL_KEY_SIZE, KEY_POOL_WORKERS, KEY_POOL_PASSPHRASE)
+KEY_POOL_DEPTH.set_function(key_pool.depth)
+KEY_POOL_GENERATED.set_function(lambda: key_pool.generated)
@@ -0,0 +1,163 @@
+"""
+Lean-mode ASGI handler for GET /generate-2fa and POST /verify-2fa.
+
+For the common request shapes it skips FastAPI's routing, dependency
+resolution and pydantic validation/serialization: the query string or
+JSON body is parsed directly and the response is written as pre-encoded
+JSON bytes. Status codes and bodies are byte-for-byte what the FastAPI
+endpoints return. Any request it does not fully understand (other
+content types, invalid JSON, non-string fields, ...) is handed to FastAPI
+unchanged, with its body replayed, so validation errors stay identical.
+
+The work itself (an in-memory seed lookup and one HMAC per code) is a few
+microseconds, so it runs inline on the event loop instead of being sent
+to the threadpool like the sync FastAPI endpoints.
+"""
+import json
+from urllib.parse import parse_qsl
+
+from .rate_limit import retry_after_header
+
+_JSON_HEADERS = [(b"content-type", b"application/json")]
+
+_VALID = b'{"valid":true}'
+_INVALID = b'{"valid":false}'
+_MISSING_CODE = b'{"error":"Missing code"}'
+_SEED_MISSING = b'{"error":"Seed not decrypted yet"}'
+_TOO_MANY = b'{"error":"Too many attempts"}'
+
+
+def _is_json_content_type(headers) -> bool:
+    for name, value in headers:
+        if name == b"content-type":
+            media_type = value.split(b";", 1)[0].strip().lower()
+            return media_type == b"application/json"
+    return True  # FastAPI parses a body without content-type as JSON
+
+
+class LeanRoutesMiddleware:
+    """
+    Pure ASGI middleware answering the two hot routes itself.
+
+    `generate(user_id)` returns (code, valid_for) or None when the seed is
+    missing; `verify(code, user_id)` returns True/False or None when the
+    seed is missing. `rate_limit(client_ip, user_id)`, if given, returns
+    the seconds to wait (0.0 = go ahead) before a verification. `routes`
+    maps (method, path) to the FastAPI route the request would have
+    matched; it is set as scope["route"] so metrics label lean requests
+    exactly like regular ones.
+    """
+
+    def __init__(self, app, generate, verify, routes: dict, rate_limit=None):
+        self.app = app
+        self.generate = generate
+        self.verify = verify
+        self.rate_limit = rate_limit
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            key = (scope["method"], scope["path"])
+            route = self.routes.get(key)
+            if route is not None:
+                if key[0] == "GET":
+                    scope["route"] = route
+                    await self._generate(scope, send)
+                    return
+                await self._verify(scope, receive, send, route)
+                return
+        await self.app(scope, receive, send)
+
+    async def _generate(self, scope, send):
+        user_id = None
+        query = scope.get("query_string")
+        if query:
+            for name, value in parse_qsl(query.decode("latin-1"), keep_blank_values=True):
+                if name == "user_id":
+                    user_id = value  # last one wins, as in Starlette
+
+        result = self.generate(user_id)
+        if result is None:
+            await _respond(send, 500, _SEED_MISSING)
+        else:
+            code, valid_for = result
+            await _respond(send, 200, b'{"code":"%s","valid_for":%d}' % (code.encode("ascii"), valid_for))
+
+    async def _verify(self, scope, receive, send, route):
+        body, messages = await _read_body(receive)
+        item = _parse_verify_body(body) if _is_json_content_type(scope["headers"]) else None
+        if item is None:
+            await self.app(scope, _replay(messages, receive), send)
+            return
+
+        scope["route"] = route
+        code, user_id = item
+        if code is None or code == "":
+            await _respond(send, 400, _MISSING_CODE)
+            return
+        if self.rate_limit is not None:
+            client = scope.get("client")
+            wait = self.rate_limit(client[0] if client else None, user_id)
+            if wait:
+                retry_after = [(b"retry-after", retry_after_header(wait).encode("ascii"))]
+                await _respond(send, 429, _TOO_MANY, retry_after)
+                return
+
+        result = self.verify(code, user_id)
+        if result is None:
+            await _respond(send, 500, _SEED_MISSING)
+        else:
+            await _respond(send, 200, _VALID if result else _INVALID)
+
+
+def _parse_verify_body(body: bytes) -> tuple[str | None, str | None] | None:
+    """(code, user_id) for a body Verify2FARequest accepts as-is, else None."""
+    if not body:
+        return None
+    try:
+        item = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(item, dict):
+        return None
+    code, user_id = item.get("code"), item.get("user_id")
+    if not (code is None or isinstance(code, str)):
+        return None
+    if not (user_id is None or isinstance(user_id, str)):
+        return None
+    return code, user_id
+
+
+async def _read_body(receive) -> tuple[bytes, list]:
+    messages = []
+    chunks = []
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks), messages
+
+
+def _replay(messages: list, receive):
+    """receive() that first returns the already consumed messages."""
+    pending = list(messages)
+
+    async def replay_receive():
+        if pending:
+            return pending.pop(0)
+        return await receive()
+
+    return replay_receive
+
+
+async def _respond(send, status: int, body: bytes, headers=()) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [*headers, (b"content-length", str(len(body)).encode("ascii")), *_JSON_HEADERS],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,21 +1,106 @@
+import asyncio
+import hmac
+import json
+import logging
+import time
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Annotated
+
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from .bulk_import import import_seeds
+from .code_log import parse_log_time
+from .config import (
+    ADMIN_TOKEN,
+    CRON_IN_PROCESS,
+    DRIFT_TRACKING,
+    JOBS_DIR,
+    JOBS_MAX_QUEUED,
+    JOBS_MAX_WAIT,
+    JOBS_TTL,
+    JOBS_WORKERS,
+    KEY_POOL_PASSPHRASE,
+    KEY_POOL_SIZE,
+    LEAN_MODE,
+    METRICS_ENABLED,
+    PROFILING_ENABLED,
+    PROFILING_MAX_SECONDS,
+    RATE_LIMIT,
+    REPLAY_PROTECTION,
+    SEED_FILE_PATH,
+    SLOW_REQUEST_MS,
+    UDS_PATH,
+    VERIFY_BATCH_MAX_ITEMS,
+)
+from .decrypt_worker import decrypt_with_active_key_timed, warm_up_worker
+from .drift import drift_tracker
+from .executors import ExecutorSaturated, decrypt_executor
+from .jobs import JobManager, JobQueueFull
+from .key_manager import key_manager
+from .key_pool import key_pool
+from .lean import LeanRoutesMiddleware
+from .metrics import (
+    EXECUTOR_PENDING,
+    EXECUTOR_REJECTED,
+    SEED_CACHE,
+    SEED_MISSING,
+    VERIFICATIONS,
+    MetricsMiddleware,
+    registry,
+    stage,
+)
+from .profiling import ProfileInProgress, SlowRequestMiddleware, profiler, slow_requests
+from .rate_limit import rate_limiter, retry_after_header
+from .replay_cache import replay_cache
+from .scheduler import code_log_scheduler, code_log_segments
+from .seed_cache import seed_cache
+from .seed_store import seed_store
+from .totp_utils import (
+    TOTP_INTERVAL,
+    find_code_in_window,
+    generate_totp_code,
+    get_current_validity_seconds,
+    get_window_codes,
+    verify_totp_code_at_offsets,
+)
+from .uds_server import UDSVerifyServer
+
+
+logger = logging.getLogger(__name__)
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+app = FastAPI(title="PKI-based 2FA Microservice")
 
-from .config import SEED_FILE_PATH, STUDENT_PRIVATE_KEY_PATH
-from .crypto_utils import load_private_key, decrypt_seed
-from .totp_utils import generate_totp_code, verify_totp_code, get_current_validity_seconds
 
+# ---------- Metrics ----------
 
-app = FastAPI(title="PKI-based 2FA Microservice")
+_SEED_LOAD_TIMER = stage("load_seed")
+_DECRYPT_TIMER = stage("decrypt_seed")
+_DECRYPT_WAIT_TIMER = stage("decrypt_queue_wait")
+_GENERATE_TIMER = stage("generate_totp_code")
+_VERIFY_TIMER = stage("verify_totp_code")
+_VERIFIED_VALID = VERIFICATIONS.labels("valid")
+_VERIFIED_INVALID = VERIFICATIONS.labels("invalid")
+_SEED_MISSING_GENERATE = SEED_MISSING.labels("generate-2fa")
+_SEED_MISSING_VERIFY = SEED_MISSING.labels("verify-2fa")
+
+EXECUTOR_PENDING.labels("decrypt").set_function(lambda: decrypt_executor.pending)
+EXECUTOR_REJECTED.labels("decrypt").set_function(lambda: decrypt_executor.rejected)
+SEED_CACHE.labels("hit").set_function(lambda: seed_cache.hits)
+SEED_CACHE.labels("miss").set_function(lambda: seed_cache.misses)
+SEED_CACHE.labels("check").set_function(lambda: seed_cache.checks)
 
 
 # ---------- Pydantic Models ----------
 
 class DecryptSeedRequest(BaseModel):
     encrypted_seed: str
+    user_id: str | None = None
 
 
 class Generate2FAResponse(BaseModel):
@@ -25,12 +110,17 @@ class Generate2FAResponse(BaseModel):
 
 class Verify2FARequest(BaseModel):
     code: str | None = None
+    user_id: str | None = None
 
 
 class Verify2FAResponse(BaseModel):
     valid: bool
 
 
+# Checked by pydantic before any item is validated (oversized batches: 413)
+Verify2FABatch = Annotated[list[Verify2FARequest], Field(max_length=VERIFY_BATCH_MAX_ITEMS)]
+
+
 # ---------- Helper Functions ----------
 
 def _ensure_seed_dir_exists():
@@ -39,48 +129,398 @@ def _ensure_seed_dir_exists():
 
 
 def _load_hex_seed_from_file() -> str:
-    if not SEED_FILE_PATH.exists():
-        # As per spec: 500 error if seed unavailable
+    # Served from memory; the cache re-checks SEED_FILE_PATH periodically
+    # and raises FileNotFoundError / ValueError like a direct read would.
+    with _SEED_LOAD_TIMER.time():
+        return seed_cache.get()
+
+
+def _load_hex_seed(user_id: str | None) -> str:
+    """
+    Seed for a request: the single seed file by default, or the seed
+    stored for `user_id` in the multi-tenant seed store.
+    """
+    if user_id is None:
+        return _load_hex_seed_from_file()
+
+    with _SEED_LOAD_TIMER.time():
+        seed_bytes = seed_store.get(user_id)
+    if seed_bytes is None:
         raise FileNotFoundError("Seed not decrypted yet")
+    return seed_bytes.hex()
+
+
+def _save_hex_seed(hex_seed: str, user_id: str | None) -> None:
+    if user_id is None:
+        _ensure_seed_dir_exists()
+        SEED_FILE_PATH.write_text(hex_seed, encoding="utf-8")
+        seed_cache.store(hex_seed)
+    else:
+        seed_store.put(user_id, bytes.fromhex(hex_seed))
+
+
+async def _decrypt_and_save(encrypted_seed_b64: str, user_id: str | None) -> None:
+    """
+    Decrypt on the decrypt executor and store the seed. Raises
+    ExecutorSaturated when the pool is full, anything else on failure.
+    """
+    start = time.perf_counter()
+    hex_seed, decrypt_seconds = await decrypt_executor.run(
+        decrypt_with_active_key_timed, encrypted_seed_b64
+    )
+    _DECRYPT_TIMER.observe(decrypt_seconds)
+    _DECRYPT_WAIT_TIMER.observe(max(0.0, time.perf_counter() - start - decrypt_seconds))
+
+    # Save seed to /data/seed.txt (or path from config), or to the
+    # seed store when a user_id was given
+    await run_in_threadpool(_save_hex_seed, hex_seed, user_id)
+
+
+def _generate_code(user_id: str | None) -> tuple[str, int] | None:
+    """
+    (code, valid_for) for GET /generate-2fa, or None when the seed is
+    missing or unreadable.
+    """
+    try:
+        hex_seed = _load_hex_seed(user_id)
+        with _GENERATE_TIMER.time():
+            code = generate_totp_code(hex_seed)
+        valid_for = get_current_validity_seconds()
+    except Exception:
+        _SEED_MISSING_GENERATE.inc()
+        return None
+    return code, valid_for
+
+
+def _client_ip(request: Request) -> str | None:
+    return request.client.host if request.client else None
+
+
+def _rate_limit(client_ip: str | None, user_id: str | None) -> float:
+    """
+    Seconds to wait before another verification attempt by this client
+    and user, 0.0 if allowed (always, with RATE_LIMIT off). Checked before
+    any seed load or TOTP work.
+    """
+    return rate_limiter.check(client_ip, user_id) if RATE_LIMIT else 0.0
+
+
+def _too_many_attempts(wait: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"error": "Too many attempts"},
+        headers={"Retry-After": retry_after_header(wait)},
+    )
 
-    hex_seed = SEED_FILE_PATH.read_text(encoding="utf-8").strip()
-    if not hex_seed or len(hex_seed) != 64:
-        raise ValueError("Stored seed is invalid")
-    return hex_seed
+
+# ±1 step, current step first
+_WINDOW_OFFSETS = (0, -1, 1)
+
+
+def _verify_code(code: str, user_id: str | None) -> bool | None:
+    """
+    Result for POST /verify-2fa with a non-empty code, or None when the
+    seed is missing or unreadable.
+    """
+    try:
+        hex_seed = _load_hex_seed(user_id)
+    except Exception:
+        _SEED_MISSING_VERIFY.inc()
+        return None
+
+    # Verify TOTP with ±1 period tolerance; with drift tracking, the
+    # user's usual offset is tried first (and the window may follow it)
+    try:
+        with _VERIFY_TIMER.time():
+            now = time.time()
+            if DRIFT_TRACKING:
+                drift_key, offsets = drift_tracker.lookup(user_id)
+            else:
+                offsets = _WINDOW_OFFSETS
+            offset = verify_totp_code_at_offsets(hex_seed, code, offsets, now)
+            is_valid = offset is not None
+            if is_valid and DRIFT_TRACKING:
+                drift_tracker.record(drift_key, offset)
+            if is_valid and REPLAY_PROTECTION:
+                is_valid = replay_cache.claim(user_id, code, int(now) // TOTP_INTERVAL + offset)
+    except Exception:
+        # Treat any internal error as "invalid code" but still 200
+        is_valid = False
+    (_VERIFIED_VALID if is_valid else _VERIFIED_INVALID).inc()
+    return is_valid
+
+
+_SEED_MISSING = object()
+_SEED_MISSING_BATCH = SEED_MISSING.labels("verify-2fa/batch")
+
+
+class _BatchVerifier:
+    """
+    Verifies many codes at one instant. Each distinct seed (user_id) is
+    loaded and its window codes computed once per batch, however many of
+    the batch's items refer to it.
+
+    With `rate_limited` (HTTP batches), every item is an attempt by
+    `client_ip` and its user, and items over the limit get
+    {"error": "Too many attempts"} without being verified.
+    """
+
+    # Bounds the per-batch seed cache in streaming mode
+    MAX_SEEDS = 10000
+
+    def __init__(self, client_ip: str | None = None, rate_limited: bool = False):
+        self.for_time = time.time()
+        self.step = int(self.for_time) // TOTP_INTERVAL
+        self.client_ip = client_ip
+        self.rate_limited = rate_limited
+        self._windows: dict = {}
+
+    def verify(self, code: str | None, user_id: str | None) -> dict:
+        if code is None or code == "":
+            return {"error": "Missing code"}
+        if self.rate_limited and _rate_limit(self.client_ip, user_id):
+            return {"error": "Too many attempts"}
+
+        window_codes = self._windows.get(user_id)
+        if window_codes is None:
+            try:
+                hex_seed = _load_hex_seed(user_id)
+                window_codes = get_window_codes(hex_seed, valid_window=1, for_time=self.for_time)
+            except Exception:
+                window_codes = _SEED_MISSING
+            if len(self._windows) >= self.MAX_SEEDS:
+                self._windows.clear()
+            self._windows[user_id] = window_codes
+
+        if window_codes is _SEED_MISSING:
+            _SEED_MISSING_BATCH.inc()
+            return {"error": "Seed not decrypted yet"}
+
+        try:
+            index = find_code_in_window(code, window_codes)
+            is_valid = index is not None
+            if is_valid and REPLAY_PROTECTION:
+                # window_codes are steps t-1, t, t+1; a code repeated
+                # within the batch is a replay too
+                step = self.step - 1 + index
+                is_valid = replay_cache.claim(user_id, code, step)
+        except Exception:
+            is_valid = False
+        (_VERIFIED_VALID if is_valid else _VERIFIED_INVALID).inc()
+        return {"valid": is_valid}
+
+
+# NDJSON streaming: items are verified at the current time, not when the
+# stream opened: a fresh _BatchVerifier is made whenever the TOTP step has
+# moved on since it was created, and also every this many items.
+_STREAM_BATCH_ITEMS = 1000
+_STREAM_MAX_LINE = 64 * 1024
+
+
+def _parse_stream_item(line: bytes) -> tuple[str | None, str | None] | None:
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(item, dict):
+        return None
+    code, user_id = item.get("code"), item.get("user_id")
+    if not (code is None or isinstance(code, str)):
+        return None
+    if not (user_id is None or isinstance(user_id, str)):
+        return None
+    return code, user_id
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is
+    still being read. The stock class listens for disconnect on `receive`
+    at the same time, which would swallow the request body chunks; here
+    the body iterator is the only reader (request.stream() still raises
+    ClientDisconnect if the client goes away).
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+async def _iter_ndjson_lines(request: Request):
+    """
+    Yield lists of complete non-empty lines as body chunks arrive, without
+    buffering the whole request. Over-long lines are yielded as None, once
+    each: the rest of such a line is discarded up to its "\n", however many
+    chunks it spans.
+    """
+    buffer = b""
+    discarding = False
+    async for chunk in request.stream():
+        if discarding:
+            end = chunk.find(b"\n")
+            if end < 0:
+                continue
+            chunk = chunk[end + 1:]
+            discarding = False
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        lines = [None if len(line) > _STREAM_MAX_LINE else line for line in lines]
+        if len(buffer) > _STREAM_MAX_LINE:
+            lines.append(None)
+            buffer = b""
+            discarding = True
+        lines = [line for line in lines if line is None or line.strip()]
+        if lines:
+            yield lines
+    if buffer.strip():
+        yield [buffer]
+
+
+# ---------- Startup ----------
+
+# POST /decrypt-seed?async=1 jobs, same decrypt + store as the sync path
+jobs = JobManager(
+    JOBS_DIR,
+    _decrypt_and_save,
+    workers=JOBS_WORKERS,
+    max_queued=JOBS_MAX_QUEUED,
+    ttl=JOBS_TTL,
+    max_wait=JOBS_MAX_WAIT,
+)
+EXECUTOR_PENDING.labels("decrypt-jobs").set_function(lambda: jobs.queued)
+
+# Binary verification protocol on UDS_PATH, same verification as the HTTP
+# endpoints (app/serve.py binds the socket before forking workers, which
+# all accept on it)
+uds_server = UDSVerifyServer(
+    UDS_PATH,
+    verify=_verify_code,
+    new_batch=_BatchVerifier,
+    max_batch=VERIFY_BATCH_MAX_ITEMS,
+)
+
+
+@app.on_event("startup")
+def warm_up(start_decrypt_workers: bool = True):
+    # Parse the private key and load the seed (building its TOTP tables)
+    # before serving, so the first requests do not pay for them. uvicorn
+    # only accepts connections once startup handlers have returned.
+    # Neither is fatal here: /decrypt-seed and /generate-2fa keep
+    # returning their usual 500 until the key / seed appears.
+    #
+    # The decrypt workers are separate processes that load the key
+    # themselves (without re-validating what was validated here). They
+    # are started here too, in the background so no endpoint waits for
+    # them, and the first /decrypt-seed does not have to start one.
+    # app.serve's parent skips this: each forked worker starts its own pool.
+    start = time.perf_counter()
+    try:
+        key_manager.load()
+    except Exception as e:
+        logger.warning("Private key not loaded at startup: %s", e)
+
+    try:
+        generate_totp_code(seed_cache.get())
+    except (FileNotFoundError, ValueError) as e:
+        logger.info("No seed loaded at startup: %s", e)
+
+    if start_decrypt_workers:
+        decrypt_executor.initargs = (key_manager.validated_digests(),)
+        try:
+            futures = decrypt_executor.prestart(warm_up_worker)
+        except Exception as e:
+            logger.warning("Decrypt workers not started: %s", e)
+        else:
+            started = time.perf_counter()
+            asyncio.ensure_future(_log_decrypt_workers_ready(futures, started))
+    logger.info("Warm-up done in %.0f ms", (time.perf_counter() - start) * 1000)
+
+
+async def _log_decrypt_workers_ready(futures, started: float) -> None:
+    results = await asyncio.gather(*map(asyncio.wrap_future, futures), return_exceptions=True)
+    failed = [r for r in results if isinstance(r, BaseException)]
+    if failed:
+        logger.warning("Decrypt worker warm-up failed: %s", failed[0])
+    else:
+        logger.info("%d decrypt worker(s) ready in %.0f ms", len(set(results)), (time.perf_counter() - started) * 1000)
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    jobs.start()
+    if CRON_IN_PROCESS:
+        code_log_scheduler.start()
+    if UDS_PATH:
+        await uds_server.start()
+    if KEY_POOL_SIZE > 0:
+        if KEY_POOL_PASSPHRASE:
+            key_pool.start()
+        else:
+            logger.warning("KEY_POOL_SIZE is set but KEY_POOL_PASSPHRASE is not; key pool not started")
+
+
+@app.on_event("shutdown")
+async def shut_down():
+    await jobs.stop()
+    if CRON_IN_PROCESS:
+        await code_log_scheduler.stop()
+    if UDS_PATH:
+        await uds_server.stop()
+    await key_pool.stop()
+    decrypt_executor.shutdown()
 
 
 # ---------- Endpoints ----------
 
 @app.post("/decrypt-seed")
-def decrypt_seed_endpoint(payload: DecryptSeedRequest):
+async def decrypt_seed_endpoint(
+    payload: DecryptSeedRequest,
+    async_: bool = Query(False, alias="async"),
+):
     """
     POST /decrypt-seed
+    POST /decrypt-seed?async=1      (queue it, see GET /jobs/{job_id})
     Request:
         {
-          "encrypted_seed": "BASE64_STRING..."
+          "encrypted_seed": "BASE64_STRING...",
+          "user_id": "alice"        (optional, stores into the seed store)
         }
     Success (200):
         { "status": "ok" }
     Failure (500):
         { "error": "Decryption failed" }
-    """
-    encrypted_seed_b64 = payload.encrypted_seed
+    Decrypt pool (or job queue) saturated (503, Retry-After: 1):
+        { "error": "Server busy" }
+    Queued, async=1 (202, Location: /jobs/{job_id}):
+        { "job_id": "...", "status": "queued" }
 
-    try:
-        private_key = load_private_key(STUDENT_PRIVATE_KEY_PATH)
-        hex_seed = decrypt_seed(encrypted_seed_b64, private_key)
-    except Exception:
-        # Do NOT leak internal error details per spec
+    The RSA decrypt runs on the dedicated decrypt executor, so it never
+    occupies the threadpool serving /generate-2fa and /verify-2fa.
+    """
+    if async_:
+        try:
+            state = await jobs.submit(payload.encrypted_seed, payload.user_id)
+        except JobQueueFull:
+            return JSONResponse(
+                status_code=503,
+                content={"error": "Server busy"},
+                headers={"Retry-After": "1"},
+            )
         return JSONResponse(
-            status_code=500,
-            content={"error": "Decryption failed"},
+            status_code=202,
+            content=state,
+            headers={"Location": f"/jobs/{state['job_id']}"},
         )
 
-    # Save seed to /data/seed.txt (or path from config)
     try:
-        _ensure_seed_dir_exists()
-        SEED_FILE_PATH.write_text(hex_seed, encoding="utf-8")
+        await _decrypt_and_save(payload.encrypted_seed, payload.user_id)
+    except ExecutorSaturated:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Server busy"},
+            headers={"Retry-After": "1"},
+        )
     except Exception:
+        # Do NOT leak internal error details per spec
         return JSONResponse(
             status_code=500,
             content={"error": "Decryption failed"},
@@ -89,10 +529,60 @@ def decrypt_seed_endpoint(payload: DecryptSeedRequest):
     return {"status": "ok"}
 
 
+@app.get("/jobs/{job_id}")
+async def job_status_endpoint(job_id: str, wait: float = Query(0.0, ge=0)):
+    """
+    GET /jobs/{job_id}
+    GET /jobs/{job_id}?wait=10      (long-poll: answer when the job
+                                     finishes, or after `wait` seconds,
+                                     at most JOBS_MAX_WAIT)
+    Success (200):
+        { "job_id": "...", "status": "queued" | "running" | "done" }
+        { "job_id": "...", "status": "failed", "error": "Decryption failed" }
+    Unknown or expired (404):
+        { "error": "Job not found" }
+    """
+    state = await jobs.get(job_id, wait)
+    if state is None:
+        return JSONResponse(status_code=404, content={"error": "Job not found"})
+    return state
+
+
+@app.post("/decrypt-seed/bulk")
+async def decrypt_seed_bulk_endpoint(request: Request):
+    """
+    POST /decrypt-seed/bulk
+    Request (application/x-ndjson), one record per line, streamed:
+        {"id": "alice", "encrypted_seed": "BASE64_STRING..."}
+
+    Each seed is decrypted on the decrypt executor and stored in the
+    multi-tenant seed store under its id.
+
+    Response (200, application/x-ndjson), streamed while importing:
+        {"event": "error", "line": 7, "id": "bob", "error": "Decryption failed"}
+        {"event": "progress", "read": 1000, "imported": 990, "failed": 3, ...}
+        {"event": "done", "read": ..., "imported": ..., "failed": ...,
+         "elapsed_seconds": ..., "records_per_second": ..., "errors": [...]}
+    """
+
+    async def records():
+        async for lines in _iter_ndjson_lines(request):
+            for line in lines:
+                # Over-long lines arrive as None and are reported as invalid
+                yield b"?" if line is None else line
+
+    async def events():
+        async for kind, data in import_seeds(records(), decrypt_executor, seed_store):
+            yield (json.dumps({"event": kind, **data}) + "\n").encode("utf-8")
+
+    return _DuplexStreamingResponse(events(), media_type="application/x-ndjson")
+
+
 @app.get("/generate-2fa", response_model=Generate2FAResponse)
-def generate_2fa_endpoint():
+def generate_2fa_endpoint(user_id: str | None = None):
     """
     GET /generate-2fa
+    GET /generate-2fa?user_id=alice     (seed from the seed store)
     Success (200):
         {
           "code": "123456",
@@ -101,36 +591,32 @@ def generate_2fa_endpoint():
     Error when seed missing (500):
         { "error": "Seed not decrypted yet" }
     """
-    try:
-        hex_seed = _load_hex_seed_from_file()
-        code = generate_totp_code(hex_seed)
-        valid_for = get_current_validity_seconds()
-    except FileNotFoundError:
-        return JSONResponse(
-            status_code=500,
-            content={"error": "Seed not decrypted yet"},
-        )
-    except Exception:
+    result = _generate_code(user_id)
+    if result is None:
         return JSONResponse(
             status_code=500,
             content={"error": "Seed not decrypted yet"},
         )
 
+    code, valid_for = result
     return Generate2FAResponse(code=code, valid_for=valid_for)
 
 
 @app.post("/verify-2fa", response_model=Verify2FAResponse)
-def verify_2fa_endpoint(payload: Verify2FARequest):
+def verify_2fa_endpoint(payload: Verify2FARequest, request: Request):
     """
     POST /verify-2fa
     Request:
         { "code": "123456" }
+        { "code": "123456", "user_id": "alice" }   (seed from the seed store)
 
     Responses:
         200:
           { "valid": true } or { "valid": false }
         400:
           { "error": "Missing code" }
+        429 (RATE_LIMIT=1, with Retry-After):
+          { "error": "Too many attempts" }
         500:
           { "error": "Seed not decrypted yet" }
     """
@@ -140,29 +626,136 @@ def verify_2fa_endpoint(payload: Verify2FARequest):
             content={"error": "Missing code"},
         )
 
-    code = payload.code
+    wait = _rate_limit(_client_ip(request), payload.user_id)
+    if wait:
+        return _too_many_attempts(wait)
 
-    try:
-        hex_seed = _load_hex_seed_from_file()
-    except FileNotFoundError:
-        return JSONResponse(
-            status_code=500,
-            content={"error": "Seed not decrypted yet"},
-        )
-    except Exception:
+    is_valid = _verify_code(payload.code, payload.user_id)
+    if is_valid is None:
         return JSONResponse(
             status_code=500,
             content={"error": "Seed not decrypted yet"},
         )
 
-    # Verify TOTP with ±1 period tolerance
+    return Verify2FAResponse(valid=is_valid)
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    # A batch over Verify2FABatch's max_length is a 413, not a 422
+    if request.url.path == "/verify-2fa/batch" and any(
+        error["type"] == "too_long" and tuple(error["loc"]) == ("body",) for error in exc.errors()
+    ):
+        return JSONResponse(status_code=413, content={"error": "Batch too large"})
+    return await request_validation_exception_handler(request, exc)
+
+
+@app.post("/verify-2fa/batch")
+def verify_2fa_batch_endpoint(payload: Verify2FABatch, request: Request):
+    """
+    POST /verify-2fa/batch
+    Request:
+        [ { "code": "123456" }, { "code": "654321", "user_id": "alice" }, ... ]
+
+    Responses:
+        200: one result per item, in order; each is what /verify-2fa
+             would have returned for that item:
+          [ { "valid": true }, { "error": "Seed not decrypted yet" }, ... ]
+             (items over the rate limit: { "error": "Too many attempts" })
+        413 (more than VERIFY_BATCH_MAX_ITEMS items):
+          { "error": "Batch too large" }
+    """
+    verifier = _BatchVerifier(_client_ip(request), rate_limited=True)
+    return [verifier.verify(item.code, item.user_id) for item in payload]
+
+
+@app.post("/verify-2fa/batch/stream")
+async def verify_2fa_batch_stream_endpoint(request: Request):
+    """
+    POST /verify-2fa/batch/stream
+    Request (application/x-ndjson), one item per line, no size limit:
+        {"code": "123456"}
+        {"code": "654321", "user_id": "alice"}
+
+    Response (200, application/x-ndjson): one result line per item, in
+    order, as in /verify-2fa/batch. Unparseable lines yield
+        {"error": "Invalid item"}
+    """
+
+    client_ip = _client_ip(request)
+
+    async def results():
+        verifier = _BatchVerifier(client_ip, rate_limited=True)
+        done = 0
+        async for lines in _iter_ndjson_lines(request):
+            out = []
+            for line in lines:
+                item = None if line is None else _parse_stream_item(line)
+                if item is None:
+                    result = {"error": "Invalid item"}
+                else:
+                    if int(time.time()) // TOTP_INTERVAL != verifier.step:
+                        verifier = _BatchVerifier(client_ip, rate_limited=True)
+                    result = verifier.verify(*item)
+                out.append(json.dumps(result, separators=(",", ":")))
+
+                done += 1
+                if done % _STREAM_BATCH_ITEMS == 0:
+                    verifier = _BatchVerifier(client_ip, rate_limited=True)
+            yield ("\n".join(out) + "\n").encode("utf-8")
+
+    return _DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+
+@app.get("/code-log")
+def code_log_endpoint(
+    at: str | None = None,
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+):
+    """
+    GET /code-log?at=2025-01-01T12:34:56Z
+        200 (text/plain): the newest entry logged at or before `at`
+            2025-01-01 12:34:00 - 2FA Code: 123456
+        404: { "error": "No code logged" }
+
+    GET /code-log?from=...&to=...      (either bound may be omitted)
+        200 (text/plain): all entries in [from, to], streamed, oldest first
+
+    Times are Unix seconds or ISO 8601 (UTC if no offset).
+    Errors (400):
+        { "error": "Missing at or from/to" } / { "error": "Invalid time" }
+    """
     try:
-        is_valid = verify_totp_code(hex_seed, code, valid_window=1)
-    except Exception:
-        # Treat any internal error as "invalid code" but still 200
-        is_valid = False
+        at_time = parse_log_time(at) if at else None
+        start = parse_log_time(from_) if from_ else None
+        end = parse_log_time(to) if to else None
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "Invalid time"})
 
-    return Verify2FAResponse(valid=is_valid)
+    if at_time is not None:
+        line = code_log_segments.find_at(at_time)
+        if line is None:
+            return JSONResponse(status_code=404, content={"error": "No code logged"})
+        return PlainTextResponse(line + "\n")
+
+    if start is None and end is None:
+        return JSONResponse(status_code=400, content={"error": "Missing at or from/to"})
+
+    start = start or datetime.fromtimestamp(0, timezone.utc)
+    end = end or datetime.now(timezone.utc)
+    return StreamingResponse(code_log_segments.iter_range(start, end), media_type="text/plain")
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """
+    GET /metrics
+    Prometheus text exposition format: per-route latency histograms,
+    internal stage timings, verification/seed-missing counters, executor
+    queue depth and seed cache counters.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/health")
@@ -170,5 +763,104 @@ def health_check():
     """
     Optional health endpoint to quickly verify container is running.
     Not required by spec, but useful for testing.
+    Also reports seed cache hit/miss counters.
     """
-    return {"status": "healthy"}
+    return {"status": "healthy", "seed_cache": seed_cache.stats()}
+
+
+# ---------- Profiling (off by default) ----------
+
+def _admin_denied(request: Request) -> JSONResponse | None:
+    if ADMIN_TOKEN is not None:
+        authorization = request.headers.get("authorization", "").encode("utf-8")
+        if hmac.compare_digest(authorization, f"Bearer {ADMIN_TOKEN}".encode("utf-8")):
+            return None
+    return JSONResponse(status_code=401, content={"error": "Unauthorized"})
+
+
+def _debug_endpoint_allowed(setting: str) -> bool:
+    # The /debug endpoints expose stacks and request paths: never unauthenticated
+    if ADMIN_TOKEN is None:
+        logger.warning("%s is set but ADMIN_TOKEN is not: its /debug endpoint is not registered", setting)
+        return False
+    return True
+
+
+if PROFILING_ENABLED and _debug_endpoint_allowed("PROFILING_ENABLED"):
+    @app.get("/debug/profile")
+    async def profile_endpoint(
+        request: Request,
+        seconds: float = Query(10.0, gt=0, le=PROFILING_MAX_SECONDS),
+        interval_ms: float = Query(10.0, ge=1, le=1000),
+        mode: str = Query("cpu", pattern="^(cpu|wall)$"),
+    ):
+        """
+        GET /debug/profile?seconds=10&interval_ms=10&mode=cpu
+            200 (text/plain): collapsed stacks of every thread of this
+                worker, sampled for `seconds` every `interval_ms` of CPU
+                time (mode=cpu) or elapsed time (mode=wall), one
+                "frame;frame;... count" line per stack
+                (X-Profile-Samples: samples taken)
+            409: { "error": "A profile is already running" }
+        """
+        denied = _admin_denied(request)
+        if denied is not None:
+            return denied
+        try:
+            profiler.start(interval_ms / 1000, mode)
+        except ProfileInProgress:
+            return JSONResponse(status_code=409, content={"error": "A profile is already running"})
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            method = profiler.method
+            lines, samples = profiler.stop()
+        return PlainTextResponse(
+            "".join(line + "\n" for line in lines),
+            headers={"X-Profile-Samples": str(samples), "X-Profile-Method": method},
+        )
+
+
+if SLOW_REQUEST_MS > 0 and _debug_endpoint_allowed("SLOW_REQUEST_MS"):
+    @app.get("/debug/slow-requests")
+    def slow_requests_endpoint(request: Request, limit: int = Query(50, ge=1)):
+        """
+        GET /debug/slow-requests?limit=50
+            200: { "threshold_ms": ..., "requests": [newest first:
+                   { "time", "pid", "method", "path", "route", "status",
+                     "duration_ms", "stages": [{ "stage", "ms" }, ...] }] }
+        Only this worker's requests.
+        """
+        denied = _admin_denied(request)
+        if denied is not None:
+            return denied
+        return {"threshold_ms": SLOW_REQUEST_MS, "requests": slow_requests.recent(limit)}
+
+
+# ---------- Middleware ----------
+
+def _route(method: str, path: str):
+    for route in app.routes:
+        if getattr(route, "path", None) == path and method in (getattr(route, "methods", None) or ()):
+            return route
+    raise LookupError(f"No route for {method} {path}")
+
+
+if LEAN_MODE:
+    app.add_middleware(
+        LeanRoutesMiddleware,
+        generate=_generate_code,
+        verify=_verify_code,
+        rate_limit=_rate_limit if RATE_LIMIT else None,
+        routes={
+            ("GET", "/generate-2fa"): _route("GET", "/generate-2fa"),
+            ("POST", "/verify-2fa"): _route("POST", "/verify-2fa"),
+        },
+    )
+
+# Added last so it is the outermost middleware and also times lean requests
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+if SLOW_REQUEST_MS > 0:
+    app.add_middleware(SlowRequestMiddleware, threshold=SLOW_REQUEST_MS / 1000, log=slow_requests)
@@ -0,0 +1,342 @@
+"""
+Minimal Prometheus-style metrics (text exposition format 0.0.4).
+
+Designed to stay on under full load: an observation is one bisect over a
+short bucket list plus a few integer/float updates under a per-series
+lock, and a stage timer is two perf_counter() calls around the block.
+No dependency on prometheus_client.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from .config import SLOW_REQUEST_MS
+
+# Latency buckets in seconds: 50µs .. 10s
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}  # str label values -> series
+        self._lookup: dict[tuple, object] = {}  # label values as passed -> series
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._lookup.get(values)
+        if child is None:
+            key = tuple(str(v) for v in values)
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+                self._lookup[values] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        # Unlabelled metrics have exactly one series
+        return self.labels()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class _GaugeChild:
+    __slots__ = ("value", "func")
+
+    def __init__(self):
+        self.value = 0.0
+        self.func = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, func) -> None:
+        """Read the value from `func()` at scrape time (no hot-path cost)."""
+        self.func = func
+
+    def get(self) -> float:
+        return float(self.func()) if self.func is not None else self.value
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def set_function(self, func) -> None:
+        self._default().set_function(func)
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"]
+
+
+class CounterFunction(Gauge):
+    """A counter whose value is read from a function at scrape time."""
+
+    type_name = "counter"
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> "_Timer":
+        """Context manager observing the duration of its block."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child: _HistogramChild):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def _render_child(self, key, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ---------- Service metrics ----------
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    labelnames=("method", "route"),
+))
+REQUESTS = registry.register(Counter(
+    "http_requests_total",
+    "HTTP requests by route and status code",
+    labelnames=("method", "route", "status"),
+))
+STAGE_LATENCY = registry.register(Histogram(
+    "stage_duration_seconds",
+    "Time spent in internal stages of request handling",
+    labelnames=("stage",),
+))
+VERIFICATIONS = registry.register(Counter(
+    "totp_verifications_total",
+    "TOTP verifications by result",
+    labelnames=("result",),
+))
+SEED_MISSING = registry.register(Counter(
+    "seed_missing_total",
+    "Requests answered with 'Seed not decrypted yet'",
+    labelnames=("endpoint",),
+))
+EXECUTOR_PENDING = registry.register(Gauge(
+    "executor_pending_jobs",
+    "Jobs running or queued on a bounded executor",
+    labelnames=("executor",),
+))
+EXECUTOR_REJECTED = registry.register(CounterFunction(
+    "executor_rejected_total",
+    "Jobs rejected because a bounded executor was saturated",
+    labelnames=("executor",),
+))
+SEED_CACHE = registry.register(CounterFunction(
+    "seed_cache_events_total",
+    "Seed cache hits, misses (disk reads) and stat checks",
+    labelnames=("event",),
+))
+
+
+# (stage, seconds) observed while handling the current request; set by
+# profiling.SlowRequestMiddleware, None outside it
+request_stages: ContextVar[list | None] = ContextVar("request_stages", default=None)
+
+
+class _TracedStage:
+    """A stage series that also appends each observation to request_stages."""
+
+    __slots__ = ("name", "child")
+
+    def __init__(self, name: str, child: _HistogramChild):
+        self.name = name
+        self.child = child
+
+    def observe(self, value: float) -> None:
+        self.child.observe(value)
+        stages = request_stages.get()
+        if stages is not None:
+            stages.append((self.name, value))
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+def stage(name: str) -> _HistogramChild:
+    """
+    Histogram series for an internal stage. Use as
+
+        with stage("generate_totp_code").time():
+            ...
+
+    With slow request capture on (SLOW_REQUEST_MS), observations are also
+    recorded per request; otherwise this is the plain series.
+    """
+    child = STAGE_LATENCY.labels(name)
+    if SLOW_REQUEST_MS > 0:
+        return _TracedStage(name, child)
+    return child
+
+
+# Any other method a client sends (uvicorn accepts any token) is "OTHER"
+_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing every HTTP request. Labels use the route
+    template (e.g. "/jobs/{job_id}"), never the raw path, and the standard
+    methods, so label cardinality stays bounded whatever clients send:
+    unmatched paths are "unmatched", unknown methods "OTHER".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"] if scope["method"] in _METHODS else "OTHER"
+            REQUEST_LATENCY.labels(method, route).observe(elapsed)
+            REQUESTS.labels(method, route, status).inc()
@@ -0,0 +1,244 @@
+"""
+On-demand profiling: a sampling profiler and a slow request log.
+
+Both are off unless configured (PROFILING_ENABLED, SLOW_REQUEST_MS in
+app/config.py); off, neither adds a route, a middleware or a per-request
+check.
+
+SamplingProfiler records the stacks of all threads at a fixed interval,
+without instrumenting the profiled code. On the main thread (where
+uvicorn runs the event loop) it uses an interval timer signal, so the
+handler interrupts the interpreter wherever it is: "cpu" mode
+(ITIMER_PROF) samples per CPU time used by the process and leaves out
+threads parked in a blocking wait, "wall" mode (ITIMER_REAL) samples per
+elapsed time, waits included. Elsewhere it falls back
+to a sampling thread, which only gets the GIL when other threads release
+it and so over-represents blocking calls. The result is in collapsed-stack
+format, one line per distinct stack with its sample count:
+
+    MainThread;run (asyncio/runners.py:118);...;verify_totp_code_at_offsets (app/totp_utils.py:141) 42
+
+which flamegraph.pl, speedscope or inferno render directly. Only the
+process that receives the request is sampled: with app.serve, one worker
+(the decrypt executor's processes are not included either).
+
+SlowRequestMiddleware collects the stage timings (metrics.stage series)
+observed while handling each request and keeps those of requests slower
+than the threshold in a bounded in-memory log, newest last.
+"""
+import collections
+import os
+import selectors
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+from .config import SLOW_REQUEST_BUFFER
+from .metrics import Counter, registry, request_stages
+
+SLOW_REQUESTS = registry.register(Counter(
+    "slow_requests_total",
+    "Requests slower than SLOW_REQUEST_MS (recorded in /debug/slow-requests)",
+))
+
+# mode -> (timer, signal it delivers)
+_TIMERS = {
+    "cpu": (signal.ITIMER_PROF, signal.SIGPROF),
+    "wall": (signal.ITIMER_REAL, signal.SIGALRM),
+}
+
+# Innermost Python frames of a thread parked in a blocking wait (idle pool
+# workers, joins, the event loop's select): left out of "cpu" profiles
+_IDLE_CODES = {
+    func.__code__
+    for func in (
+        threading.Condition.wait,
+        getattr(threading.Thread, "_wait_for_tstate_lock", None),  # join(), before 3.13
+        selectors.DefaultSelector.select,
+    )
+    if func is not None
+}
+
+# Frame labels keep paths short: relative to the project or site-packages
+_PATH_PREFIXES = sorted(
+    {str(Path(__file__).resolve().parent.parent) + os.sep, *(p + os.sep for p in sys.path if p)},
+    key=len,
+    reverse=True,
+)
+
+
+class ProfileInProgress(Exception):
+    """Raised by SamplingProfiler.start when another profile is running."""
+
+
+class SamplingProfiler:
+    """
+    One profile at a time: start(interval, mode), let the process run,
+    stop() -> (collapsed stack lines, most frequent first; samples taken).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._labels: dict = {}  # code object -> frame label
+        self._counts = collections.Counter()
+        self._samples = 0
+        self._thread_names: dict[int, str] = {}
+        self._skip_idle = False
+        self._timer = None  # (timer, signal, previous handler) in signal mode
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self.method = None  # "signal" or "thread" while running
+
+    def start(self, interval: float, mode: str = "cpu") -> None:
+        if not self._lock.acquire(blocking=False):
+            raise ProfileInProgress("A profile is already running")
+        self._counts.clear()
+        self._samples = 0
+        self._thread_names.clear()
+        self._skip_idle = mode == "cpu"
+        if threading.current_thread() is threading.main_thread():
+            timer, signum = _TIMERS[mode]
+            self._timer = (timer, signum, signal.signal(signum, self._on_signal))
+            signal.setitimer(timer, interval, interval)
+            self.method = "signal"
+        else:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run_thread, args=(interval,), name="profiler", daemon=True)
+            self._thread.start()
+            self.method = "thread"
+
+    def stop(self) -> tuple[list[str], int]:
+        if self._timer is not None:
+            timer, signum, previous = self._timer
+            signal.setitimer(timer, 0)
+            signal.signal(signum, previous)
+            self._timer = None
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+        lines = [f"{stack} {count}" for stack, count in self._counts.most_common()]
+        samples = self._samples
+        self._counts.clear()
+        self._lock.release()
+        return lines, samples
+
+    def _on_signal(self, signum, frame) -> None:
+        # Runs on the main thread, between two bytecodes of whatever it was
+        # doing; `frame` is that point, the other threads are sampled as is
+        main = threading.main_thread().ident
+        self._record(main, frame)
+        for ident, other in sys._current_frames().items():
+            if ident != main:
+                self._record(ident, other)
+        self._samples += 1
+
+    def _run_thread(self, interval: float) -> None:
+        me = threading.get_ident()
+        while not self._stopping.wait(interval):
+            for ident, frame in sys._current_frames().items():
+                if ident != me:
+                    self._record(ident, frame)
+            self._samples += 1
+
+    def _record(self, ident: int, frame) -> None:
+        if self._skip_idle and frame.f_code in _IDLE_CODES:
+            return
+        stack = []
+        while frame is not None:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        name = self._thread_names.get(ident)
+        if name is None:
+            name = self._thread_names[ident] = _thread_name(ident)
+        stack.append(name)
+        stack.reverse()
+        self._counts[";".join(stack)] += 1
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = code.co_filename
+            for prefix in _PATH_PREFIXES:
+                if path.startswith(prefix):
+                    path = path[len(prefix):]
+                    break
+            # ";" separates frames and " " the count in collapsed stacks
+            label = f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+
+def _thread_name(ident: int) -> str:
+    name = next((t.name for t in threading.enumerate() if t.ident == ident), f"thread-{ident}")
+    return name.replace(";", ":").replace(" ", "_")
+
+
+class SlowRequestLog:
+    """The last `size` slow requests of this process."""
+
+    def __init__(self, size: int):
+        self._entries = collections.deque(maxlen=max(1, size))
+
+    def add(self, entry: dict) -> None:
+        self._entries.append(entry)
+        SLOW_REQUESTS.inc()
+
+    def recent(self, limit: int | None = None) -> list[dict]:
+        """Newest first."""
+        entries = list(self._entries)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+
+class SlowRequestMiddleware:
+    """
+    Pure ASGI middleware: times each HTTP request and, when it took at
+    least `threshold` seconds, adds it with the stages it went through to
+    `log`. Must be outermost to also cover the lean routes.
+    """
+
+    def __init__(self, app, threshold: float, log: SlowRequestLog):
+        self.app = app
+        self.threshold = threshold
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stages = []
+        token = request_stages.set(stages)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_stages.reset(token)
+            if elapsed >= self.threshold:
+                self.log.add({
+                    "time": round(time.time(), 3),
+                    "pid": os.getpid(),
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": getattr(scope.get("route"), "path", None),
+                    "status": status,
+                    "duration_ms": round(elapsed * 1000, 3),
+                    # Copied: work the request started may still be running
+                    "stages": [{"stage": name, "ms": round(seconds * 1000, 3)} for name, seconds in list(stages)],
+                })
+
+
+profiler = SamplingProfiler()
+slow_requests = SlowRequestLog(SLOW_REQUEST_BUFFER)
@@ -0,0 +1,125 @@
+import math
+import mmap
+import multiprocessing
+import struct
+import time
+
+from .config import RATE_LIMIT, RATE_LIMIT_BURST, RATE_LIMIT_KEYS, RATE_LIMIT_RATE, RATE_LIMIT_SLOTS
+from .metrics import Counter, registry
+
+RATE_LIMITED = registry.register(Counter(
+    "rate_limited_total",
+    "Verification attempts refused by the rate limiter, by the key that ran out",
+    labelnames=("key",),
+))
+
+KEY_KINDS = ("ip", "user")
+
+# Buckets per set: a new key replaces the least recently used of these
+WAYS = 4
+# Slot layout: key hash (u64, top bit set when in use), tokens (f64),
+# last update (f64, time.monotonic()); a set is WAYS slots, read at once
+_SLOT = struct.Struct("<Qdd")
+_SET = struct.Struct("<" + "Qdd" * WAYS)
+_IN_USE = 1 << 63
+_HASH_MASK = _IN_USE - 1
+
+
+class RateLimiter:
+    """
+    Token buckets for verification attempts, keyed by client IP and/or
+    user id.
+
+    Each key gets `burst` tokens, refilled at `rate` tokens per second; an
+    attempt takes one token from every configured key and is refused when
+    any of them is empty, with the seconds until a token is available.
+
+    Buckets live in a fixed table of `slots` entries in anonymous shared
+    memory, so memory does not grow with the number of clients, and (the
+    table being created before app/serve.py forks) all workers draw from
+    the same buckets. The table is `WAYS`-way set associative: a key maps
+    to one set and, when it is not there, replaces the set's least
+    recently used bucket, i.e. one that has been idle longest and is most
+    likely already refilled. Sets are guarded by `stripes` locks.
+
+    Keys are hashed with Python's hash(), which is salted per process tree
+    (workers inherit the parent's salt), so clients cannot choose ids that
+    collide with someone else's bucket.
+    """
+
+    def __init__(self, slots: int, rate: float, burst: float, keys=KEY_KINDS, stripes: int = 16):
+        unknown = set(keys) - set(KEY_KINDS)
+        if unknown:
+            raise ValueError(f"rate limit keys must be among {KEY_KINDS}, got {sorted(unknown)}")
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.keys = tuple(keys)
+        self.sets = max(1, slots // WAYS)
+        self.nbytes = self.sets * _SET.size
+        self._mm = mmap.mmap(-1, self.nbytes)  # MAP_SHARED | MAP_ANONYMOUS
+        self._locks = [multiprocessing.Lock() for _ in range(max(1, stripes))]
+        self._limited = {kind: RATE_LIMITED.labels(kind) for kind in KEY_KINDS}
+
+    def check(self, client_ip: str | None, user_id: str | None) -> float:
+        """
+        Take a token for this attempt. Returns 0.0 if allowed, else the
+        seconds to wait before retrying. `client_ip` None (no client
+        address) skips the IP bucket; `user_id` None is the single-seed
+        user.
+        """
+        now = time.monotonic()
+        for kind in self.keys:
+            if kind == "ip":
+                if client_ip is None:
+                    continue
+                wait = self.acquire("ip:" + client_ip, now)
+            else:
+                wait = self.acquire("user:" + (user_id or ""), now)
+            if wait:
+                self._limited[kind].inc()
+                return wait
+        return 0.0
+
+    def acquire(self, key: str, now: float | None = None) -> float:
+        """Take one token from `key`'s bucket; 0.0 or seconds to wait."""
+        if now is None:
+            now = time.monotonic()
+        tag = (hash(key) & _HASH_MASK) | _IN_USE
+        set_index = tag % self.sets
+        offset = set_index * _SET.size
+
+        with self._locks[set_index % len(self._locks)]:
+            fields = _SET.unpack_from(self._mm, offset)
+            hashes = fields[0::3]
+            if tag in hashes:
+                way = hashes.index(tag)
+                tokens = min(self.burst, fields[way * 3 + 1] + (now - fields[way * 3 + 2]) * self.rate)
+            else:
+                # Not cached: take over the least recently updated bucket
+                updated = fields[2::3]
+                way = updated.index(min(updated))
+                tokens = self.burst
+
+            allowed = tokens >= 1.0
+            if allowed:
+                tokens -= 1.0
+            _SLOT.pack_into(self._mm, offset + way * _SLOT.size, tag, tokens, now)
+        if allowed:
+            return 0.0
+        return (1.0 - tokens) / self.rate if self.rate > 0 else math.inf
+
+
+def retry_after_header(wait: float) -> str:
+    """Retry-After value (whole seconds, at least 1) for a wait from check()."""
+    return str(max(1, math.ceil(min(wait, 86400.0))))
+
+
+# Created at import so app/serve.py's workers share it; with RATE_LIMIT off
+# it is never used, so only one set and one lock are allocated.
+rate_limiter = RateLimiter(
+    RATE_LIMIT_SLOTS if RATE_LIMIT else 0,
+    RATE_LIMIT_RATE,
+    RATE_LIMIT_BURST,
+    keys=RATE_LIMIT_KEYS,
+    stripes=16 if RATE_LIMIT else 1,
+)
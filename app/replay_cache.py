@@ -0,0 +1,167 @@
+import mmap
+import multiprocessing
+import unicodedata
+
+from .config import (
+    DRIFT_MAX_WINDOW,
+    DRIFT_TRACKING,
+    REPLAY_CACHE_FULL_POLICY,
+    REPLAY_CACHE_MAX_ENTRIES,
+    REPLAY_PROTECTION,
+)
+from .metrics import Counter, registry
+
+REPLAYS_REJECTED = registry.register(Counter(
+    "totp_replays_rejected_total",
+    "Valid codes refused by the replay cache, by reason",
+    labelnames=("reason",),
+))
+
+FULL_POLICIES = ("reject", "allow")
+
+# Entry layout (u64): epoch tag (12 bits, top bit always set so a zeroed
+# slot never looks live) | user hash (32 bits) | code (20 bits)
+_TAG_BITS = 11
+_TAG_MASK = (1 << _TAG_BITS) - 1
+_LIVE = 1 << _TAG_BITS
+_USER_SHIFT = 20
+_TAG_SHIFT = 52
+# Bucket header (2 x i64): step, count
+_HEADER_FIELDS = 2
+
+
+class ReplayCache:
+    """
+    Codes already accepted by /verify-2fa, so each (user, step, code) is
+    accepted at most once.
+
+    A ring of `2 * window + 2` buckets, one per TOTP time step: a step can
+    only be verified while it is within `window` steps of now, so by the
+    time a ring position is needed for a new step, the step it held has
+    left the window and the whole bucket is dropped in O(1). Each bucket
+    is a fixed open-addressing table of 8-byte entries (user hash, code as
+    an integer, and the bucket's epoch); dropping a bucket just bumps its
+    epoch, which turns every old entry into a free slot. When the 11 epoch
+    bits wrap (every 2048 reuses of a bucket) the bucket is zeroed once.
+
+    Memory is allocated once, in anonymous shared memory: created before
+    app/serve.py forks, every worker shares one cache, so a code accepted
+    by one worker is a replay for all of them. One lock serialises claims.
+
+    Capacity is a hard cap of `max_entries` accepted codes across the ring
+    (max_entries / buckets per step). When a step's bucket is full, new
+    codes for that step are refused with policy "reject" (fail closed: the
+    user retries with the next code) or accepted without being recorded
+    with policy "allow" (fail open: replays of those codes are possible).
+    Either way it is counted in totp_replays_rejected_total{reason="full"}.
+
+    Users are identified by a 32-bit hash of the user id, so two users
+    whose ids collide cannot both use the same code in the same step. It is
+    Python's hash(), salted per process tree like the rate limiter's keys
+    (workers forked by app/serve.py share the salt along with the cache),
+    so clients cannot choose colliding ids to burn someone else's codes.
+    """
+
+    def __init__(self, max_entries: int, window: int = 1, full_policy: str = "reject"):
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f"full policy must be one of {FULL_POLICIES}, got {full_policy!r}")
+        self.window = max(1, window)
+        self.buckets = 2 * self.window + 2
+        self.full_policy = full_policy
+        self.bucket_capacity = max(1, -(-max_entries // self.buckets))
+        # At most half full, so probe sequences stay short
+        self.bucket_slots = 1 << (2 * self.bucket_capacity - 1).bit_length()
+        self.max_entries = self.bucket_capacity * self.buckets
+        self.replays = 0
+        self.full = 0
+
+        header_bytes = self.buckets * _HEADER_FIELDS * 8
+        self.nbytes = header_bytes + self.buckets * self.bucket_slots * 8
+        self._mm = mmap.mmap(-1, self.nbytes)  # MAP_SHARED | MAP_ANONYMOUS
+        self._headers = memoryview(self._mm)[:header_bytes].cast("q")
+        self._entries = memoryview(self._mm)[header_bytes:].cast("Q")
+        for bucket in range(self.buckets):
+            self._headers[bucket * _HEADER_FIELDS] = -1
+        self._lock = multiprocessing.Lock()
+        self._rejected_replay = REPLAYS_REJECTED.labels("replay")
+        self._rejected_full = REPLAYS_REJECTED.labels("full")
+        self._rejected_expired = REPLAYS_REJECTED.labels("expired")
+
+    def claim(self, user_id: str | None, code: str, step: int) -> bool:
+        """
+        Record that `code` was accepted for `user_id` at TOTP `step`.
+
+        Returns True the first time, False for a replay or a step whose
+        bucket has already been reused (it left the window). When the
+        step's bucket is full, returns False with policy "reject" and True
+        (without recording) with policy "allow".
+        """
+        if not code.isascii():
+            code = unicodedata.normalize("NFKC", code)  # as verification does
+        user = hash(user_id) & 0xFFFFFFFF if user_id else 0
+        key = (user << _USER_SHIFT) | int(code)
+        bucket = step % self.buckets
+        header = bucket * _HEADER_FIELDS
+        headers, entries = self._headers, self._entries
+        mask = self.bucket_slots - 1
+        base = bucket * self.bucket_slots
+
+        with self._lock:
+            current = headers[header]
+            if step != current:
+                if step < current:
+                    # Bucket already reused for a newer step
+                    self._rejected_expired.inc()
+                    return False
+                self._reset(bucket, step)
+            count = headers[header + 1]
+            tag = ((count >> 32) & _TAG_MASK) | _LIVE
+            live = tag << _TAG_SHIFT
+            entry = live | key
+
+            index = (key * 0x9E3779B1) >> 16 & mask
+            while True:
+                slot = entries[base + index]
+                if slot >> _TAG_SHIFT != tag:
+                    break  # free (empty or from an earlier epoch)
+                if slot == entry:
+                    self._rejected_replay.inc()
+                    self.replays += 1
+                    return False
+                index = (index + 1) & mask
+
+            if count & 0xFFFFFFFF >= self.bucket_capacity:
+                self._rejected_full.inc()
+                self.full += 1
+                return self.full_policy == "allow"
+            entries[base + index] = entry
+            headers[header + 1] = count + 1
+        return True
+
+    def entries(self) -> int:
+        """Codes currently remembered across the ring."""
+        return sum(self._headers[b * _HEADER_FIELDS + 1] & 0xFFFFFFFF for b in range(self.buckets))
+
+    def _reset(self, bucket: int, step: int) -> None:
+        # Header count word: epoch << 32 | number of entries
+        header = bucket * _HEADER_FIELDS
+        epoch = ((self._headers[header + 1] >> 32) + 1) & _TAG_MASK
+        if epoch == 0:
+            base = bucket * self.bucket_slots
+            self._entries[base:base + self.bucket_slots] = _zeros(self.bucket_slots)
+        self._headers[header] = step
+        self._headers[header + 1] = epoch << 32
+
+
+def _zeros(count: int) -> memoryview:
+    return memoryview(bytes(count * 8)).cast("Q")
+
+
+# Codes are accepted up to DRIFT_MAX_WINDOW steps away with drift tracking.
+# Created at import so app/serve.py's workers share it; with
+# REPLAY_PROTECTION off it is never used, so only a token table is allocated.
+replay_cache = ReplayCache(
+    REPLAY_CACHE_MAX_ENTRIES if REPLAY_PROTECTION else 0,
+    window=DRIFT_MAX_WINDOW if DRIFT_TRACKING else 1,
+    full_policy=REPLAY_CACHE_FULL_POLICY,
+)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from .code_log import BufferedLineWriter, RotatingCodeLog, format_code_log_line
+from .config import (
+    CODE_LOG_DIR,
+    CODE_LOG_FLUSH_INTERVAL,
+    CODE_LOG_MAX_LINES,
+    CODE_LOG_MAX_SEGMENTS,
+    CODE_LOG_PATH,
+    CODE_LOG_SEGMENT_MAX_RECORDS,
+    CODE_LOG_SEGMENT_SECONDS,
+)
+from .seed_cache import seed_cache
+from .totp_utils import generate_totp_code
+
+logger = logging.getLogger(__name__)
+
+
+class CodeLogScheduler:
+    """
+    In-process replacement for the per-minute cron job.
+
+    Runs as an asyncio task inside the API process: at every minute
+    boundary it generates the code for that exact instant from the
+    already-loaded seed (seed cache + TOTP code table) and hands the line
+    to a buffered writer, which is flushed every `flush_interval` seconds
+    and on stop(). Each wake-up target is computed from the wall clock, so
+    the schedule does not drift.
+
+    If `segments` is given, every entry is also appended to that rotated,
+    searchable log (served by GET /code-log).
+
+    Multi-worker launchers set `enabled = False` in all but one worker so
+    each minute is logged exactly once.
+    """
+
+    def __init__(
+        self,
+        writer: BufferedLineWriter,
+        segments: RotatingCodeLog | None = None,
+        period: int = 60,
+        flush_interval: float = 60.0,
+    ):
+        self.writer = writer
+        self.segments = segments
+        self.period = period
+        self.flush_interval = flush_interval
+        self._tasks: list[asyncio.Task] = []
+        self.enabled = True
+
+    def start(self) -> None:
+        if self._tasks or not self.enabled:
+            return
+        self._tasks = [
+            asyncio.create_task(self._tick_loop()),
+            asyncio.create_task(self._flush_loop()),
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._flush()
+
+    def log_once(self, tick: float) -> None:
+        try:
+            hex_seed = seed_cache.get()
+        except FileNotFoundError:
+            logger.warning("Seed file not found at %s", seed_cache.path)
+            return
+        except ValueError:
+            logger.warning("Seed file %s is invalid", seed_cache.path)
+            return
+
+        code = generate_totp_code(hex_seed, for_time=tick)
+        when = datetime.fromtimestamp(tick, timezone.utc)
+        self.writer.write_line(format_code_log_line(when, code))
+        if self.segments is not None:
+            self.segments.append(when, code)
+
+    async def _tick_loop(self) -> None:
+        while True:
+            tick = (int(time.time()) // self.period + 1) * self.period
+            # asyncio sleeps on the monotonic clock; re-check the wall clock
+            # so we never fire before the boundary
+            while (delay := tick - time.time()) > 0:
+                await asyncio.sleep(delay)
+            try:
+                self.log_once(tick)
+            except Exception:
+                logger.exception("Code log tick failed")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self._flush()
+
+    def _flush(self) -> None:
+        try:
+            self.writer.flush()
+        except Exception as e:
+            logger.warning("Could not write code log %s: %s", self.writer.path, e)
+        if self.segments is not None:
+            try:
+                self.segments.flush()
+            except Exception as e:
+                logger.warning("Could not write code log segments in %s: %s", self.segments.directory, e)
+
+
+code_log_segments = RotatingCodeLog(
+    CODE_LOG_DIR,
+    segment_seconds=CODE_LOG_SEGMENT_SECONDS,
+    max_records=CODE_LOG_SEGMENT_MAX_RECORDS,
+    max_segments=CODE_LOG_MAX_SEGMENTS,
+)
+
+code_log_scheduler = CodeLogScheduler(
+    BufferedLineWriter(CODE_LOG_PATH, max_lines=CODE_LOG_MAX_LINES),
+    segments=code_log_segments,
+    flush_interval=CODE_LOG_FLUSH_INTERVAL,
+)
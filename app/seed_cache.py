@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from .config import SEED_CACHE_CHECK_INTERVAL, SEED_FILE_PATH
+
+
+class SeedCache:
+    """
+    Process-wide in-memory cache of the validated seed stored at `path`.
+
+    The hot path (/generate-2fa, /verify-2fa) only reads memory. The file is
+    stat()-ed at most once every `check_interval` seconds to notice outside
+    changes (new inode, mtime or size), and only re-read when one of those
+    changed. /decrypt-seed pushes the new seed in directly via `store()`.
+
+    With a SharedSeedSlot attached (multi-worker mode, app/serve.py),
+    `store()` also publishes the seed to the slot and every lookup compares
+    the slot's generation with the one last seen, so a seed decrypted in
+    one worker is served by all workers from their next request on.
+
+    Counters:
+        hits   - seed served without reading the file
+        misses - seed had to be (re-)read from disk
+        checks - stat() calls made to detect outside changes
+    """
+
+    def __init__(self, path: Path, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._entry: tuple[str, bytes] | None = None
+        self._file_id: tuple[int, int, int] | None = None
+        self._next_check = 0.0
+        self._shared = None
+        self._shared_generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.checks = 0
+
+    def get(self) -> str:
+        """
+        Return the cached 64-character hex seed.
+
+        Raises:
+            FileNotFoundError: seed file does not exist (not decrypted yet)
+            ValueError: stored seed is not a 64-character hex string
+        """
+        return self.get_entry()[0]
+
+    def get_entry(self) -> tuple[str, bytes]:
+        """
+        Return (hex_seed, seed_bytes), re-validating against disk only when
+        the check interval has elapsed.
+        """
+        shared = self._shared
+        if shared is not None and shared.generation != self._shared_generation:
+            with self._lock:
+                self._adopt_shared()
+
+        entry = self._entry
+        if entry is not None and time.monotonic() < self._next_check:
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            return self._revalidate()
+
+    def store(self, hex_seed: str) -> None:
+        """
+        Replace the cached seed after it has been written to `path`.
+        Called by /decrypt-seed so the next request does not touch disk.
+        """
+        entry = _parse_seed(hex_seed)
+        with self._lock:
+            self._entry = entry
+            self._file_id = self._stat()
+            self._next_check = time.monotonic() + self.check_interval
+            if self._shared is not None:
+                self._shared_generation = self._shared.publish(entry[1])
+
+    def attach_shared(self, slot) -> None:
+        """
+        Share the seed with other processes through `slot`. Publishes the
+        currently cached seed, if any, so processes forked afterwards
+        start from the same generation.
+        """
+        with self._lock:
+            self._shared = slot
+            entry = self._entry
+            self._shared_generation = slot.publish(entry[1] if entry is not None else None)
+
+    def invalidate(self) -> None:
+        """
+        Drop the cached seed; the next lookup re-reads the file.
+        """
+        with self._lock:
+            self._entry = None
+            self._file_id = None
+            self._next_check = 0.0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "checks": self.checks}
+
+    # ---------- internals (called with self._lock held) ----------
+
+    def _adopt_shared(self) -> None:
+        generation, seed_bytes = self._shared.read()
+        if generation == self._shared_generation:
+            return  # another thread adopted it already
+        self._shared_generation = generation
+        if seed_bytes is None:
+            return
+        # Written to `path` by the publishing process just before; taking
+        # the file id now keeps the next periodic check from re-reading it
+        self._entry = (seed_bytes.hex(), seed_bytes)
+        self._file_id = self._stat()
+        self._next_check = time.monotonic() + self.check_interval
+
+    def _stat(self) -> tuple[int, int, int] | None:
+        self.checks += 1
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _revalidate(self) -> tuple[str, bytes]:
+        # Another thread may have refreshed the entry while we waited
+        now = time.monotonic()
+        if self._entry is not None and now < self._next_check:
+            self.hits += 1
+            return self._entry
+
+        file_id = self._stat()
+        if file_id is None:
+            self._entry = None
+            self._file_id = None
+            # As per spec: 500 error if seed unavailable
+            raise FileNotFoundError("Seed not decrypted yet")
+
+        if self._entry is not None and file_id == self._file_id:
+            # File unchanged on disk -> keep serving the cached seed
+            self._next_check = now + self.check_interval
+            self.hits += 1
+            return self._entry
+
+        self.misses += 1
+        self._entry = None
+        entry = _parse_seed(self.path.read_text(encoding="utf-8"))
+
+        self._entry = entry
+        self._file_id = file_id
+        self._next_check = now + self.check_interval
+        return entry
+
+
+def _parse_seed(raw: str) -> tuple[str, bytes]:
+    hex_seed = raw.strip()
+    if not hex_seed or len(hex_seed) != 64:
+        raise ValueError("Stored seed is invalid")
+    try:
+        seed_bytes = bytes.fromhex(hex_seed)
+    except ValueError:
+        raise ValueError("Stored seed is invalid")
+    return hex_seed, seed_bytes
+
+
+# Shared instance used by the API (and anything else running in-process)
+seed_cache = SeedCache(SEED_FILE_PATH, SEED_CACHE_CHECK_INTERVAL)
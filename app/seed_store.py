@@ -0,0 +1,247 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+
+from .config import SEED_STORE_INITIAL_CAPACITY, SEED_STORE_PATH
+
+# ---------- On-disk format ----------
+#
+# Header (64 bytes, little-endian):
+#     magic     8s   b"2FASEEDS"
+#     version   u32  1
+#     capacity  u32  number of slots (power of two)
+#     count     u64  number of used slots
+#     moved     u32  1 once the file was replaced by a bigger one
+#     (padding up to 64 bytes)
+#
+# Slots (capacity x 48 bytes), open addressing with linear probing:
+#     key   16 bytes  BLAKE2b-128 of the UTF-8 user id (all zero = empty)
+#     seed  32 bytes  raw seed
+#
+# Lookups hash the user id once and compare 16-byte keys straight out of the
+# mmap, so no Python object is kept per stored seed.
+
+MAGIC = b"2FASEEDS"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQI")
+HEADER_SIZE = 64
+KEY_SIZE = 16
+SEED_SIZE = 32
+SLOT_SIZE = KEY_SIZE + SEED_SIZE
+EMPTY_KEY = bytes(KEY_SIZE)
+MAX_LOAD = 0.7
+
+_COUNT_OFFSET = 16
+_MOVED_OFFSET = 24
+_u32 = struct.Struct("<I")
+_u64 = struct.Struct("<Q")
+
+
+def _key_for(user_id: str) -> bytes:
+    return hashlib.blake2b(user_id.encode("utf-8"), digest_size=KEY_SIZE).digest()
+
+
+class SeedStore:
+    """
+    Seeds for many users/tenants in one memory-mapped hash table file.
+
+    - get() is O(1): hash the user id, probe a few fixed-width slots.
+    - put()/put_many() take an flock on `<path>.lock`, so several processes
+      (API workers, bulk import) can write safely. When the table passes
+      70% load it is rebuilt at twice the size into a new file that
+      atomically replaces the old one; the old file is then flagged
+      "moved" and every reader re-opens on its next lookup.
+    """
+
+    def __init__(self, path: Path, initial_capacity: int = 1024):
+        self.path = path
+        self.initial_capacity = _next_power_of_two(max(initial_capacity, 16))
+
+        self._lock = threading.Lock()
+        self._mm: mmap.mmap | None = None
+        self._capacity = 0
+
+    # ---------- public API ----------
+
+    def get(self, user_id: str) -> bytes | None:
+        """
+        Return the 32 raw seed bytes stored for `user_id`, or None.
+        """
+        mm = self._current_map()
+        if mm is None:
+            return None
+
+        key = _key_for(user_id)
+        offset = self._find(mm, self._capacity, key)
+        if offset is None:
+            return None
+        start = offset + KEY_SIZE
+        return mm[start:start + SEED_SIZE]
+
+    def put(self, user_id: str, seed_bytes: bytes) -> None:
+        self.put_many([(user_id, seed_bytes)])
+
+    def put_many(self, items) -> int:
+        """
+        Insert or replace (user_id, seed_bytes) pairs under one file lock.
+        Returns the number of pairs written.
+        """
+        written = 0
+        with self._lock, self._file_lock():
+            self._open(create=True)
+            for user_id, seed_bytes in items:
+                if len(seed_bytes) != SEED_SIZE:
+                    raise ValueError(f"seed must be {SEED_SIZE} bytes, got {len(seed_bytes)}")
+                if (self._count() + 1) > self._capacity * MAX_LOAD:
+                    self._grow()
+                self._insert(self._mm, self._capacity, _key_for(user_id), seed_bytes)
+                written += 1
+            self._mm.flush()
+        return written
+
+    def __len__(self) -> int:
+        mm = self._current_map()
+        return 0 if mm is None else self._count()
+
+    @property
+    def capacity(self) -> int:
+        self._current_map()
+        return self._capacity
+
+    # ---------- mapping management ----------
+
+    def _current_map(self) -> mmap.mmap | None:
+        mm = self._mm
+        if mm is not None and _u32.unpack_from(mm, _MOVED_OFFSET)[0] == 0:
+            return mm
+        with self._lock:
+            self._open(create=False)
+            return self._mm
+
+    def _open(self, create: bool) -> None:
+        # Called with self._lock held
+        if self._mm is not None and _u32.unpack_from(self._mm, _MOVED_OFFSET)[0] == 0:
+            return
+
+        if not self.path.exists():
+            if not create:
+                self._mm = None
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            _create_file(tmp_path, self.initial_capacity).close()
+            os.replace(tmp_path, self.path)
+
+        with open(self.path, "r+b") as f:
+            mm = mmap.mmap(f.fileno(), 0)
+        magic, version, capacity, _, _ = HEADER.unpack_from(mm)
+        if magic != MAGIC or version != VERSION:
+            mm.close()
+            raise ValueError(f"{self.path} is not a seed store file")
+
+        # The previous map is left to the garbage collector rather than
+        # closed, because another thread may still be reading from it.
+        self._mm = mm
+        self._capacity = capacity
+
+    def _file_lock(self):
+        lock_path = self.path.with_name(self.path.name + ".lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        return _FileLock(lock_path)
+
+    def _count(self) -> int:
+        return _u64.unpack_from(self._mm, _COUNT_OFFSET)[0]
+
+    def _grow(self) -> None:
+        # Called with both locks held
+        old_mm, old_capacity = self._mm, self._capacity
+        new_capacity = old_capacity * 2
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        new_mm = _create_file(tmp_path, new_capacity)
+        for i in range(old_capacity):
+            offset = HEADER_SIZE + i * SLOT_SIZE
+            key = old_mm[offset:offset + KEY_SIZE]
+            if key != EMPTY_KEY:
+                seed = old_mm[offset + KEY_SIZE:offset + SLOT_SIZE]
+                self._insert(new_mm, new_capacity, key, seed)
+        new_mm.flush()
+
+        os.replace(tmp_path, self.path)
+        _u32.pack_into(old_mm, _MOVED_OFFSET, 1)
+        old_mm.flush()
+
+        self._mm = new_mm
+        self._capacity = new_capacity
+
+    # ---------- hash table ----------
+
+    @staticmethod
+    def _find(mm, capacity: int, key: bytes) -> int | None:
+        mask = capacity - 1
+        index = int.from_bytes(key[:8], "little") & mask
+        for _ in range(capacity):
+            offset = HEADER_SIZE + index * SLOT_SIZE
+            slot_key = mm[offset:offset + KEY_SIZE]
+            if slot_key == key:
+                return offset
+            if slot_key == EMPTY_KEY:
+                return None
+            index = (index + 1) & mask
+        return None
+
+    @staticmethod
+    def _insert(mm, capacity: int, key: bytes, seed_bytes: bytes) -> None:
+        mask = capacity - 1
+        index = int.from_bytes(key[:8], "little") & mask
+        while True:
+            offset = HEADER_SIZE + index * SLOT_SIZE
+            slot_key = mm[offset:offset + KEY_SIZE]
+            if slot_key == key:
+                mm[offset + KEY_SIZE:offset + SLOT_SIZE] = seed_bytes
+                return
+            if slot_key == EMPTY_KEY:
+                # Seed first, then key: readers never see a key without its seed
+                mm[offset + KEY_SIZE:offset + SLOT_SIZE] = seed_bytes
+                mm[offset:offset + KEY_SIZE] = key
+                count = _u64.unpack_from(mm, _COUNT_OFFSET)[0]
+                _u64.pack_into(mm, _COUNT_OFFSET, count + 1)
+                return
+            index = (index + 1) & mask
+
+
+class _FileLock:
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd = -1
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = -1
+
+
+def _create_file(path: Path, capacity: int) -> mmap.mmap:
+    size = HEADER_SIZE + capacity * SLOT_SIZE
+    with open(path, "w+b") as f:
+        f.truncate(size)
+        mm = mmap.mmap(f.fileno(), size)
+    HEADER.pack_into(mm, 0, MAGIC, VERSION, capacity, 0, 0)
+    return mm
+
+
+def _next_power_of_two(n: int) -> int:
+    return 1 << (n - 1).bit_length()
+
+
+# Shared instance used by the API when a request carries a user_id
+seed_store = SeedStore(SEED_STORE_PATH, SEED_STORE_INITIAL_CAPACITY)
@@ -0,0 +1,187 @@
+"""
+Multi-worker launcher: python -m app.serve
+
+Loads the app, the private key and the seed once, binds the listening
+socket, then forks the uvicorn workers. Workers share the parsed key, the
+seed and the warmed TOTP tables copy-on-write, and accept connections on
+the inherited socket. The parent only supervises: it restarts workers
+that die and forwards SIGTERM/SIGINT for a graceful shutdown.
+
+The decrypt pools are not forked from here: each worker starts its own
+(app/executors.py) from a forkserver, and those processes parse the key
+again themselves. They skip its RSA consistency checks, which the parent
+has already run, so this costs far less than the first parse.
+
+Everything else in a worker is its own: GET /metrics, the seed cache
+counters, the slow-request buffer and /debug/profile describe only the
+worker that answered. Counters are not summed across workers.
+
+A seed decrypted by one worker reaches all others through a shared-memory
+seed slot (app/shared_state.py) that every worker checks per request.
+With CRON_IN_PROCESS=1 only worker 0 runs the code log scheduler. With
+UDS_PATH set, the verification socket is bound here too and all workers
+accept on it.
+
+Environment (read here, before app.config is imported):
+    WEB_CONCURRENCY   number of workers (default: one per available CPU)
+    HOST, PORT        listen address (default 0.0.0.0:8080)
+    DECRYPT_WORKERS   per-worker decrypt pool size
+                      (default: available CPUs / WEB_CONCURRENCY, at least 1)
+"""
+import logging
+import math
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+logger = logging.getLogger("app.serve")  # __name__ is "__main__" under -m
+
+# Seconds to wait for workers to finish in-flight requests on shutdown
+GRACEFUL_TIMEOUT = 30.0
+# A worker that dies sooner than this after starting is restarted with a delay
+MIN_WORKER_UPTIME = 1.0
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask, capped by a cgroup v2 quota."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def _preload() -> None:
+    """Parse the key and load the seed so forked workers inherit them."""
+    from .main import warm_up
+    from .seed_cache import seed_cache
+    from .shared_state import SharedSeedSlot
+
+    warm_up(start_decrypt_workers=False)
+    seed_cache.attach_shared(SharedSeedSlot())
+
+
+def _run_worker(index: int, config, sock) -> None:
+    import uvicorn
+
+    from .scheduler import code_log_scheduler
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)
+    if index != 0:
+        code_log_scheduler.enabled = False
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    def __init__(self, workers: int, config, sock):
+        self.workers = workers
+        self.config = config
+        self.sock = sock
+        self.children: dict[int, tuple[int, float]] = {}  # pid -> (index, started)
+        self.stopping = False
+
+    def spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                _run_worker(index, self.config, self.sock)
+                status = 0
+            except BaseException:
+                logger.exception("Worker %d crashed", index)
+            finally:
+                os._exit(status)
+        self.children[pid] = (index, time.monotonic())
+        logger.info("Started worker %d (pid %d)", index, pid)
+
+    def stop(self, signum, _frame) -> None:
+        if not self.stopping:
+            logger.info("Received %s, stopping workers", signal.Signals(signum).name)
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while self.children and not self.stopping:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            if pid not in self.children:
+                continue
+            index, started = self.children.pop(pid)
+            if self.stopping:
+                break
+            logger.warning(
+                "Worker %d (pid %d) exited with code %d, restarting", index, pid, os.waitstatus_to_exitcode(status)
+            )
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                time.sleep(MIN_WORKER_UPTIME)
+            self.spawn(index)
+
+        self._reap()
+
+    def _reap(self) -> None:
+        deadline = time.monotonic() + GRACEFUL_TIMEOUT
+        while self.children:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.children.pop(pid, None)
+                continue
+            if time.monotonic() > deadline:
+                for pid in self.children:
+                    logger.warning("Worker pid %d did not stop in time, killing it", pid)
+                    os.kill(pid, signal.SIGKILL)
+                deadline = float("inf")
+            time.sleep(0.05)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     [%(name)s] %(message)s")
+
+    cpus = available_cpus()
+    workers = int(os.getenv("WEB_CONCURRENCY", "0")) or cpus
+    # Each worker has its own decrypt pool; split the CPUs between them
+    os.environ.setdefault("DECRYPT_WORKERS", str(max(1, cpus // workers)))
+
+    import uvicorn
+
+    from .config import UDS_PATH
+    from .main import app, uds_server
+
+    _preload()
+    if UDS_PATH:
+        uds_server.bind()
+
+    config = uvicorn.Config(app, host=os.getenv("HOST", "0.0.0.0"), port=int(os.getenv("PORT", "8080")))
+    sock = config.bind_socket()
+    logger.info("Serving on %s:%d with %d workers (%d CPUs)", config.host, config.port, workers, cpus)
+
+    Supervisor(workers, config, sock).run()
+    sock.close()
+    uds_server.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
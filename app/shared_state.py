@@ -0,0 +1,49 @@
+import mmap
+import multiprocessing
+import struct
+import time
+
+# Slot layout: generation (u64), has_seed (u8), seed (32 bytes)
+_SLOT = struct.Struct("<QB32s")
+_GENERATION = struct.Struct("<Q")
+
+
+class SharedSeedSlot:
+    """
+    The current seed in anonymous shared memory, for workers forked from
+    one parent (app/serve.py).
+
+    Created in the parent before forking; every worker then maps the same
+    page. A writer bumps `generation` to an odd value, writes the seed and
+    bumps it to the next even value (a seqlock), so readers never take a
+    lock: they retry while a write is in progress or if the generation
+    moved during their read. Checking `generation` alone is one 8-byte
+    read, cheap enough to do on every request.
+    """
+
+    def __init__(self):
+        self._mm = mmap.mmap(-1, mmap.PAGESIZE)  # MAP_SHARED | MAP_ANONYMOUS
+        self._write_lock = multiprocessing.Lock()
+
+    @property
+    def generation(self) -> int:
+        return _GENERATION.unpack_from(self._mm, 0)[0]
+
+    def read(self) -> tuple[int, bytes | None]:
+        """Return a consistent (generation, seed bytes or None)."""
+        while True:
+            generation, has_seed, seed = _SLOT.unpack_from(self._mm, 0)
+            if generation % 2 == 0 and self.generation == generation:
+                return generation, (seed if has_seed else None)
+            time.sleep(0)  # writer is mid-update
+
+    def publish(self, seed_bytes: bytes | None) -> int:
+        """Store a new seed (or None) and return the new generation."""
+        if seed_bytes is not None and len(seed_bytes) != 32:
+            raise ValueError("Seed must be 32 bytes")
+        with self._write_lock:
+            generation = self.generation
+            _GENERATION.pack_into(self._mm, 0, generation + 1)
+            _SLOT.pack_into(self._mm, 0, generation + 1, seed_bytes is not None, seed_bytes or b"")
+            _GENERATION.pack_into(self._mm, 0, generation + 2)
+            return generation + 2
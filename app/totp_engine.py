@@ -0,0 +1,78 @@
+import hashlib
+import hmac
+import struct
+import time
+import unicodedata
+
+_pack_counter = struct.Struct(">Q").pack
+_unpack_u32 = struct.Struct(">I").unpack_from
+
+
+class TOTPEngine:
+    """
+    RFC 6238 TOTP (HMAC-SHA1) working directly on raw seed bytes.
+
+    Produces exactly the same codes as pyotp.TOTP(base32(seed), interval,
+    digits), but:
+        - no hex -> base32 -> bytes round trip per call
+        - the keyed HMAC state is built once and `.copy()`-ed per code,
+          so the key padding/inner+outer hashing setup is not repeated
+        - dynamic truncation reads the 31-bit value straight from the
+          digest with struct, no intermediate strings
+    """
+
+    __slots__ = ("interval", "digits", "_mac", "_modulus", "_format")
+
+    def __init__(self, seed_bytes: bytes, interval: int = 30, digits: int = 6):
+        self.interval = interval
+        self.digits = digits
+        self._mac = hmac.new(seed_bytes, digestmod=hashlib.sha1)
+        self._modulus = 10 ** digits
+        self._format = f"{{:0{digits}d}}".format
+
+    def time_step(self, for_time: float | None = None) -> int:
+        if for_time is None:
+            for_time = time.time()
+        return int(for_time) // self.interval
+
+    def code_int_at_step(self, step: int) -> int:
+        """
+        Return the TOTP value for counter `step` as an integer.
+
+        Steps:
+            1. HMAC-SHA1(seed, 8-byte big-endian counter), from the
+               precomputed keyed state
+            2. offset = low nibble of the last digest byte
+            3. take 4 bytes at offset, clear the top bit (31-bit value)
+            4. reduce modulo 10^digits
+        """
+        if step < 0:
+            raise ValueError("time step must be a positive integer")
+        mac = self._mac.copy()
+        mac.update(_pack_counter(step))
+        digest = mac.digest()
+        offset = digest[19] & 0x0F
+        return (_unpack_u32(digest, offset)[0] & 0x7FFFFFFF) % self._modulus
+
+    def code_at_step(self, step: int) -> str:
+        return self._format(self.code_int_at_step(step))
+
+    def now(self, for_time: float | None = None) -> str:
+        return self.code_at_step(self.time_step(for_time))
+
+    def verify(self, code: str, valid_window: int = 0, for_time: float | None = None) -> bool:
+        """
+        Same semantics as pyotp.TOTP.verify: accept `code` if it matches any
+        step in [t - valid_window, t + valid_window], compared in constant
+        time after NFKC normalisation.
+        """
+        if not code.isascii():
+            code = unicodedata.normalize("NFKC", code)
+        candidate = code.encode("utf-8")
+
+        step = self.time_step(for_time)
+        for offset in range(-valid_window, valid_window + 1):
+            expected = self.code_at_step(step + offset).encode("ascii")
+            if hmac.compare_digest(candidate, expected):
+                return True
+        return False
@@ -1,7 +1,12 @@
 import base64
 import time
+from functools import lru_cache
 
-import pyotp
+from .code_table import CodeTable, match_code, match_index
+from .totp_engine import TOTPEngine
+
+TOTP_INTERVAL = 30
+TOTP_DIGITS = 6
 
 
 def _hex_to_base32(hex_seed: str) -> str:
@@ -27,21 +32,52 @@ def _hex_to_base32(hex_seed: str) -> str:
     return base32_bytes.decode("utf-8")
 
 
-def generate_totp_code(hex_seed: str) -> str:
+def _hex_to_bytes(hex_seed: str) -> bytes:
+    """
+    Convert 64-character hex seed to its 32 raw bytes
+    (same validation as _hex_to_base32).
+    """
+    if len(hex_seed) != 64:
+        raise ValueError(f"hex_seed must be 64 chars, got {len(hex_seed)}")
+
+    try:
+        return bytes.fromhex(hex_seed)
+    except ValueError as e:
+        raise ValueError(f"hex_seed is not valid hex: {e}")
+
+
+@lru_cache(maxsize=1024)
+def get_totp_engine(hex_seed: str) -> TOTPEngine:
+    """
+    Return the (cached) TOTP engine for a hex seed, so the seed is decoded
+    and the HMAC key state is built once per seed rather than per request.
+    """
+    return TOTPEngine(_hex_to_bytes(hex_seed), interval=TOTP_INTERVAL, digits=TOTP_DIGITS)
+
+
+@lru_cache(maxsize=1024)
+def get_code_table(hex_seed: str) -> CodeTable:
+    """
+    Return the (cached) per-time-step code table for a hex seed. Both
+    generate_totp_code and verify_totp_code read codes from it, so each
+    period's codes are computed once per seed.
+    """
+    return CodeTable(get_totp_engine(hex_seed))
+
+
+def generate_totp_code(hex_seed: str, for_time: float | None = None) -> str:
     """
     Generate current TOTP code from hex seed.
 
     TOTP parameters:
-        - Algorithm: SHA-1 (default in pyotp)
+        - Algorithm: SHA-1
         - Period: 30 seconds
         - Digits: 6
-    """
-    base32_seed = _hex_to_base32(hex_seed)
 
-    # interval=30 => 30-second time step; digits=6 => 6-digit codes
-    totp = pyotp.TOTP(base32_seed, interval=30, digits=6)
-    code = totp.now()  # returns 6-digit string
-    return code
+    Codes are identical to pyotp.TOTP(_hex_to_base32(hex_seed)).now();
+    see scripts/test_totp_engine.py.
+    """
+    return get_code_table(hex_seed).now(for_time)
 
 
 def get_current_validity_seconds() -> int:
@@ -52,12 +88,17 @@ def get_current_validity_seconds() -> int:
     Example: if we are 13 seconds into the period -> valid_for = 30 - 13 = 17
     """
     current_time = int(time.time())
-    elapsed_in_period = current_time % 30
-    remaining = 30 - elapsed_in_period
+    elapsed_in_period = current_time % TOTP_INTERVAL
+    remaining = TOTP_INTERVAL - elapsed_in_period
     return remaining
 
 
-def verify_totp_code(hex_seed: str, code: str, valid_window: int = 1) -> bool:
+def verify_totp_code(
+    hex_seed: str,
+    code: str,
+    valid_window: int = 1,
+    for_time: float | None = None,
+) -> bool:
     """
     Verify TOTP code with time window tolerance.
 
@@ -66,6 +107,7 @@ def verify_totp_code(hex_seed: str, code: str, valid_window: int = 1) -> bool:
         code: 6-digit code to verify
         valid_window: number of periods before/after to accept
                       (1 means current period ±1 => ±30 seconds)
+        for_time: Unix time to verify at (defaults to now)
 
     Returns:
         True if code is valid within the time window, False otherwise.
@@ -74,8 +116,48 @@ def verify_totp_code(hex_seed: str, code: str, valid_window: int = 1) -> bool:
         # Not strictly required by spec, but helpful sanity check
         return False
 
-    base32_seed = _hex_to_base32(hex_seed)
-    totp = pyotp.TOTP(base32_seed, interval=30, digits=6)
-
     # valid_window=1 -> accepts TOTP codes for [t-1, t, t+1] periods
-    return totp.verify(code, valid_window=valid_window)
+    return match_code(code, get_window_codes(hex_seed, valid_window, for_time))
+
+
+def verify_totp_code_at_offsets(
+    hex_seed: str,
+    code: str,
+    offsets,
+    for_time: float | None = None,
+) -> int | None:
+    """
+    verify_totp_code over an explicit list of step offsets (e.g. (0, -1, 1)),
+    tried in order and stopping at the first match.
+
+    Returns:
+        The matching offset, or None if the code is not valid.
+    """
+    if not code or len(code) != 6 or not code.isdigit():
+        return None
+    return get_code_table(hex_seed).match_offset(code, offsets, for_time)
+
+
+def get_window_codes(
+    hex_seed: str,
+    valid_window: int = 1,
+    for_time: float | None = None,
+) -> list[str]:
+    """
+    Codes accepted by verify_totp_code for this seed and time, i.e. the
+    steps [t - valid_window, t + valid_window]. Callers checking many
+    codes against one seed (batch verification) fetch these once and use
+    find_code_in_window for each code.
+    """
+    return get_code_table(hex_seed).window(valid_window, for_time)
+
+
+def find_code_in_window(code: str, window_codes: list[str]) -> int | None:
+    """
+    verify_totp_code against codes from get_window_codes, returning the
+    index in `window_codes` of the step the code matched (None if not
+    valid).
+    """
+    if not code or len(code) != 6 or not code.isdigit():
+        return None
+    return match_index(code, window_codes)
@@ -0,0 +1,100 @@
+import socket
+from pathlib import Path
+
+from .uds_protocol import (
+    LENGTH,
+    OP_ERROR,
+    OP_PING,
+    OP_VERIFY,
+    OP_VERIFY_BATCH,
+    ProtocolError,
+    encode_frame,
+    encode_verify,
+    encode_verify_batch,
+)
+
+# Requests verify_pipelined() has in flight at once. Their replies (6 bytes
+# each) must fit in the socket buffers while the client is still sending.
+PIPELINE_WINDOW = 1024
+
+
+class VerifyClient:
+    """
+    Minimal blocking client for the verification socket (UDS_PATH).
+
+        with VerifyClient("/run/2fa.sock") as client:
+            client.verify("123456")                      # STATUS_VALID, ...
+            client.verify("123456", tenant="alice")
+            client.verify_batch([("123456", None), ("654321", "alice")])
+            client.verify_pipelined(items)                # a round trip per window
+
+    Statuses are the STATUS_* constants from app.uds_protocol.
+    """
+
+    def __init__(self, path: str | Path, timeout: float | None = 5.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(str(path))
+        self._reader = self.sock.makefile("rb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._reader.close()
+        self.sock.close()
+
+    def ping(self) -> None:
+        self.sock.sendall(encode_frame(bytes((OP_PING,))))
+        self._expect(OP_PING)
+
+    def verify(self, code: str, tenant: str | None = None) -> int:
+        self.sock.sendall(encode_verify(code, tenant))
+        return self._expect_status()
+
+    def verify_batch(self, items) -> list[int]:
+        """items: (code, tenant or None) pairs, checked at one instant."""
+        self.sock.sendall(encode_verify_batch(items))
+        return list(self._expect(OP_VERIFY_BATCH))
+
+    def verify_pipelined(self, items, window: int = PIPELINE_WINDOW) -> list[int]:
+        """
+        One OP_VERIFY per item, sent `window` at a time: the replies to a
+        window are read before the next one is sent. Sending everything
+        first would deadlock once the unread replies fill the socket
+        buffers, as the server then stops reading requests.
+        """
+        items = list(items)
+        statuses = []
+        for start in range(0, len(items), window):
+            chunk = items[start:start + window]
+            self.sock.sendall(b"".join(encode_verify(code, tenant) for code, tenant in chunk))
+            statuses.extend(self._expect_status() for _ in chunk)
+        return statuses
+
+    def _expect_status(self) -> int:
+        statuses = self._expect(OP_VERIFY)
+        if len(statuses) != 1:
+            raise ProtocolError(f"verify reply with {len(statuses)} statuses")
+        return statuses[0]
+
+    def _expect(self, op: int) -> bytes:
+        header = self._reader.read(LENGTH.size)
+        if len(header) < LENGTH.size:
+            raise ConnectionError("verification socket closed")
+        (length,) = LENGTH.unpack(header)
+        payload = self._reader.read(length)
+        if len(payload) < length:
+            raise ConnectionError("verification socket closed")
+        if not payload:
+            raise ProtocolError("empty reply")
+        if payload[0] == OP_ERROR:
+            error = payload[1] if len(payload) > 1 else "?"
+            raise ProtocolError(f"server rejected request (error {error})")
+        if payload[0] != op:
+            raise ProtocolError(f"unexpected reply op {payload[0]}")
+        return payload[1:]
+
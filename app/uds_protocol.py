@@ -0,0 +1,103 @@
+"""
+Binary verification protocol spoken on the Unix domain socket (UDS_PATH).
+
+Every message, in both directions, is a frame:
+
+    length  u32 big-endian, size of the payload that follows
+    payload
+
+Request payloads start with an op byte:
+
+    OP_PING          0x00
+    OP_VERIFY        0x01  item
+    OP_VERIFY_BATCH  0x02  count u16, then `count` items
+
+    item = tenant_len u8, tenant (UTF-8, empty = default seed),
+           code_len u8, code (UTF-8)
+
+Response payloads echo the op byte, followed by one status byte per item
+(none for OP_PING). A request that cannot be served at all is answered
+with OP_ERROR and one error byte instead.
+
+Requests may be pipelined: responses come back in request order on the
+same connection.
+"""
+import struct
+
+OP_PING = 0x00
+OP_VERIFY = 0x01
+OP_VERIFY_BATCH = 0x02
+OP_ERROR = 0xFF
+
+# Per-item statuses (same outcomes as POST /verify-2fa)
+STATUS_INVALID = 0        # {"valid": false}
+STATUS_VALID = 1          # {"valid": true}
+STATUS_SEED_MISSING = 2   # 500 {"error": "Seed not decrypted yet"}
+STATUS_MISSING_CODE = 3   # 400 {"error": "Missing code"}
+
+# OP_ERROR codes
+ERROR_MALFORMED = 1
+ERROR_UNKNOWN_OP = 2
+ERROR_BATCH_TOO_LARGE = 3
+
+STATUS_NAMES = {
+    STATUS_INVALID: "invalid",
+    STATUS_VALID: "valid",
+    STATUS_SEED_MISSING: "seed_missing",
+    STATUS_MISSING_CODE: "missing_code",
+}
+
+# Largest payload either side accepts (a full batch of maximal items fits)
+MAX_FRAME = 1 << 20
+
+LENGTH = struct.Struct(">I")
+COUNT = struct.Struct(">H")
+
+
+class ProtocolError(Exception):
+    """Raised for payloads that do not follow the protocol."""
+
+
+def encode_frame(payload: bytes) -> bytes:
+    return LENGTH.pack(len(payload)) + payload
+
+
+def encode_item(code: str, tenant: str | None = None) -> bytes:
+    tenant_bytes = tenant.encode("utf-8") if tenant else b""
+    code_bytes = code.encode("utf-8")
+    if len(tenant_bytes) > 255 or len(code_bytes) > 255:
+        raise ValueError("tenant and code must be at most 255 bytes")
+    return bytes((len(tenant_bytes),)) + tenant_bytes + bytes((len(code_bytes),)) + code_bytes
+
+
+def encode_verify(code: str, tenant: str | None = None) -> bytes:
+    return encode_frame(bytes((OP_VERIFY,)) + encode_item(code, tenant))
+
+
+def encode_verify_batch(items) -> bytes:
+    """items: iterable of (code, tenant or None)"""
+    body = [encode_item(code, tenant) for code, tenant in items]
+    if len(body) > 0xFFFF:
+        raise ValueError("at most 65535 items per batch")
+    return encode_frame(bytes((OP_VERIFY_BATCH,)) + COUNT.pack(len(body)) + b"".join(body))
+
+
+def decode_items(payload: bytes, offset: int, count: int) -> list[tuple[str, str | None]]:
+    """Parse `count` items starting at `offset`; the payload must end after them."""
+    items = []
+    try:
+        for _ in range(count):
+            tenant_len = payload[offset]
+            tenant = payload[offset + 1:offset + 1 + tenant_len]
+            offset += 1 + tenant_len
+            code_len = payload[offset]
+            code = payload[offset + 1:offset + 1 + code_len]
+            offset += 1 + code_len
+            if len(tenant) != tenant_len or len(code) != code_len:
+                raise ProtocolError("truncated item")
+            items.append((code.decode("utf-8"), tenant.decode("utf-8") or None))
+    except (IndexError, UnicodeDecodeError) as e:
+        raise ProtocolError(str(e)) from e
+    if offset != len(payload):
+        raise ProtocolError("trailing bytes")
+    return items
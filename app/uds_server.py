@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+import socket
+from pathlib import Path
+
+from .metrics import Counter, registry
+from .uds_protocol import (
+    COUNT,
+    ERROR_BATCH_TOO_LARGE,
+    ERROR_MALFORMED,
+    ERROR_UNKNOWN_OP,
+    LENGTH,
+    MAX_FRAME,
+    OP_ERROR,
+    OP_PING,
+    OP_VERIFY,
+    OP_VERIFY_BATCH,
+    STATUS_INVALID,
+    STATUS_MISSING_CODE,
+    STATUS_SEED_MISSING,
+    STATUS_VALID,
+    ProtocolError,
+    decode_items,
+    encode_frame,
+)
+
+logger = logging.getLogger(__name__)
+
+UDS_REQUESTS = registry.register(Counter(
+    "uds_requests_total",
+    "Requests on the Unix socket verification listener by op",
+    labelnames=("op",),
+))
+_OP_LABELS = {OP_PING: "ping", OP_VERIFY: "verify", OP_VERIFY_BATCH: "verify_batch"}
+
+
+class UDSVerifyServer:
+    """
+    Unix domain socket listener for the binary verification protocol
+    (app/uds_protocol.py), for sidecar callers on the same host.
+
+    `verify(code, user_id)` and `new_batch()` are the same functions the
+    HTTP endpoints use (/verify-2fa and /verify-2fa/batch), so outcomes and
+    metrics match the HTTP path. Verification is a memory lookup plus a
+    few HMACs, so it runs inline on the event loop; all frames that arrive
+    in one read are answered with a single write.
+    """
+
+    def __init__(self, path: Path | None, verify, new_batch, max_batch: int):
+        self.path = path
+        self.verify = verify
+        self.new_batch = new_batch
+        self.max_batch = max_batch
+        self.sock: socket.socket | None = None
+        self._owner_pid: int | None = None
+        self._server: asyncio.AbstractServer | None = None
+
+    def bind(self) -> socket.socket:
+        """
+        Create the listening socket. Called by app/serve.py before forking so
+        all workers accept on it; otherwise start() binds it itself.
+        """
+        if self.sock is None:
+            try:
+                os.unlink(self.path)  # stale socket from a previous run
+            except FileNotFoundError:
+                pass
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(str(self.path))
+            sock.listen(1024)
+            sock.setblocking(False)
+            self.sock = sock
+            self._owner_pid = os.getpid()
+        return self.sock
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_unix_server(lambda: _VerifyProtocol(self), sock=self.bind())
+        logger.info("Verification socket listening on %s", self.path)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self.close()
+
+    def close(self) -> None:
+        """Close the socket; the process that bound it also removes the file."""
+        if self.sock is None:
+            return
+        self.sock.close()
+        self.sock = None
+        if self._owner_pid == os.getpid():
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def handle(self, payload: bytes) -> bytes:
+        """Response payload for one request payload."""
+        op = payload[0] if payload else None
+        label = _OP_LABELS.get(op)
+        if label is None:
+            return bytes((OP_ERROR, ERROR_UNKNOWN_OP if payload else ERROR_MALFORMED))
+        UDS_REQUESTS.labels(label).inc()
+
+        try:
+            if op == OP_PING:
+                if len(payload) != 1:
+                    raise ProtocolError("ping takes no arguments")
+                return bytes((OP_PING,))
+
+            if op == OP_VERIFY:
+                ((code, user_id),) = decode_items(payload, 1, 1)
+                return bytes((OP_VERIFY, self._verify_one(code, user_id)))
+
+            if len(payload) < 1 + COUNT.size:
+                raise ProtocolError("missing item count")
+            (count,) = COUNT.unpack_from(payload, 1)
+            if count > self.max_batch:
+                return bytes((OP_ERROR, ERROR_BATCH_TOO_LARGE))
+            items = decode_items(payload, 1 + COUNT.size, count)
+        except ProtocolError:
+            return bytes((OP_ERROR, ERROR_MALFORMED))
+
+        verifier = self.new_batch()
+        statuses = bytearray((OP_VERIFY_BATCH,))
+        for code, user_id in items:
+            statuses.append(_batch_status(verifier.verify(code, user_id)))
+        return bytes(statuses)
+
+    def _verify_one(self, code: str, user_id: str | None) -> int:
+        if code == "":
+            return STATUS_MISSING_CODE
+        is_valid = self.verify(code, user_id)
+        if is_valid is None:
+            return STATUS_SEED_MISSING
+        return STATUS_VALID if is_valid else STATUS_INVALID
+
+
+def _batch_status(result: dict) -> int:
+    if "valid" in result:
+        return STATUS_VALID if result["valid"] else STATUS_INVALID
+    if result.get("error") == "Missing code":
+        return STATUS_MISSING_CODE
+    return STATUS_SEED_MISSING
+
+
+class _VerifyProtocol(asyncio.Protocol):
+    def __init__(self, server: UDSVerifyServer):
+        self.server = server
+        self.transport = None
+        self.buffer = bytearray()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data: bytes):
+        buffer = self.buffer
+        buffer += data
+        out = []
+        offset = 0
+        while len(buffer) - offset >= LENGTH.size:
+            (length,) = LENGTH.unpack_from(buffer, offset)
+            if length > MAX_FRAME:
+                logger.warning("Closing verification socket connection: %d-byte frame", length)
+                self.transport.write(b"".join(out))
+                self.transport.close()
+                return
+            end = offset + LENGTH.size + length
+            if len(buffer) < end:
+                break
+            try:
+                response = self.server.handle(bytes(buffer[offset + LENGTH.size:end]))
+            except Exception:
+                logger.exception("Verification socket request failed")
+                response = bytes((OP_ERROR, ERROR_MALFORMED))
+            out.append(encode_frame(response))
+            offset = end
+        del buffer[:offset]
+        if out:
+            self.transport.write(b"".join(out))
+
+    # Stop reading from clients that pipeline faster than they read replies
+    def pause_writing(self):
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
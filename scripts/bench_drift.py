@@ -0,0 +1,146 @@
+"""
+Clock-drift tracking: correctness check and benchmark.
+
+1. With DRIFT_MAX_WINDOW=1 the tracked path must accept exactly what
+   verify_totp_code(valid_window=1) accepts (random codes + window codes).
+2. Simulates users whose clocks run 30 s behind / on time / 30 s ahead and
+   reports comparisons per verification and ns/verify, full window vs
+   drift-ordered, with the per-step code tables warm (codes already
+   computed this period) and cold (first verification of a step, e.g.
+   right after a period boundary, or more users than the caches hold).
+3. With max_window=2, a user 60 s behind is accepted once the drift is
+   learned, and nothing beyond ±2 steps is ever accepted.
+"""
+import random
+import sys
+import time
+import timeit
+from pathlib import Path
+
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.drift import DriftTracker
+from app.totp_utils import (
+    generate_totp_code,
+    get_code_table,
+    verify_totp_code,
+    verify_totp_code_at_offsets,
+)
+
+NUM_USERS = 500  # stays within the per-seed engine/code table caches
+NOW = 1_700_000_000.0
+
+
+def tracked_verify(tracker: DriftTracker, hex_seed: str, user_id: str, code: str, for_time: float):
+    """(valid, comparisons made) for the drift-ordered path, as in app/main.py."""
+    key, offsets = tracker.lookup(user_id)
+    offset = verify_totp_code_at_offsets(hex_seed, code, offsets, for_time)
+    if offset is not None:
+        tracker.record(key, offset)
+        return True, offsets.index(offset) + 1
+    return False, len(offsets)
+
+
+def check_equivalence(rng: random.Random) -> None:
+    tracker = DriftTracker(4096, valid_window=1, max_window=1)
+    mismatches = 0
+    checks = 0
+    for i in range(300):
+        hex_seed = rng.randbytes(32).hex()
+        user_id = f"user-{i}"
+        for _ in range(20):
+            t = rng.randrange(90, 4_000_000_000)
+            candidates = [generate_totp_code(hex_seed, t + 30 * o) for o in (-2, -1, 0, 1, 2)]
+            candidates.append(f"{rng.randrange(10**6):06d}")
+            for code in candidates:
+                expected = verify_totp_code(hex_seed, code, valid_window=1, for_time=t)
+                actual, _ = tracked_verify(tracker, hex_seed, user_id, code, t)
+                checks += 1
+                if actual != expected:
+                    mismatches += 1
+                    print(f"MISMATCH seed={hex_seed} t={t} code={code}: {actual} != {expected}")
+    print(f"Equivalence: {checks} verifications, {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+
+
+def simulate(rng: random.Random) -> None:
+    users = [(f"user-{i}", rng.randbytes(32).hex(), rng.choice((-1, -1, 0, 1))) for i in range(NUM_USERS)]
+    tracker = DriftTracker(65536, valid_window=1, max_window=1)
+
+    # Learning phase: a few logins per user
+    for user_id, hex_seed, drift in users:
+        for _ in range(3):
+            tracked_verify(tracker, hex_seed, user_id, generate_totp_code(hex_seed, NOW + 30 * drift), NOW)
+
+    # Pre-generate one valid code per user (clock drift applied)
+    logins = [(user_id, hex_seed, generate_totp_code(hex_seed, NOW + 30 * drift)) for user_id, hex_seed, drift in users]
+
+    tried = sum(tracked_verify(tracker, h, u, c, NOW)[1] for u, h, c in logins)
+    print(f"\n{NUM_USERS} users, drift -30s/0/+30s in ratio 2:1:1")
+    print(f"comparisons per successful verify: full window 3.00, drift-ordered {tried / len(logins):.2f}")
+
+    def full():
+        for _, hex_seed, code in logins:
+            verify_totp_code(hex_seed, code, valid_window=1, for_time=NOW)
+
+    def ordered():
+        lookup, record = tracker.lookup, tracker.record
+        for user_id, hex_seed, code in logins:
+            key, offsets = lookup(user_id)
+            offset = verify_totp_code_at_offsets(hex_seed, code, offsets, NOW)
+            if offset is not None:
+                record(key, offset)
+
+    def cold(func):
+        # Fresh code tables: every step code must be computed again
+        def run():
+            get_code_table.cache_clear()
+            func()
+        return run
+
+    for label, func in (
+        ("full window, warm", full),
+        ("drift-ordered, warm", ordered),
+        ("full window, cold", cold(full)),
+        ("drift-ordered, cold", cold(ordered)),
+    ):
+        best = min(timeit.repeat(func, number=5, repeat=5))
+        print(f"{label:<20} {best / (5 * len(logins)) * 1e9:>8.0f} ns/verify")
+
+
+def check_adaptive_window(rng: random.Random) -> None:
+    tracker = DriftTracker(1024, valid_window=1, max_window=2, adapt_confidence=3)
+    hex_seed = rng.randbytes(32).hex()
+    user = "far-behind"
+
+    def attempt(offset: int) -> bool:
+        return tracked_verify(tracker, hex_seed, user, generate_totp_code(hex_seed, NOW + 30 * offset), NOW)[0]
+
+    # Drift walks from -1 to -2: -2 only becomes acceptable once -1 is confirmed
+    assert not attempt(-2), "accepted -2 before any drift was learned"
+    for _ in range(3):
+        assert attempt(-1)
+    assert attempt(-2), "did not follow confirmed drift"
+    assert not attempt(-3) and not attempt(3), "accepted beyond max_window"
+    assert not tracker_accepts_other_user(tracker, hex_seed), "another user inherited the widened window"
+    print("\nAdaptive window: follows confirmed drift, bounded by max_window ✅")
+
+
+def tracker_accepts_other_user(tracker: DriftTracker, hex_seed: str) -> bool:
+    code = generate_totp_code(hex_seed, NOW - 60)
+    return tracked_verify(tracker, hex_seed, "someone-else", code, NOW)[0]
+
+
+def main():
+    rng = random.Random(2024)
+    started = time.perf_counter()
+    check_equivalence(rng)
+    simulate(rng)
+    check_adaptive_window(rng)
+    print(f"\nDone in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+HTTP load/benchmark harness for /generate-2fa, /verify-2fa and /decrypt-seed.
+
+Targets:
+    --target asgi    drive app.main:app in-process over ASGI (default)
+    --target spawn   start uvicorn on a local port and drive it over TCP
+    --target url     drive an already running server (--url)
+
+For asgi/spawn a fresh RSA key pair (scripts/generate_keys.py), seed file
+and seed store are created in a temp dir, so the run never touches
+data/seed.txt. For --target url, encrypted seeds are made with
+--public-key and land in the server's seed store under "bench-*" user ids.
+
+Reports throughput and p50/p95/p99 latency per endpoint and overall,
+optionally writes them to JSON (--output) and compares against an earlier
+run (--compare), exiting 1 on regressions beyond --threshold.
+
+Example:
+    python scripts/bench_http.py --concurrency 32 --duration 10 \\
+        --mix generate=5,verify=4,decrypt=1 --output bench.json
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+sys.path.append(str(PROJECT_ROOT / "scripts"))
+
+import httpx
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+
+from bench_utils import compare, latency_summary, run_metadata, write_results
+from generate_keys import generate_rsa_keypair, save_keys
+
+ENDPOINTS = ("generate", "verify", "decrypt")
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r} in mix")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def encrypt_seed(public_key, hex_seed: str) -> str:
+    ciphertext = public_key.encrypt(
+        hex_seed.encode("utf-8"),
+        padding.OAEP(
+            mgf=padding.MGF1(algorithm=hashes.SHA256()),
+            algorithm=hashes.SHA256(),
+            label=None,
+        ),
+    )
+    return base64.b64encode(ciphertext).decode("utf-8")
+
+
+class Workload:
+    """Pre-built request bodies so the client does no crypto while measuring."""
+
+    def __init__(self, hex_seed: str | None, encrypted_seeds: list[str], mix: dict[str, int]):
+        self.hex_seed = hex_seed
+        self.encrypted_seeds = encrypted_seeds
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+
+    def pick(self, rng: random.Random) -> str:
+        return rng.choices(self.names, self.weights)[0]
+
+    async def send(self, client: httpx.AsyncClient, name: str, rng: random.Random) -> httpx.Response:
+        if name == "generate":
+            return await client.get("/generate-2fa")
+        if name == "verify":
+            code = "000000"
+            if self.hex_seed and rng.random() < 0.5:
+                from app.totp_utils import generate_totp_code
+
+                code = generate_totp_code(self.hex_seed)
+            return await client.post("/verify-2fa", json={"code": code})
+        payload = {
+            "encrypted_seed": rng.choice(self.encrypted_seeds),
+            "user_id": f"bench-{rng.randrange(1000)}",
+        }
+        return await client.post("/decrypt-seed", json=payload)
+
+
+async def run_load(client: httpx.AsyncClient, workload: Workload, args) -> dict:
+    latencies = {name: [] for name in workload.names}
+    statuses = {name: {} for name in workload.names}
+    deadline = time.perf_counter() + args.duration
+    remaining = [args.requests] if args.requests else None
+
+    async def worker(worker_id: int):
+        rng = random.Random(worker_id)
+        while True:
+            if remaining is not None:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            elif time.perf_counter() >= deadline:
+                return
+            name = workload.pick(rng)
+            start = time.perf_counter()
+            try:
+                response = await workload.send(client, name, rng)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "error"
+            latencies[name].append(time.perf_counter() - start)
+            statuses[name][status] = statuses[name].get(status, 0) + 1
+
+    # Warm-up (not measured): key/seed caches, connection pool
+    for name in workload.names:
+        await workload.send(client, name, random.Random(0))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    all_latencies = []
+    for name in workload.names:
+        all_latencies.extend(latencies[name])
+        results[name] = {
+            "requests": len(latencies[name]),
+            "throughput_rps": round(len(latencies[name]) / elapsed, 1),
+            **latency_summary(latencies[name]),
+            "statuses": {str(k): v for k, v in sorted(statuses[name].items(), key=str)},
+        }
+    results["overall"] = {
+        "requests": len(all_latencies),
+        "throughput_rps": round(len(all_latencies) / elapsed, 1),
+        **latency_summary(all_latencies),
+    }
+    return results
+
+
+def prepare_local_state(workdir: Path, key_size: int, count: int):
+    """Key pair, seed file and encrypted seeds for asgi/spawn targets."""
+    print(f"Generating {key_size}-bit RSA key pair...")
+    private_key, public_key = generate_rsa_keypair(key_size)
+    save_keys(private_key, public_key, workdir)
+
+    hex_seed = os.urandom(32).hex()
+    (workdir / "seed.txt").write_text(hex_seed, encoding="utf-8")
+    encrypted = [encrypt_seed(public_key, os.urandom(32).hex()) for _ in range(count)]
+    env = {
+        "STUDENT_PRIVATE_KEY_PATH": str(workdir / "student_private.pem"),
+        "SEED_FILE_PATH": str(workdir / "seed.txt"),
+        "SEED_STORE_PATH": str(workdir / "seeds.idx"),
+    }
+    return hex_seed, encrypted, env
+
+
+async def wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(200):
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.05)
+    raise SystemExit("server did not become ready")
+
+
+async def bench_asgi(workload: Workload, args) -> dict:
+    # Imported only now: app.config reads the env prepared above
+    from app.executors import decrypt_executor
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            return await run_load(client, workload, args)
+    finally:
+        decrypt_executor.shutdown()
+
+
+async def bench_http(workload: Workload, base_url: str, args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await wait_ready(client)
+        return await run_load(client, workload, args)
+
+
+def print_table(results: dict) -> None:
+    print(f"\n{'endpoint':<10} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+    for name, r in results.items():
+        print(
+            f"{name:<10} {r['requests']:>9} {r['throughput_rps']:>9.1f} {r['p50_ms']:>9.2f} "
+            f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}  {r.get('statuses', '')}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["asgi", "spawn", "url"], default="asgi")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--port", type=int, default=8766, help="port for --target spawn")
+    parser.add_argument("--workers", type=int, default=1, help="server workers for --target spawn")
+    parser.add_argument("--launcher", choices=["uvicorn", "serve"], default="uvicorn",
+                        help="--target spawn: plain uvicorn or the preforking app.serve launcher")
+    parser.add_argument("--public-key", type=Path, default=PROJECT_ROOT / "student_public.pem",
+                        help="server public key for --target url")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds (ignored with --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="total requests instead of a duration")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("generate=5,verify=5"),
+                        help="weighted endpoint mix, e.g. generate=5,verify=4,decrypt=1")
+    parser.add_argument("--key-size", type=int, default=4096)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra server environment for asgi/spawn, e.g. --env LEAN_MODE=1")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed regression (fraction)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        if args.target == "url":
+            public_key = serialization.load_pem_public_key(args.public_key.read_bytes())
+            encrypted = [encrypt_seed(public_key, os.urandom(32).hex()) for _ in range(64)]
+            workload = Workload(None, encrypted, args.mix)
+            results = asyncio.run(bench_http(workload, args.url, args))
+        else:
+            hex_seed, encrypted, env = prepare_local_state(workdir, args.key_size, 64)
+            env.update(item.split("=", 1) for item in args.env)
+            workload = Workload(hex_seed, encrypted, args.mix)
+            if args.target == "asgi":
+                os.environ.update(env)
+                results = asyncio.run(bench_asgi(workload, args))
+            else:
+                if args.launcher == "serve":
+                    command = [sys.executable, "-m", "app.serve"]
+                    env.update(PORT=str(args.port), WEB_CONCURRENCY=str(args.workers))
+                else:
+                    command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+                               "--workers", str(args.workers), "--log-level", "warning"]
+                server = subprocess.Popen(command, cwd=PROJECT_ROOT, env=dict(os.environ, **env))
+                try:
+                    results = asyncio.run(bench_http(workload, f"http://127.0.0.1:{args.port}", args))
+                finally:
+                    server.terminate()
+                    server.wait()
+
+    print_table(results)
+
+    report = {
+        "meta": {**run_metadata(), "target": args.target, "concurrency": args.concurrency,
+                 "mix": args.mix, "duration": args.duration, "requests": args.requests, "env": args.env,
+                 "workers": args.workers, "launcher": args.launcher},
+        "results": results,
+    }
+    if args.output:
+        write_results(args.output, report)
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(
+            results,
+            baseline["results"],
+            {"throughput_rps": "higher", "p50_ms": "lower", "p99_ms": "lower"},
+            args.threshold,
+        )
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
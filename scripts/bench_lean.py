@@ -0,0 +1,63 @@
+"""
+Throughput per worker with and without LEAN_MODE.
+
+Runs scripts/bench_http.py twice against a single-worker uvicorn it
+starts (same key, mix and concurrency), once with the regular FastAPI
+endpoints and once with LEAN_MODE=1, and prints the gain per endpoint.
+
+    python scripts/bench_lean.py --duration 10 --concurrency 32
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BENCH_HTTP = Path(__file__).resolve().parent / "bench_http.py"
+
+
+def run_bench(args, output: Path, lean: bool) -> dict:
+    command = [
+        sys.executable, str(BENCH_HTTP),
+        "--target", args.target,
+        "--workers", "1",
+        "--concurrency", str(args.concurrency),
+        "--duration", str(args.duration),
+        "--mix", args.mix,
+        "--key-size", str(args.key_size),
+        "--env", f"LEAN_MODE={'1' if lean else '0'}",
+        "--output", str(output),
+    ]
+    print(f"\n=== LEAN_MODE={'1' if lean else '0'} ===", flush=True)
+    subprocess.run(command, check=True)
+    return json.loads(output.read_text(encoding="utf-8"))["results"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["spawn", "asgi"], default="spawn")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--mix", default="generate=1,verify=1")
+    parser.add_argument("--key-size", type=int, default=2048)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        regular = run_bench(args, Path(tmp) / "regular.json", lean=False)
+        lean = run_bench(args, Path(tmp) / "lean.json", lean=True)
+
+    print(f"\n{'endpoint':<10} {'regular req/s':>14} {'lean req/s':>11} {'gain':>7} {'p99 regular':>12} {'p99 lean':>9}")
+    for name, base in regular.items():
+        new = lean.get(name)
+        if not new:
+            continue
+        gain = new["throughput_rps"] / base["throughput_rps"] if base["throughput_rps"] else 0.0
+        print(
+            f"{name:<10} {base['throughput_rps']:>14.1f} {new['throughput_rps']:>11.1f} {gain:>6.2f}x "
+            f"{base['p99_ms']:>10.2f}ms {new['p99_ms']:>7.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
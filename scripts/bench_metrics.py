@@ -0,0 +1,75 @@
+"""
+Per-request cost of the metrics instrumentation.
+
+Measures:
+    - one histogram observation and one counter increment
+    - one stage timer (`with stage(...).time():`) around an empty block
+    - MetricsMiddleware around a trivial ASGI app vs. the bare app,
+      i.e. the overhead added to every HTTP request
+"""
+import asyncio
+import sys
+import time
+import timeit
+from pathlib import Path
+
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.metrics import Counter, Histogram, MetricsMiddleware, stage
+
+NUMBER = 200000
+REQUESTS = 50000
+
+
+def bench(label: str, func, number: int = NUMBER) -> float:
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    ns_per_op = best / number * 1e9
+    print(f"{label:<40} {ns_per_op:>8.0f} ns/op")
+    return ns_per_op
+
+
+async def plain_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def drive(app, n: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    histogram = Histogram("bench_seconds", "bench").labels()
+    counter = Counter("bench_total", "bench").labels()
+    timer = stage("bench")
+
+    def timed_block():
+        with timer.time():
+            pass
+
+    print(f"{NUMBER} ops x 5 repeats, best run\n")
+    bench("Histogram.observe", lambda: histogram.observe(0.0012))
+    bench("Counter.inc", counter.inc)
+    bench("stage timer (empty block)", timed_block)
+
+    bare = min(asyncio.run(drive(plain_app, REQUESTS)) for _ in range(3))
+    wrapped = min(asyncio.run(drive(MetricsMiddleware(plain_app), REQUESTS)) for _ in range(3))
+    overhead_ns = (wrapped - bare) / REQUESTS * 1e9
+    print(f"\n{'ASGI request, bare app':<40} {bare / REQUESTS * 1e9:>8.0f} ns/req")
+    print(f"{'ASGI request, with MetricsMiddleware':<40} {wrapped / REQUESTS * 1e9:>8.0f} ns/req")
+    print(f"{'middleware overhead':<40} {overhead_ns:>8.0f} ns/req")
+
+
+if __name__ == "__main__":
+    main()
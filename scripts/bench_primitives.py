@@ -0,0 +1,189 @@
+"""
+Microbenchmarks for the crypto and TOTP primitives.
+
+Each benchmark reports ns/op (best of --repeat runs, each sized to take at
+least --min-time seconds) and the Python heap memory one call allocates
+(peak bytes, and bytes still held afterwards, via tracemalloc; memory
+allocated inside OpenSSL is not visible to tracemalloc).
+
+    python scripts/bench_primitives.py                    # print results
+    python scripts/bench_primitives.py --save-baseline    # write the baseline file
+    python scripts/bench_primitives.py --compare          # exit 1 on regressions (ns/op, peak B/op)
+
+The baseline (scripts/bench_primitives_baseline.json by default) is only
+meaningful on the machine that produced it: regenerate it on the host you
+compare on before judging a change. On shared or throttled hosts, raise
+--repeat (and --threshold) until two baseline runs agree with each other.
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+sys.path.append(str(PROJECT_ROOT / "scripts"))
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+
+from app.crypto_utils import decrypt_seed, load_private_key
+from app.totp_utils import (
+    _hex_to_base32,
+    generate_totp_code,
+    get_code_table,
+    get_totp_engine,
+    verify_totp_code,
+)
+from bench_utils import compare, run_metadata, write_results
+from commit_proof import sign_message
+from generate_keys import generate_rsa_keypair
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "bench_primitives_baseline.json"
+HEX_SEED = "a3dabb1f4264e0b09b2013f5b96b238dd693ba3532b24c58944dba0cec67dd75"
+COMMIT_HASH = "0123456789abcdef0123456789abcdef01234567"
+VERIFY_WINDOWS = (0, 1, 2, 5, 10)
+
+
+def build_benchmarks(workdir: Path, key_size: int) -> dict:
+    """name -> zero-argument callable"""
+    private_key, public_key = generate_rsa_keypair(key_size)
+    key_path = workdir / "private.pem"
+    key_path.write_bytes(
+        private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+    )
+    encrypted = base64.b64encode(
+        public_key.encrypt(
+            HEX_SEED.encode("utf-8"),
+            padding.OAEP(
+                mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                algorithm=hashes.SHA256(),
+                label=None,
+            ),
+        )
+    ).decode("utf-8")
+    bad_base64 = encrypted[:-4] + "!!!!"
+
+    def generate_cold():
+        # First code for a seed: decode it, build the keyed HMAC state (both
+        # in the engine) and a fresh code table, then compute the code
+        get_code_table.cache_clear()
+        get_totp_engine.cache_clear()
+        return generate_totp_code(HEX_SEED)
+
+    benchmarks = {
+        f"load_private_key[{key_size}]": lambda: load_private_key(key_path),
+        f"decrypt_seed[{key_size}]": lambda: decrypt_seed(encrypted, private_key),
+        "decrypt_seed[bad_base64]": lambda: _expect_value_error(decrypt_seed, bad_base64, private_key),
+        "_hex_to_base32": lambda: _hex_to_base32(HEX_SEED),
+        "generate_totp_code": lambda: generate_totp_code(HEX_SEED),
+        "generate_totp_code[cold]": generate_cold,
+    }
+    for window in VERIFY_WINDOWS:
+        benchmarks[f"verify_totp_code[w={window}]"] = (
+            lambda window=window: verify_totp_code(HEX_SEED, "000000", valid_window=window)
+        )
+    benchmarks[f"sign_message[{key_size}]"] = lambda: sign_message(COMMIT_HASH, private_key)
+    return benchmarks
+
+
+def _expect_value_error(func, *args):
+    try:
+        func(*args)
+    except ValueError:
+        return
+    raise AssertionError(f"{func.__name__} accepted invalid input")
+
+
+def time_per_op(func, min_time: float, repeat: int) -> float:
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number * 1e9
+
+
+def allocations_per_op(func, calls: int = 20) -> tuple[int, int]:
+    """(peak bytes, retained bytes) per call, averaged over `calls` calls."""
+    func()  # warm caches so one-off setup is not attributed to every call
+    peak_total = 0
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - current
+        end, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak_total // calls, max(0, end - start) // calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--key-size", type=int, default=4096)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing run")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="comma-separated substrings; run matching benchmarks only")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write results to --baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against --baseline")
+    parser.add_argument("--threshold", type=float, default=0.30, help="allowed regression (fraction)")
+    parser.add_argument("--output", type=Path, help="also write results JSON here")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Generating {args.key_size}-bit RSA key pair...")
+        benchmarks = build_benchmarks(Path(tmp), args.key_size)
+        if args.only:
+            wanted = args.only.split(",")
+            benchmarks = {k: v for k, v in benchmarks.items() if any(w in k for w in wanted)}
+
+        results = {}
+        print(f"\n{'benchmark':<30} {'ns/op':>14} {'peak B/op':>10} {'kept B/op':>10}")
+        for name, func in benchmarks.items():
+            ns = time_per_op(func, args.min_time, args.repeat)
+            peak, retained = allocations_per_op(func)
+            results[name] = {"ns_per_op": round(ns, 1), "peak_bytes": peak, "retained_bytes": retained}
+            print(f"{name:<30} {ns:>14,.0f} {peak:>10} {retained:>10}")
+
+    report = {
+        "meta": {**run_metadata(), "key_size": args.key_size, "cpu_count": os.cpu_count()},
+        "results": results,
+    }
+    if args.output:
+        write_results(args.output, report)
+    if args.save_baseline:
+        write_results(args.baseline, report)
+
+    if args.compare:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(
+            results,
+            baseline["results"],
+            {"ns_per_op": "lower", "peak_bytes": "lower"},
+            args.threshold,
+        )
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%} vs {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
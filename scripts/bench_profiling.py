@@ -0,0 +1,172 @@
+"""
+Cost of the profiling surface (app/profiling.py), off and on.
+
+1. One stage timer as stage() returns it without slow request capture
+   (the plain histogram series) and with it (also recorded per request).
+2. SlowRequestMiddleware around a trivial ASGI app vs. the bare app.
+3. POST /verify-2fa driven in-process over ASGI for --duration seconds in
+   fresh interpreters: with everything off (the default), with
+   SLOW_REQUEST_MS set (above every request, so only the bookkeeping is
+   paid), and while a "cpu" profile samples every --interval-ms.
+
+    python scripts/bench_profiling.py --duration 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(PROJECT_ROOT))
+
+NUMBER = 200000
+REQUESTS = 50000
+
+
+def bench(label: str, func, number: int = NUMBER) -> float:
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    ns_per_op = best / number * 1e9
+    print(f"{label:<44} {ns_per_op:>8.0f} ns/op")
+    return ns_per_op
+
+
+async def plain_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def drive(app, n: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def bench_parts() -> None:
+    from app.metrics import STAGE_LATENCY, _TracedStage, request_stages
+    from app.profiling import SlowRequestLog, SlowRequestMiddleware
+
+    plain = STAGE_LATENCY.labels("bench")
+    traced = _TracedStage("bench", plain)
+
+    def timed(timer):
+        def block():
+            with timer.time():
+                pass
+        return block
+
+    print(f"{NUMBER} ops x 5 repeats, best run\n")
+    bench("stage timer, capture off", timed(plain))
+    bench("stage timer, capture on, outside a request", timed(traced))
+    request_stages.set([])
+    bench("stage timer, capture on, inside a request", timed(traced))
+
+    bare = min(asyncio.run(drive(plain_app, REQUESTS)) for _ in range(3))
+    middleware = SlowRequestMiddleware(plain_app, threshold=3600.0, log=SlowRequestLog(16))
+    wrapped = min(asyncio.run(drive(middleware, REQUESTS)) for _ in range(3))
+    print(f"\n{'ASGI request, bare app':<44} {bare / REQUESTS * 1e9:>8.0f} ns/req")
+    print(f"{'ASGI request, with SlowRequestMiddleware':<44} {wrapped / REQUESTS * 1e9:>8.0f} ns/req")
+    print(f"{'middleware overhead':<44} {(wrapped - bare) / REQUESTS * 1e9:>8.0f} ns/req")
+
+
+async def _drive_verify(duration: float, interval_ms: float | None) -> dict:
+    import httpx
+
+    from app.main import app
+    from app.profiling import profiler
+    from app.totp_utils import generate_totp_code
+
+    seed = Path(os.environ["SEED_FILE_PATH"]).read_text().strip()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app), base_url="http://x")
+    for _ in range(200):  # warm up
+        await client.post("/verify-2fa", json={"code": generate_totp_code(seed)})
+
+    result = {}
+    if interval_ms is not None:
+        profiler.start(interval_ms / 1000, "cpu")
+
+    requests = 0
+    cpu = time.process_time()
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        response = await client.post("/verify-2fa", json={"code": generate_totp_code(seed)})
+        assert response.status_code == 200
+        requests += 1
+    elapsed = time.perf_counter() - start
+    result.update(requests_per_second=requests / elapsed, cpu_us=(time.process_time() - cpu) / requests * 1e6)
+    if interval_ms is not None:
+        lines, result["samples"] = profiler.stop()
+        result["stacks"] = len(lines)
+    return result
+
+
+def run_child(args, env_overrides: dict, interval_ms: float | None) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        seed_path = Path(tmp) / "seed.txt"
+        seed_path.write_text(os.urandom(32).hex(), encoding="utf-8")
+        env = dict(
+            os.environ,
+            SEED_FILE_PATH=str(seed_path),
+            SEED_STORE_PATH=str(Path(tmp) / "seeds.idx"),
+            JOBS_DIR=str(Path(tmp) / "jobs"),
+            PROFILING_ENABLED="0",
+            SLOW_REQUEST_MS="0",
+        )
+        env.update(env_overrides)
+        command = [sys.executable, __file__, "--child", "--duration", str(args.duration)]
+        if interval_ms is not None:
+            command += ["--interval-ms", str(interval_ms)]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def bench_app(args) -> None:
+    print(f"\nPOST /verify-2fa over ASGI, {args.duration:.0f}s per run, best of {args.runs}")
+    print(f"{'':<40} {'req/s':>8} {'CPU us/req':>11}")
+    variants = [
+        ("everything off (default)", {}, None),
+        ("SLOW_REQUEST_MS=60000", {"SLOW_REQUEST_MS": "60000"}, None),
+        (f"profile running, {args.interval_ms:g} ms interval", {}, args.interval_ms),
+    ]
+    for label, env, interval_ms in variants:
+        runs = [run_child(args, env, interval_ms) for _ in range(args.runs)]
+        best = max(runs, key=lambda r: r["requests_per_second"])
+        extra = f"  ({best['samples']} samples, {best['stacks']} stacks)" if "samples" in best else ""
+        print(f"{label:<40} {best['requests_per_second']:>8,.0f} {best['cpu_us']:>11.0f}{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--interval-ms", type=float, default=10.0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        interval = args.interval_ms if "--interval-ms" in sys.argv else None
+        print(json.dumps(asyncio.run(_drive_verify(args.duration, interval))))
+        return
+
+    bench_parts()
+    bench_app(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Rate limiter: per-check cost, limits across processes, and attack-style load.
+
+1. ns per RateLimiter.check() for allowed attempts (100k distinct clients)
+   and refused ones (one exhausted client).
+2. --processes forked processes hammer one key: the total allowed must be
+   burst + rate * elapsed, not that times the number of processes.
+3. Attack: an attacker IP floods POST /verify-2fa with random codes for
+   one user (--concurrency tasks) while a legitimate client on another IP
+   verifies its own valid code every 1.5 s. Run in-process over ASGI with
+   RATE_LIMIT=0 and =1, each in a fresh interpreter; prints what reached
+   TOTP verification, latency and CPU per attacker request.
+
+    python scripts/bench_rate_limit.py --duration 5
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(PROJECT_ROOT))
+
+
+def bench_checks() -> None:
+    from app.rate_limit import RateLimiter
+
+    limiter = RateLimiter(65536, rate=1.0, burst=1e9, keys=("ip", "user"))
+    clients = [(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}", f"user-{i}") for i in range(100_000)]
+    start = time.perf_counter()
+    for ip, user in clients:
+        limiter.check(ip, user)
+    allowed = (time.perf_counter() - start) / len(clients)
+
+    limiter = RateLimiter(65536, rate=0.001, burst=1, keys=("ip", "user"))
+    limiter.check("10.0.0.1", "victim")
+    start = time.perf_counter()
+    for _ in range(100_000):
+        limiter.check("10.0.0.1", "victim")
+    refused = (time.perf_counter() - start) / 100_000
+    print(f"check(ip, user): allowed {allowed * 1e9:.0f} ns, refused {refused * 1e9:.0f} ns")
+
+
+def _hammer(limiter, seconds: float, results) -> None:
+    allowed = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if not limiter.acquire("ip:203.0.113.7"):
+            allowed += 1
+    results.put(allowed)
+
+
+def check_shared(processes: int) -> None:
+    from app.rate_limit import RateLimiter
+
+    rate, burst, seconds = 20.0, 50.0, 1.0
+    limiter = RateLimiter(1024, rate=rate, burst=burst, keys=("ip",))
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [context.Process(target=_hammer, args=(limiter, seconds, results)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    total = sum(results.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+    expected = burst + rate * seconds
+    print(f"{processes} processes, one key, {seconds:.0f}s: {total} allowed (limit {expected:.0f})")
+    if total > expected + rate * 0.2:
+        raise SystemExit("limit not shared across processes")
+
+
+async def _attack(duration: float, concurrency: int) -> dict:
+    import httpx
+
+    from app.main import app, seed_store
+    from app.totp_utils import generate_totp_code
+
+    seed_store.put("victim", os.urandom(32))
+    alice_seed = os.urandom(32)
+    seed_store.put("alice", alice_seed)
+
+    attacker = httpx.AsyncClient(transport=httpx.ASGITransport(app, client=("203.0.113.7", 4321)), base_url="http://x")
+    legit = httpx.AsyncClient(transport=httpx.ASGITransport(app, client=("198.51.100.2", 4321)), base_url="http://x")
+    stats = {"attack_requests": 0, "verified": 0, "limited": 0, "ok_seconds": 0.0, "limited_seconds": 0.0}
+    legit_stats = {"attempts": 0, "accepted": 0}
+    deadline = time.perf_counter() + duration
+    rng = random.Random(1)
+
+    async def attack_loop():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await attacker.post("/verify-2fa", json={"code": f"{rng.randrange(10**6):06d}", "user_id": "victim"})
+            elapsed = time.perf_counter() - start
+            stats["attack_requests"] += 1
+            if response.status_code == 429:
+                stats["limited"] += 1
+                stats["limited_seconds"] += elapsed
+            else:
+                stats["verified"] += 1
+                stats["ok_seconds"] += elapsed
+
+    async def legit_loop():
+        while time.perf_counter() < deadline:
+            response = await legit.post(
+                "/verify-2fa", json={"code": generate_totp_code(alice_seed.hex()), "user_id": "alice"}
+            )
+            legit_stats["attempts"] += 1
+            legit_stats["accepted"] += response.status_code == 200 and response.json()["valid"]
+            await asyncio.sleep(1.5)
+
+    cpu = time.process_time()
+    await asyncio.gather(legit_loop(), *(attack_loop() for _ in range(concurrency)))
+    stats["cpu_seconds"] = time.process_time() - cpu
+    stats.update({f"legit_{k}": v for k, v in legit_stats.items()})
+    return stats
+
+
+def run_attack(args, rate_limit: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            SEED_FILE_PATH=str(Path(tmp) / "seed.txt"),
+            SEED_STORE_PATH=str(Path(tmp) / "seeds.idx"),
+            RATE_LIMIT="1" if rate_limit else "0",
+            # One attempt per second per key, 10 up front: legitimate users
+            # retry a handful of times at most
+            RATE_LIMIT_RATE="1",
+            RATE_LIMIT_BURST="10",
+        )
+        command = [
+            sys.executable, __file__, "--attack-child",
+            "--duration", str(args.duration), "--concurrency", str(args.concurrency),
+        ]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def report_attack(args) -> None:
+    print(f"\nAttack: {args.concurrency} concurrent attacker requests for {args.duration:.0f}s, one victim user")
+    print(
+        f"{'RATE_LIMIT':<11} {'attacker req/s':>15} {'reached verify':>15} {'429':>8} "
+        f"{'ms/200':>7} {'ms/429':>7} {'CPU us/req':>11} {'legit ok':>9}"
+    )
+    for rate_limit in (False, True):
+        s = run_attack(args, rate_limit)
+        requests = s["attack_requests"]
+        ms_ok = s["ok_seconds"] / s["verified"] * 1e3 if s["verified"] else 0.0
+        ms_limited = s["limited_seconds"] / s["limited"] * 1e3 if s["limited"] else 0.0
+        print(
+            f"{'1' if rate_limit else '0':<11} {requests / args.duration:>15,.0f} {s['verified']:>15,} "
+            f"{s['limited']:>8,} {ms_ok:>7.2f} {ms_limited:>7.2f} "
+            f"{s['cpu_seconds'] / max(1, requests) * 1e6:>11.0f} {s['legit_accepted']:>4}/{s['legit_attempts']:<4}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--attack-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.attack_child:
+        print(json.dumps(asyncio.run(_attack(args.duration, args.concurrency))))
+        return
+
+    bench_checks()
+    check_shared(args.processes)
+    report_attack(args)
+
+
+if __name__ == "__main__":
+    main()
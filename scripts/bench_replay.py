@@ -0,0 +1,115 @@
+"""
+Replay cache: correctness checks and a constant-memory benchmark.
+
+1. A code is accepted once per (user, step); other users and other steps
+   are unaffected; a full bucket follows its policy; buckets are reused
+   correctly across many epochs (including the epoch wrap).
+2. Sustained load: --steps time steps of --per-step accepted codes each
+   (random users and codes), claimed against ReplayCache and against a
+   naive set of every code ever accepted. Prints resident memory growth
+   as the run progresses, and ns per claim.
+
+    python scripts/bench_replay.py --steps 400 --per-step 5000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.replay_cache import ReplayCache
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * 4096
+
+
+def check_correctness() -> None:
+    cache = ReplayCache(64, window=1, full_policy="reject")
+    assert cache.claim("alice", "123456", 100)
+    assert not cache.claim("alice", "123456", 100), "replay accepted"
+    assert cache.claim("bob", "123456", 100), "other user refused"
+    assert cache.claim("alice", "123456", 101), "other step refused"
+    assert cache.claim(None, "123456", 100), "single-seed user refused"
+    assert not cache.claim("alice", "１２３４５６", 100), "fullwidth replay accepted"
+
+    # Step 104 reuses step 100's ring position: 100 has left the window
+    assert cache.claim("alice", "123456", 104)
+    assert not cache.claim("alice", "123456", 100), "expired step accepted"
+
+    # 64 entries over 4 buckets = 16 per step
+    for policy, expected in (("reject", False), ("allow", True)):
+        full = ReplayCache(64, window=1, full_policy=policy)
+        for i in range(16):
+            assert full.claim(f"user-{i}", "000001", 7)
+        assert full.claim("one-more", "000001", 7) is expected, policy
+        assert not full.claim("user-3", "000001", 7), "replay accepted when full"
+        assert full.full == 1
+
+    # Same user and code every step for longer than an epoch wrap
+    cache = ReplayCache(64, window=1)
+    for step in range(1000, 1000 + 4 * 2048 + 50):
+        assert cache.claim("alice", "654321", step), f"false replay at step {step}"
+        assert not cache.claim("alice", "654321", step)
+    print("Correctness: replays refused, buckets dropped and reused, full policies ✅")
+
+
+def sustained(steps: int, per_step: int, max_entries: int) -> None:
+    rng = random.Random(7)
+    users = [f"user-{i}" for i in range(100_000)]
+    # Pre-generated so the timed loop only claims
+    batches = [[(rng.choice(users), f"{rng.randrange(10**6):06d}") for _ in range(per_step)] for _ in range(8)]
+
+    def run(label: str, claim) -> None:
+        base_rss = rss_bytes()
+        claims = 0
+        elapsed = 0.0
+        print(f"\n{label}")
+        print(f"{'step':>6} {'codes claimed':>14} {'RSS +MiB':>9}")
+        for i in range(steps):
+            step = 50_000_000 + i
+            batch = batches[i % len(batches)]
+            start = time.perf_counter()
+            for user, code in batch:
+                claim(user, code, step)
+            elapsed += time.perf_counter() - start
+            claims += len(batch)
+            if (i + 1) % max(1, steps // 8) == 0:
+                print(f"{i + 1:>6} {claims:>14,} {(rss_bytes() - base_rss) / 2**20:>9.1f}")
+        print(f"{elapsed / claims * 1e9:.0f} ns/claim")
+
+    # The cache runs first, so the naive set's growth is not hidden by
+    # memory freed earlier in the process
+    cache = ReplayCache(max_entries, window=1)
+    run(f"ReplayCache (max {cache.max_entries:,} entries, {cache.nbytes / 2**20:.1f} MiB fixed)", cache.claim)
+    print(f"refused as full: {cache.full:,}")
+
+    seen = set()
+
+    def naive(user, code, step):
+        key = (user, code, step)
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+
+    run("Naive set of every accepted code", naive)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=400, help="time steps to simulate")
+    parser.add_argument("--per-step", type=int, default=5000, help="accepted codes per step")
+    parser.add_argument("--max-entries", type=int, default=262144)
+    args = parser.parse_args()
+
+    check_correctness()
+    sustained(args.steps, args.per_step, args.max_entries)
+
+
+if __name__ == "__main__":
+    main()
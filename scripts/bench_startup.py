@@ -0,0 +1,224 @@
+"""
+Startup cost: what each entry point imports, and how long until the API
+answers its first request.
+
+1. `python -X importtime` of `import app.main` (the API) and of
+   scripts/log_2fa_cron.py (run by cron every minute), grouped by
+   top-level package. Fails if an entry point imports a heavy package it
+   does not use: cryptography is only for the decrypt paths, and the cron
+   path needs none of fastapi / pydantic / starlette / cryptography / pyotp.
+2. Wall time of one cron invocation.
+3. Time to first successful request: `python -m app.serve` (one worker)
+   is started with a fresh key pair and seed file and GET /generate-2fa is
+   polled until it answers 200. Key, seed and decrypt workers are warmed
+   up before the socket accepts.
+4. Latency of the first POST /decrypt-seed after that, and of the next
+   one: the first must not pay for starting a decrypt worker.
+
+Each measurement is the median of --runs fresh interpreters. Exits 1 when
+a median is over its budget (--budget-ms, --cron-budget-ms,
+--decrypt-budget-ms), so the script can gate CI:
+
+    python scripts/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT / "scripts"))
+CRON_SCRIPT = PROJECT_ROOT / "scripts" / "log_2fa_cron.py"
+
+# Packages an entry point must not import at all
+FORBIDDEN = {
+    "app.main": {"cryptography", "pyotp"},
+    "cron": {"fastapi", "pydantic", "starlette", "cryptography", "pyotp"},
+}
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def import_profile(command: list[str], env: dict) -> dict[str, tuple[int, str]]:
+    """
+    Run `command` under -X importtime. Returns module -> (self time in us,
+    the top-level import that pulled it in).
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", *command], env=env, cwd=PROJECT_ROOT,
+        capture_output=True, text=True, check=True,
+    ).stderr
+    modules = {}
+    pending = []  # (depth, name, self us) not yet attributed to a root import
+    for line in stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        depth, name = len(match.group(3)) // 2, match.group(4)
+        pending.append((depth, name, int(match.group(1))))
+        if depth == 0:  # children are printed before their parent
+            for _, child, self_us in pending:
+                modules[child] = (self_us, name)
+            pending = []
+    return modules
+
+
+def by_package(modules: dict[str, tuple[int, str]]) -> dict[str, int]:
+    """
+    Self time summed per top-level package (app.* modules kept apart);
+    whatever site imports at interpreter startup is counted as "site".
+    """
+    totals = defaultdict(int)
+    for name, (self_us, root) in modules.items():
+        if root == "site":
+            totals["site"] += self_us
+        else:
+            totals[name if name.startswith("app.") else name.partition(".")[0]] += self_us
+    return dict(totals)
+
+
+def report_imports(label: str, command: list[str], env: dict, top: int) -> list[str]:
+    modules = import_profile(command, env)
+    packages = sorted(by_package(modules).items(), key=lambda item: -item[1])
+    total = sum(self_us for self_us, _ in modules.values())
+    print(f"\n{label}: {len(modules)} modules, {total / 1000:.1f} ms import time")
+    for name, self_us in packages[:top]:
+        print(f"  {name:<32} {self_us / 1000:>8.1f} ms  {100 * self_us / total:>5.1f}%")
+
+    imported = {name.partition(".")[0] for name in modules}
+    violations = [f"{label} imports {name}" for name in sorted(FORBIDDEN[label] & imported)]
+    for violation in violations:
+        print(f"  FAIL: {violation}")
+    return violations
+
+
+def time_cron(env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, str(CRON_SCRIPT)], env=env, cwd=PROJECT_ROOT, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _time_decrypt(base_url: str, encrypted_seed: str, timeout: float) -> float:
+    request = urllib.request.Request(
+        f"{base_url}/decrypt-seed",
+        data=json.dumps({"encrypted_seed": encrypted_seed, "user_id": "bench"}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        if response.status != 200:
+            raise RuntimeError(f"/decrypt-seed answered {response.status}")
+    return time.perf_counter() - start
+
+
+def time_first_requests(env: dict, encrypted_seeds: list[str], timeout: float) -> tuple[float, float, float]:
+    """
+    Seconds from spawning app.serve to the first 200 from /generate-2fa,
+    then the latency of the first and of the second /decrypt-seed.
+    """
+    port = _free_port()
+    env = dict(env, HOST="127.0.0.1", PORT=str(port), WEB_CONCURRENCY="1")
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.serve"], env=env, cwd=PROJECT_ROOT,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"no successful request within {timeout:.0f}s")
+            try:
+                with urllib.request.urlopen(f"{base_url}/generate-2fa", timeout=timeout) as response:
+                    if response.status == 200:
+                        first = time.perf_counter() - start
+                        break
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise RuntimeError(f"app.serve exited with {server.returncode}")
+            time.sleep(0.005)
+        return (
+            first,
+            _time_decrypt(base_url, encrypted_seeds[0], timeout),
+            _time_decrypt(base_url, encrypted_seeds[1], timeout),
+        )
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="packages listed per entry point")
+    parser.add_argument("--budget-ms", type=float, default=1500.0,
+                        help="max median time to first successful request (0 = no limit)")
+    parser.add_argument("--cron-budget-ms", type=float, default=150.0,
+                        help="max median cron invocation time (0 = no limit)")
+    parser.add_argument("--decrypt-budget-ms", type=float, default=250.0,
+                        help="max median latency of the first /decrypt-seed (0 = no limit)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    from bench_http import encrypt_seed
+    from generate_keys import generate_rsa_keypair, save_keys
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        print("Generating 4096-bit RSA key pair...")
+        _, public_key = keys = generate_rsa_keypair(4096)
+        save_keys(*keys, workdir)
+        encrypted_seeds = [encrypt_seed(public_key, os.urandom(32).hex()) for _ in range(2)]
+        seed_path = workdir / "seed.txt"
+        seed_path.write_text(os.urandom(32).hex(), encoding="utf-8")
+        env = dict(
+            os.environ,
+            PYTHONPATH=str(PROJECT_ROOT),
+            STUDENT_PRIVATE_KEY_PATH=str(workdir / "student_private.pem"),
+            SEED_FILE_PATH=str(seed_path),
+            SEED_STORE_PATH=str(workdir / "seeds.idx"),
+            JOBS_DIR=str(workdir / "jobs"),
+            CODE_LOG_PATH=str(workdir / "last_code.txt"),
+        )
+
+        failures = report_imports("app.main", ["-c", "import app.main"], env, args.top)
+        failures += report_imports("cron", [str(CRON_SCRIPT)], env, args.top)
+
+        cron = statistics.median(time_cron(env) for _ in range(args.runs)) * 1000
+        runs = [time_first_requests(env, encrypted_seeds, args.timeout) for _ in range(args.runs)]
+        first, first_decrypt, next_decrypt = ([run[i] * 1000 for run in runs] for i in range(3))
+        print(f"\ncron invocation:              median {cron:7.1f} ms")
+        print(f"time to first /generate-2fa:  median {statistics.median(first):7.1f} ms, max {max(first):.1f} ms")
+        print(f"first /decrypt-seed:          median {statistics.median(first_decrypt):7.1f} ms, "
+              f"max {max(first_decrypt):.1f} ms")
+        print(f"second /decrypt-seed:         median {statistics.median(next_decrypt):7.1f} ms")
+
+    budgets = [
+        ("cron", cron, args.cron_budget_ms),
+        ("first request", statistics.median(first), args.budget_ms),
+        ("first decrypt", statistics.median(first_decrypt), args.decrypt_budget_ms),
+    ]
+    for label, median, budget in budgets:
+        if budget and median > budget:
+            failures.append(f"{label} {median:.0f} ms > {budget:.0f} ms")
+    if failures:
+        raise SystemExit(f"FAIL: {'; '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import sys
+import timeit
+from pathlib import Path
+
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import pyotp
+
+from app.totp_utils import _hex_to_base32, generate_totp_code, verify_totp_code
+
+HEX_SEED = "a3dabb1f4264e0b09b2013f5b96b238dd693ba3532b24c58944dba0cec67dd75"
+NUMBER = 20000
+
+
+def pyotp_generate(hex_seed: str) -> str:
+    """The original implementation: hex -> base32 -> new pyotp.TOTP per call."""
+    return pyotp.TOTP(_hex_to_base32(hex_seed), interval=30, digits=6).now()
+
+
+def pyotp_verify(hex_seed: str, code: str) -> bool:
+    totp = pyotp.TOTP(_hex_to_base32(hex_seed), interval=30, digits=6)
+    return totp.verify(code, valid_window=1)
+
+
+def bench(label: str, func) -> float:
+    best = min(timeit.repeat(func, number=NUMBER, repeat=5))
+    ns_per_op = best / NUMBER * 1e9
+    print(f"{label:<32} {ns_per_op:>10.0f} ns/op")
+    return ns_per_op
+
+
+def main():
+    code = generate_totp_code(HEX_SEED)
+
+    print(f"{NUMBER} calls x 5 repeats, best run\n")
+    old_gen = bench("generate (pyotp)", lambda: pyotp_generate(HEX_SEED))
+    new_gen = bench("generate (native)", lambda: generate_totp_code(HEX_SEED))
+    old_ver = bench("verify w=1 (pyotp)", lambda: pyotp_verify(HEX_SEED, "000000"))
+    new_ver = bench("verify w=1 (native)", lambda: verify_totp_code(HEX_SEED, "000000"))
+    bench("verify w=1 hit (native)", lambda: verify_totp_code(HEX_SEED, code))
+
+    print(f"\ngenerate speedup: {old_gen / new_gen:.1f}x")
+    print(f"verify speedup:   {old_ver / new_ver:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Verification over the Unix socket protocol vs HTTP /verify-2fa.
+
+Starts `python -m app.serve` (one worker by default) on a throwaway seed
+with UDS_PATH set, checks that both listeners give the same outcomes for
+valid / invalid / missing-seed / missing-code requests, then measures
+verifications per second over one connection each:
+
+    http          POST /verify-2fa, keep-alive, one request at a time
+    uds           OP_VERIFY, one request at a time
+    uds pipelined --depth OP_VERIFY frames per round trip
+    uds batch     one OP_VERIFY_BATCH of --batch items per round trip
+
+    python scripts/bench_uds.py --duration 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+sys.path.append(str(PROJECT_ROOT / "scripts"))
+
+import httpx
+
+from app.totp_utils import generate_totp_code
+from app.uds_client import VerifyClient
+from app.uds_protocol import (
+    STATUS_INVALID,
+    STATUS_MISSING_CODE,
+    STATUS_NAMES,
+    STATUS_SEED_MISSING,
+    STATUS_VALID,
+)
+from bench_utils import latency_summary
+
+
+def http_status(response: httpx.Response) -> int:
+    body = response.json()
+    if response.status_code == 200:
+        return STATUS_VALID if body["valid"] else STATUS_INVALID
+    if response.status_code == 400:
+        return STATUS_MISSING_CODE
+    return STATUS_SEED_MISSING
+
+
+def check_outcomes(http: httpx.Client, uds: VerifyClient, hex_seed: str) -> None:
+    cases = [
+        (generate_totp_code(hex_seed), None),
+        ("000000", None),
+        ("", None),
+        (generate_totp_code(hex_seed), "no-such-tenant"),
+    ]
+    batch = uds.verify_batch(cases)
+    for (code, tenant), batch_status in zip(cases, batch):
+        body = {"code": code} if tenant is None else {"code": code, "user_id": tenant}
+        expected = http_status(http.post("/verify-2fa", json=body))
+        single = uds.verify(code, tenant)
+        names = [STATUS_NAMES[s] for s in (expected, single, batch_status)]
+        print(f"  code={code!r:10} tenant={tenant!r:18} http/uds/batch: {' / '.join(names)}")
+        if not expected == single == batch_status:
+            raise SystemExit("UDS outcome differs from HTTP")
+
+
+def measure(label: str, call, per_call: int, duration: float) -> None:
+    latencies = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    elapsed = time.perf_counter() - started
+    summary = latency_summary(latencies)
+    print(
+        f"{label:<16} {len(latencies) * per_call / elapsed:>12,.0f} verifications/s   "
+        f"per round trip p50 {summary['p50_ms']:.3f} ms  p99 {summary['p99_ms']:.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--depth", type=int, default=64, help="pipelined requests per round trip")
+    parser.add_argument("--batch", type=int, default=100, help="items per OP_VERIFY_BATCH")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        hex_seed = os.urandom(32).hex()
+        (workdir / "seed.txt").write_text(hex_seed, encoding="utf-8")
+        uds_path = workdir / "verify.sock"
+        env = dict(
+            os.environ,
+            SEED_FILE_PATH=str(workdir / "seed.txt"),
+            SEED_STORE_PATH=str(workdir / "seeds.idx"),
+            UDS_PATH=str(uds_path),
+            PORT=str(args.port),
+            WEB_CONCURRENCY=str(args.workers),
+        )
+        server = subprocess.Popen([sys.executable, "-m", "app.serve"], cwd=PROJECT_ROOT, env=env)
+        try:
+            for _ in range(200):
+                if uds_path.exists():
+                    try:
+                        httpx.get(f"http://127.0.0.1:{args.port}/health").raise_for_status()
+                        break
+                    except httpx.TransportError:
+                        pass
+                time.sleep(0.05)
+            else:
+                raise SystemExit("server did not start")
+
+            with httpx.Client(base_url=f"http://127.0.0.1:{args.port}") as http, VerifyClient(uds_path) as uds:
+                print("Outcome check:")
+                check_outcomes(http, uds, hex_seed)
+
+                code = generate_totp_code(hex_seed)
+                pipelined = [(code, None)] * args.depth
+                batch = [(code, None)] * args.batch
+
+                print(f"\n{args.duration:.0f}s per mode, one connection, {args.workers} worker(s)\n")
+                measure("http", lambda: http.post("/verify-2fa", json={"code": code}), 1, args.duration)
+                measure("uds", lambda: uds.verify(code), 1, args.duration)
+                measure(f"uds pipelined={args.depth}", lambda: uds.verify_pipelined(pipelined), args.depth, args.duration)
+                measure(f"uds batch={args.batch}", lambda: uds.verify_batch(batch), args.batch, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
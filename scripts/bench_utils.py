@@ -0,0 +1,74 @@
+"""
+Shared helpers for the benchmark scripts: percentiles, result files and
+baseline comparison.
+"""
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def latency_summary(latencies_seconds: list[float]) -> dict:
+    ms = sorted(x * 1000 for x in latencies_seconds)
+    return {
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p95_ms": round(percentile(ms, 95), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "mean_ms": round(sum(ms) / len(ms), 3) if ms else 0.0,
+    }
+
+
+def run_metadata() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+    }
+
+
+def write_results(path: Path, results: dict) -> None:
+    path.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+    print(f"\nResults written to {path}")
+
+
+def compare(current: dict, baseline: dict, metrics: dict, threshold: float) -> list[str]:
+    """
+    Compare two {name: {metric: value}} maps.
+
+    `metrics` maps a metric name to "higher" or "lower" (which direction is
+    better). Returns one message per regression larger than `threshold`
+    (a fraction, 0.10 = 10%).
+    """
+    regressions = []
+    for name, values in current.items():
+        base_values = baseline.get(name)
+        if not base_values:
+            continue
+        for metric, better in metrics.items():
+            new, old = values.get(metric), base_values.get(metric)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            worse = -change if better == "higher" else change
+            if worse > threshold:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.1%})")
+    return regressions
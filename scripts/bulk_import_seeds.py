@@ -0,0 +1,90 @@
+"""
+Bulk seed import: decrypt a JSONL file of encrypted seeds into the seed store.
+
+Input, one record per line:
+    {"id": "alice", "encrypted_seed": "BASE64_STRING..."}
+
+The file is streamed (never loaded whole), records are decrypted on a
+process pool that loads the private key once per worker, and seeds are
+written to the multi-tenant seed store (SEED_STORE_PATH) in batches.
+Progress goes to stderr, the final report (JSON) to stdout.
+
+Usage:
+    python scripts/bulk_import_seeds.py seeds.jsonl [--workers N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add project root to PYTHONPATH
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.bulk_import import import_seeds
+from app.config import BULK_IMPORT_CHUNK_SIZE, BULK_IMPORT_WRITE_BATCH, SEED_STORE_PATH
+from app.decrypt_worker import init_decrypt_worker
+from app.executors import BoundedExecutor
+from app.seed_store import SeedStore
+
+
+async def read_lines(path: Path):
+    with open(path, "rb") as f:
+        for line in f:
+            yield line
+
+
+async def run(args) -> dict:
+    executor = BoundedExecutor(
+        max_workers=args.workers,
+        max_pending=args.workers * 2,
+        kind="process",
+        initializer=init_decrypt_worker,
+        name="bulk-decrypt",
+    )
+    store = SeedStore(args.store)
+    summary = {}
+    try:
+        async for kind, data in import_seeds(
+            read_lines(args.input),
+            executor,
+            store,
+            chunk_size=args.chunk_size,
+            write_batch=args.write_batch,
+        ):
+            if kind == "error":
+                print(f"[ERROR] line {data['line']} id={data['id']}: {data['error']}", file=sys.stderr)
+            elif kind == "progress":
+                print(
+                    f"[PROGRESS] read={data['read']} imported={data['imported']} "
+                    f"failed={data['failed']} rate={data['records_per_second']}/s",
+                    file=sys.stderr,
+                )
+            else:
+                summary = data
+    finally:
+        executor.shutdown()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=Path, help="JSONL file of {id, encrypted_seed} records")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=BULK_IMPORT_CHUNK_SIZE)
+    parser.add_argument("--write-batch", type=int, default=BULK_IMPORT_WRITE_BATCH)
+    parser.add_argument("--store", type=Path, default=SEED_STORE_PATH)
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        raise SystemExit(f"Input file not found: {args.input}")
+
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary, indent=2))
+    if summary.get("failed"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Bulk seed requests: one instructor API call per identity, concurrently.
+
+Input, one identity per line:
+    {"id": "alice", "repo_url": "https://github.com/alice/pki-2fa", "public_key": "-----BEGIN PUBLIC KEY-----..."}
+("public_key" may be omitted to use --public-key, student_public.pem by default.)
+
+Requests go through one keep-alive requests.Session with at most
+--concurrency in flight. Connection errors, timeouts, 429 and 5xx answers
+are retried with exponential backoff and full jitter (Retry-After is
+honoured); other failures are reported and not retried.
+
+Each seed received is appended to the output as soon as it arrives,
+in the input format of scripts/bulk_import_seeds.py:
+    {"id": "alice", "encrypted_seed": "BASE64..."}
+Re-running with the same output skips ids already in it, so an
+interrupted run (or one with failures) is resumed by running it again.
+
+Usage:
+    python scripts/bulk_request_seeds.py identities.jsonl --output seeds.jsonl --concurrency 32
+    python scripts/bulk_import_seeds.py seeds.jsonl
+
+Offline: point --api-url at scripts/stub_instructor_api.py.
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT / "scripts"))
+
+from request_seed import API_URL, PUBLIC_KEY_PATH
+
+# Statuses worth retrying; anything else non-200 is a permanent failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+PROGRESS_EVERY = 100
+
+
+class PermanentError(Exception):
+    """The API rejected the request; retrying would not help."""
+
+
+def read_done_ids(output: Path) -> set[str]:
+    """Ids already in the output file (a torn last line is ignored)."""
+    done = set()
+    if not output.exists():
+        return done
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["id"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def read_identities(path: Path, default_public_key: str | None, skip: set[str]):
+    """Yield (line number, id, repo_url, public key PEM) for ids not in `skip`."""
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                identity, repo_url = record["id"], record["repo_url"]
+                public_key = record.get("public_key") or default_public_key
+                if not all(isinstance(v, str) and v for v in (identity, repo_url, public_key)):
+                    raise TypeError
+            except (ValueError, KeyError, TypeError):
+                yield number, None, None, None
+                continue
+            if identity not in skip:
+                yield number, identity, repo_url, public_key
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: str | None = None) -> float:
+    """
+    Full-jitter exponential backoff; at least Retry-After seconds if given,
+    but never more than `cap` (non-finite or negative values are ignored).
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after:
+        try:
+            wait = float(retry_after)
+        except ValueError:
+            wait = math.nan
+        if math.isfinite(wait):
+            delay = max(delay, wait)
+    return min(delay, cap)
+
+
+class SeedRequester:
+    def __init__(self, api_url: str, concurrency: int, retries: int, timeout: float, backoff: float, backoff_cap: float):
+        self.api_url = api_url
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.session = requests.Session()
+        # One pooled keep-alive connection per concurrent request
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.retried = 0
+        self._lock = threading.Lock()
+
+    def request(self, identity: str, repo_url: str, public_key: str) -> str:
+        """Encrypted seed for one identity; raises after the last attempt."""
+        payload = {"student_id": identity, "github_repo_url": repo_url, "public_key": public_key}
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = f"{type(e).__name__}: {e}"
+            else:
+                if response.status_code == 200:
+                    return _encrypted_seed(response)
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code not in RETRY_STATUSES:
+                    raise PermanentError(error)
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt == self.retries:
+                break
+            with self._lock:
+                self.retried += 1
+            time.sleep(backoff_delay(attempt, self.backoff, self.backoff_cap, retry_after))
+        raise RuntimeError(f"gave up after {self.retries + 1} attempts: {error}")
+
+
+def _encrypted_seed(response) -> str:
+    try:
+        data = response.json()
+    except ValueError:
+        raise PermanentError(f"response is not JSON: {response.text[:200]}")
+    if data.get("status") != "success" or not data.get("encrypted_seed"):
+        raise PermanentError(f"API did not return success: {data}")
+    return data["encrypted_seed"].strip()
+
+
+def run(args) -> dict:
+    default_key = args.public_key.read_text(encoding="utf-8") if args.public_key.exists() else None
+    done = read_done_ids(args.output)
+    requester = SeedRequester(args.api_url, args.concurrency, args.retries, args.timeout, args.backoff, args.backoff_cap)
+    summary = {"skipped": len(done), "requested": 0, "failed": 0, "invalid": 0}
+    started = time.perf_counter()
+
+    # Make sure appends start on a fresh line after an interrupted write
+    if args.output.exists() and args.output.stat().st_size:
+        with open(args.output, "rb") as f:
+            f.seek(-1, 2)
+            torn = f.read(1) != b"\n"
+    else:
+        torn = False
+
+    with open(args.output, "a", encoding="utf-8") as output, ThreadPoolExecutor(args.concurrency) as pool:
+        if torn:
+            output.write("\n")
+        pending = {}
+
+        def collect(futures):
+            for future in futures:
+                number, identity = pending.pop(future)
+                try:
+                    encrypted_seed = future.result()
+                except Exception as e:
+                    summary["failed"] += 1
+                    print(f"[ERROR] line {number} id={identity}: {e}", file=sys.stderr)
+                    continue
+                output.write(json.dumps({"id": identity, "encrypted_seed": encrypted_seed}) + "\n")
+                output.flush()
+                summary["requested"] += 1
+                if summary["requested"] % PROGRESS_EVERY == 0:
+                    rate = summary["requested"] / (time.perf_counter() - started)
+                    print(f"[PROGRESS] requested={summary['requested']} failed={summary['failed']} rate={rate:.1f}/s", file=sys.stderr)
+
+        for number, identity, repo_url, public_key in read_identities(args.input, default_key, done):
+            if identity is None:
+                summary["invalid"] += 1
+                print(f"[ERROR] line {number}: not an {{id, repo_url, public_key}} record", file=sys.stderr)
+                continue
+            done.add(identity)  # duplicates in the input are requested once
+            pending[pool.submit(requester.request, identity, repo_url, public_key)] = (number, identity)
+            # Bounded: never more than 2 * concurrency identities in memory
+            if len(pending) >= 2 * args.concurrency:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+        collect(list(pending))
+
+    elapsed = time.perf_counter() - started
+    summary.update(
+        retries=requester.retried,
+        elapsed_seconds=round(elapsed, 3),
+        requests_per_second=round(summary["requested"] / elapsed, 1) if elapsed > 0 else 0.0,
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", type=Path, help="JSONL file of {id, repo_url, public_key} records")
+    parser.add_argument("--output", type=Path, default=Path("seeds.jsonl"), help="JSONL of {id, encrypted_seed}; resumed if it exists")
+    parser.add_argument("--api-url", default=API_URL)
+    parser.add_argument("--public-key", type=Path, default=PUBLIC_KEY_PATH, help="PEM for records without public_key")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=20.0)
+    parser.add_argument("--backoff", type=float, default=0.5, help="first backoff ceiling, seconds (doubles per attempt)")
+    parser.add_argument("--backoff-cap", type=float, default=30.0)
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        raise SystemExit(f"Input file not found: {args.input}")
+
+    summary = run(args)
+    print(json.dumps(summary, indent=2))
+    if summary["failed"] or summary["invalid"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
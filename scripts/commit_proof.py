@@ -1,6 +1,30 @@
+"""
+Commit proof: the latest commit hash, signed with the student key
+(RSA-PSS-SHA256) and encrypted for the instructor (RSA/OAEP-SHA256).
+
+    python scripts/commit_proof.py
+
+Batch mode signs every commit of a revision range and writes JSONL lines
+{"commit": ..., "proof": ...} in `git rev-list` order:
+
+    python scripts/commit_proof.py --range main --output proofs.jsonl
+    python scripts/commit_proof.py --range v1.0..main --workers 8
+
+Hashes are streamed from git rev-list, keys are loaded once per pool
+worker, and at most 2 * workers chunks are in flight, so memory stays
+bounded however long the range is. scripts/verify_commit_proofs.py
+checks the output.
+"""
+import argparse
 import base64
+import json
+import os
 import subprocess
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 
 from cryptography.hazmat.primitives import hashes, serialization
@@ -32,8 +56,10 @@ def get_latest_commit_hash() -> str:
     except subprocess.CalledProcessError as e:
         raise SystemExit(f"Failed to get git commit hash: {e.stderr}") from e
 
-    commit_hash = result.stdout.strip()
+    return validate_commit_hash(result.stdout.strip())
+
 
+def validate_commit_hash(commit_hash: str) -> str:
     if len(commit_hash) != 40:
         raise ValueError(f"Commit hash must be 40 characters, got {len(commit_hash)}")
 
@@ -44,6 +70,31 @@ def get_latest_commit_hash() -> str:
     return commit_hash
 
 
+def iter_commit_hashes(rev_range: str, repo: Path = PROJECT_ROOT):
+    """
+    Yield the commit hashes of `git rev-list <rev_range>` (newest first) as
+    git prints them, without holding the whole list in memory.
+    """
+    process = subprocess.Popen(
+        ["git", "rev-list", rev_range],
+        cwd=repo,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        for line in process.stdout:
+            yield validate_commit_hash(line.strip())
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()  # consumer stopped early
+        stderr = process.stderr.read()
+        process.stderr.close()
+        if process.wait() > 0:
+            raise SystemExit(f"git rev-list {rev_range} failed: {stderr.strip()}")
+
+
 def sign_message(message: str, private_key) -> bytes:
     """
     Sign a message using RSA-PSS with SHA-256
@@ -108,7 +159,108 @@ def encrypt_with_public_key(data: bytes, public_key) -> bytes:
     return ciphertext
 
 
+def create_commit_proof(commit_hash: str, private_key, instructor_public_key) -> str:
+    """Sign, encrypt and base64-encode one commit hash (steps 3-6 below)."""
+    signature = sign_message(commit_hash, private_key)
+    encrypted_signature = encrypt_with_public_key(signature, instructor_public_key)
+    return base64.b64encode(encrypted_signature).decode("utf-8")
+
+
+# ---------- Batch mode ----------
+
+def chunked(items, size: int):
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def map_ordered(pool, func, items, chunk_size: int, window: int):
+    """
+    Yield func(chunk) results for consecutive chunks of `items`, in input
+    order, with at most `window` chunks submitted and not yet yielded.
+    """
+    pending = deque()
+    for chunk in chunked(items, chunk_size):
+        pending.append(pool.submit(func, chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# Set in each pool worker by _init_proof_worker
+_worker_keys = None
+
+
+def _init_proof_worker(private_key_path: Path, instructor_key_path: Path) -> None:
+    global _worker_keys
+    _worker_keys = (load_private_key(private_key_path), load_instructor_public_key(instructor_key_path))
+
+
+def _prove_chunk(commit_hashes: list[str]) -> list[tuple[str, str]]:
+    private_key, instructor_public_key = _worker_keys
+    return [(h, create_commit_proof(h, private_key, instructor_public_key)) for h in commit_hashes]
+
+
+def write_commit_proofs(
+    commit_hashes,
+    output,
+    workers: int,
+    chunk_size: int = 32,
+    private_key_path: Path = STUDENT_PRIVATE_KEY_PATH,
+    instructor_key_path: Path = INSTRUCTOR_PUBLIC_KEY_PATH,
+) -> int:
+    """
+    Write one {"commit", "proof"} JSON line per hash to `output`, in input
+    order, signing on a pool of `workers` processes. Returns the count.
+    """
+    written = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_proof_worker,
+        initargs=(private_key_path, instructor_key_path),
+    ) as pool:
+        for results in map_ordered(pool, _prove_chunk, commit_hashes, chunk_size, 2 * workers):
+            output.writelines(
+                json.dumps({"commit": commit, "proof": proof}) + "\n" for commit, proof in results
+            )
+            written += len(results)
+    return written
+
+
+def batch_main(args) -> None:
+    started = time.perf_counter()
+    commit_hashes = iter_commit_hashes(args.range, args.repo)
+    options = dict(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        instructor_key_path=args.instructor_public_key,
+    )
+    if args.output == "-":
+        count = write_commit_proofs(commit_hashes, sys.stdout, **options)
+    else:
+        with open(args.output, "w", encoding="utf-8") as output:
+            count = write_commit_proofs(commit_hashes, output, **options)
+    elapsed = time.perf_counter() - started
+    print(
+        f"Wrote {count} proofs in {elapsed:.2f}s ({count / elapsed:.1f} proofs/s, {args.workers} workers)",
+        file=sys.stderr,
+    )
+
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--range", help="git rev-list range for batch mode, e.g. main or v1.0..main")
+    parser.add_argument("--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=32, help="commits per pool task")
+    parser.add_argument("--repo", type=Path, default=PROJECT_ROOT)
+    parser.add_argument("--instructor-public-key", type=Path, default=INSTRUCTOR_PUBLIC_KEY_PATH)
+    args = parser.parse_args()
+    if args.range:
+        batch_main(args)
+        return
+
     # 1. Get current commit hash (40-char hex)
     commit_hash = get_latest_commit_hash()
     print(f"Commit Hash: {commit_hash}")
@@ -116,17 +268,13 @@ def main():
     # 2. Load student private key
     private_key = load_private_key(STUDENT_PRIVATE_KEY_PATH)
 
-    # 3. Sign commit hash with student private key (RSA-PSS-SHA256)
-    signature = sign_message(commit_hash, private_key)
-
-    # 4. Load instructor public key
+    # 3. Load instructor public key
     instructor_public_key = load_instructor_public_key(INSTRUCTOR_PUBLIC_KEY_PATH)
 
-    # 5. Encrypt signature with instructor public key (RSA/OAEP-SHA256)
-    encrypted_signature = encrypt_with_public_key(signature, instructor_public_key)
-
-    # 6. Base64 encode encrypted signature (single line)
-    encrypted_signature_b64 = base64.b64encode(encrypted_signature).decode("utf-8")
+    # 4. Sign commit hash with student private key (RSA-PSS-SHA256),
+    # 5. encrypt the signature with the instructor public key (RSA/OAEP-SHA256)
+    # 6. and base64 encode it (single line)
+    encrypted_signature_b64 = create_commit_proof(commit_hash, private_key, instructor_public_key)
 
     print("\nEncrypted Signature (Base64, single line):")
     print(encrypted_signature_b64)
@@ -0,0 +1,118 @@
+"""
+Pre-generated RSA keypair pool (app/key_pool.py) from the command line.
+
+    KEY_POOL_PASSPHRASE=... python scripts/key_pool.py fill --size 20
+    KEY_POOL_PASSPHRASE=... python scripts/key_pool.py claim --out-dir tenants/acme
+    python scripts/key_pool.py status
+
+fill generates keys until the pool holds --size (KEY_POOL_SIZE by default)
+and exits; a running API with KEY_POOL_SIZE set refills on its own.
+
+claim writes student_private.pem / student_public.pem to --out-dir (required),
+like scripts/generate_keys.py, from the pool in milliseconds; when the pool
+is empty it falls back to generating the key inline (--no-fallback: exit 1).
+Existing PEM files there are only replaced with --force.
+
+The pool is an onboarding tool: the API only refills it, no endpoint hands
+out keys, and the service keeps using STUDENT_PRIVATE_KEY_PATH.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(PROJECT_ROOT))
+
+from app.config import KEY_POOL_DIR, KEY_POOL_KEY_SIZE, KEY_POOL_PASSPHRASE, KEY_POOL_SIZE, KEY_POOL_WORKERS
+from app.key_pool import KeyPool
+
+
+async def _fill(pool: KeyPool) -> None:
+    try:
+        await pool.run(until_full=True)
+    finally:
+        await pool.stop()
+
+
+def fill(pool: KeyPool) -> None:
+    before = pool.depth()
+    start = time.perf_counter()
+    asyncio.run(_fill(pool))
+    elapsed = time.perf_counter() - start
+    rate = f", {pool.generated / elapsed:.2f} keys/s" if pool.generated else ""
+    print(f"Pool: {before} -> {pool.depth()} keys ({pool.generated} generated in {elapsed:.1f}s{rate})")
+
+
+def claim(pool: KeyPool, out_dir: Path, fallback: bool, force: bool) -> None:
+    private_path = out_dir / "student_private.pem"
+    public_path = out_dir / "student_public.pem"
+    existing = [str(p) for p in (private_path, public_path) if p.exists()]
+    if existing and not force:
+        raise SystemExit(f"Refusing to overwrite {', '.join(existing)} (use --force)")
+
+    start = time.perf_counter()
+    pair = pool.claim()
+    if pair is not None:
+        private_pem, public_pem, source = pair.private_pem, pair.public_pem, "pool"
+    elif fallback:
+        from generate_keys import generate_rsa_keypair
+        from cryptography.hazmat.primitives import serialization
+
+        private_key, public_key = generate_rsa_keypair(pool.key_size)
+        private_pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+        public_pem = public_key.public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        source = "generated inline, pool empty"
+    else:
+        raise SystemExit("Key pool is empty")
+    elapsed = time.perf_counter() - start
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    # Created 0600 (never readable under the umask), then renamed into place
+    tmp_path = private_path.with_name(f".{private_path.name}.{os.getpid()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(private_pem)
+    os.replace(tmp_path, private_path)
+    public_path.write_bytes(public_pem)
+    print(f"Saved {private_path} and {public_path} ({source}, {elapsed * 1e3:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("fill", "claim", "status"))
+    parser.add_argument("--dir", type=Path, default=KEY_POOL_DIR)
+    parser.add_argument("--size", type=int, default=KEY_POOL_SIZE, help="keys to keep ready (fill)")
+    parser.add_argument("--key-size", type=int, default=KEY_POOL_KEY_SIZE)
+    parser.add_argument("--workers", type=int, default=KEY_POOL_WORKERS)
+    parser.add_argument("--out-dir", type=Path, help="where claim writes the PEM files (required for claim)")
+    parser.add_argument("--force", action="store_true", help="claim may overwrite existing PEM files")
+    parser.add_argument("--no-fallback", action="store_true", help="claim fails instead of generating inline")
+    args = parser.parse_args()
+    if args.command == "claim" and args.out_dir is None:
+        parser.error("claim requires --out-dir")
+
+    pool = KeyPool(args.dir, args.size, args.key_size, args.workers, KEY_POOL_PASSPHRASE)
+    if args.command == "status":
+        print(f"{pool.depth()} keys ready in {args.dir}")
+        return
+    if not KEY_POOL_PASSPHRASE:
+        raise SystemExit("KEY_POOL_PASSPHRASE is not set")
+    if args.command == "fill":
+        fill(pool)
+    else:
+        claim(pool, args.out_dir, not args.no_fallback, args.force)
+
+
+if __name__ == "__main__":
+    main()
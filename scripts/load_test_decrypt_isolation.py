@@ -0,0 +1,165 @@
+"""
+Load test: do /generate-2fa and /verify-2fa stay fast during a /decrypt-seed storm?
+
+Starts uvicorn on a throwaway key + seed, then:
+    1. measures /verify-2fa latency on an idle server (baseline)
+    2. measures it again while --storm clients hammer /decrypt-seed
+
+Run it once per executor kind to compare, e.g.:
+    python scripts/load_test_decrypt_isolation.py --executor process
+    python scripts/load_test_decrypt_isolation.py --executor thread
+"""
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+sys.path.append(str(PROJECT_ROOT / "scripts"))
+
+import httpx
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+
+from generate_keys import generate_rsa_keypair
+
+
+def encrypt_seed(public_key, hex_seed: str) -> str:
+    ciphertext = public_key.encrypt(
+        hex_seed.encode("utf-8"),
+        padding.OAEP(
+            mgf=padding.MGF1(algorithm=hashes.SHA256()),
+            algorithm=hashes.SHA256(),
+            label=None,
+        ),
+    )
+    return base64.b64encode(ciphertext).decode("utf-8")
+
+
+def start_server(workdir: Path, port: int, args) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        STUDENT_PRIVATE_KEY_PATH=str(workdir / "private.pem"),
+        SEED_FILE_PATH=str(workdir / "seed.txt"),
+        DECRYPT_EXECUTOR=args.executor,
+        DECRYPT_WORKERS=str(args.decrypt_workers),
+        DECRYPT_QUEUE_SIZE=str(args.queue_size),
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+        env=env,
+    )
+
+
+async def wait_ready(client: httpx.AsyncClient) -> None:
+    for _ in range(100):
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise SystemExit("server did not start")
+
+
+async def measure_verify(client: httpx.AsyncClient, duration: float, concurrency: int) -> list[float]:
+    latencies = []
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.post("/verify-2fa", json={"code": "000000"})
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def decrypt_storm(client: httpx.AsyncClient, payloads: list[str], stop: asyncio.Event, counts: dict):
+    i = 0
+    while not stop.is_set():
+        response = await client.post("/decrypt-seed", json={"encrypted_seed": payloads[i % len(payloads)]})
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+        if response.status_code == 503:
+            await asyncio.sleep(0.01)
+        i += 1
+
+
+def summarize(label: str, latencies: list[float], duration: float) -> None:
+    ms = sorted(x * 1000 for x in latencies)
+    p = lambda q: ms[min(len(ms) - 1, int(q * len(ms)))]
+    print(
+        f"{label:<22} {len(ms) / duration:>8.0f} req/s   "
+        f"p50 {statistics.median(ms):6.2f} ms   p95 {p(0.95):6.2f} ms   p99 {p(0.99):6.2f} ms"
+    )
+
+
+async def run(args, workdir: Path, payloads: list[str]) -> None:
+    base_url = f"http://127.0.0.1:{args.port}"
+    limits = httpx.Limits(max_connections=args.storm + args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await wait_ready(client)
+
+        baseline = await measure_verify(client, args.duration, args.concurrency)
+
+        stop = asyncio.Event()
+        counts: dict[int, int] = {}
+        storm = [asyncio.create_task(decrypt_storm(client, payloads, stop, counts)) for _ in range(args.storm)]
+        await asyncio.sleep(0.5)  # let the storm build up
+        loaded = await measure_verify(client, args.duration, args.concurrency)
+        stop.set()
+        await asyncio.gather(*storm)
+
+    print(f"\nexecutor={args.executor} decrypt_workers={args.decrypt_workers} queue={args.queue_size}")
+    summarize("verify (idle)", baseline, args.duration)
+    summarize("verify (decrypt storm)", loaded, args.duration)
+    print(f"decrypt responses during storm: {dict(sorted(counts.items()))}  (503 = rejected fast)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--executor", choices=["process", "thread"], default="process")
+    parser.add_argument("--decrypt-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--queue-size", type=int, default=(os.cpu_count() or 1) * 4)
+    parser.add_argument("--storm", type=int, default=32, help="concurrent /decrypt-seed clients")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent /verify-2fa clients")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--key-size", type=int, default=4096)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        print(f"Generating {args.key_size}-bit RSA key pair...")
+        private_key, public_key = generate_rsa_keypair(args.key_size)
+        (workdir / "private.pem").write_bytes(
+            private_key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.PKCS8,
+                encryption_algorithm=serialization.NoEncryption(),
+            )
+        )
+        hex_seed = os.urandom(32).hex()
+        (workdir / "seed.txt").write_text(hex_seed, encoding="utf-8")
+        payloads = [encrypt_seed(public_key, hex_seed) for _ in range(16)]
+
+        server = start_server(workdir, args.port, args)
+        try:
+            asyncio.run(run(args, workdir, payloads))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
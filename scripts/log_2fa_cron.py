@@ -1,5 +1,11 @@
 #!/usr/bin/env python3
 
+# Fallback for the in-process scheduler (CRON_IN_PROCESS=1 in app/config.py):
+# run by cron/2fa-cron once a minute when the scheduler is not enabled.
+# Writes the same entries as the scheduler: a line appended to CODE_LOG_PATH
+# (kept to its last CODE_LOG_MAX_LINES lines) and a record in the rotated
+# segments in CODE_LOG_DIR that GET /code-log searches.
+
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
@@ -7,7 +13,16 @@ from pathlib import Path
 # Add project root to PYTHONPATH so imports work when running from /app
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from app.config import SEED_FILE_PATH  # will be /data/seed.txt inside container
+from app.code_log import BufferedLineWriter, RotatingCodeLog, format_code_log_line
+from app.config import (
+    CODE_LOG_DIR,
+    CODE_LOG_MAX_LINES,
+    CODE_LOG_MAX_SEGMENTS,
+    CODE_LOG_PATH,
+    CODE_LOG_SEGMENT_MAX_RECORDS,
+    CODE_LOG_SEGMENT_SECONDS,
+    SEED_FILE_PATH,  # will be /data/seed.txt inside container
+)
 from app.totp_utils import generate_totp_code
 
 
@@ -29,11 +44,20 @@ def main():
 
         # Get current UTC timestamp
         now_utc = datetime.now(timezone.utc)
-        timestamp_str = now_utc.strftime("%Y-%m-%d %H:%M:%S")
 
-        # Output in required format
-        # This goes to stdout; cron will append it to /cron/last_code.txt
-        print(f"{timestamp_str} - 2FA Code: {code}")
+        # Append in the required format to /cron/last_code.txt (CODE_LOG_PATH)
+        writer = BufferedLineWriter(CODE_LOG_PATH, max_lines=CODE_LOG_MAX_LINES)
+        writer.write_line(format_code_log_line(now_utc, code))
+        writer.flush()
+
+        segments = RotatingCodeLog(
+            CODE_LOG_DIR,
+            segment_seconds=CODE_LOG_SEGMENT_SECONDS,
+            max_records=CODE_LOG_SEGMENT_MAX_RECORDS,
+            max_segments=CODE_LOG_MAX_SEGMENTS,
+        )
+        segments.append(now_utc, code)
+        segments.flush()
 
     except Exception as e:
         # Any unexpected error goes to stderr so it won't break cron daemon
@@ -0,0 +1,123 @@
+"""
+Local stand-in for the instructor seed API, for offline load tests.
+
+Accepts the same POST body as the real endpoint
+    {"student_id": "...", "github_repo_url": "...", "public_key": "-----BEGIN PUBLIC KEY-----..."}
+and answers
+    {"status": "success", "encrypted_seed": "BASE64..."}
+with a fresh random 64-hex seed encrypted to the given key (RSA/OAEP-SHA256,
+as app/crypto_utils.decrypt_seed expects). Keep-alive HTTP/1.1, one
+thread per connection. Optional injected latency and failures (503, or 429
+with Retry-After) exercise client retries.
+
+    python scripts/stub_instructor_api.py --port 9000 --latency-ms 50 --failure-rate 0.1
+    python scripts/bulk_request_seeds.py identities.jsonl --api-url http://127.0.0.1:9000/
+
+With --seeds-out, every issued (student_id, hex seed) is appended as JSONL,
+so a pipeline run can be checked end to end.
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+
+
+@lru_cache(maxsize=1024)
+def load_public_key(pem: str):
+    return serialization.load_pem_public_key(pem.encode("utf-8"))
+
+
+def encrypt_seed(public_key, hex_seed: str) -> str:
+    ciphertext = public_key.encrypt(
+        hex_seed.encode("utf-8"),
+        padding.OAEP(
+            mgf=padding.MGF1(algorithm=hashes.SHA256()),
+            algorithm=hashes.SHA256(),
+            label=None,
+        ),
+    )
+    return base64.b64encode(ciphertext).decode("ascii")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def do_POST(self):
+        options = self.server.options
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if options.latency_ms:
+            time.sleep(options.latency_ms / 1000)
+
+        roll = random.random()
+        if roll < options.failure_rate / 2:
+            self._send(503, {"status": "error", "message": "Service unavailable"})
+            return
+        if roll < options.failure_rate:
+            self._send(429, {"status": "error", "message": "Too many requests"}, {"Retry-After": "1"})
+            return
+
+        try:
+            payload = json.loads(body)
+            student_id = payload["student_id"]
+            if not isinstance(student_id, str) or not isinstance(payload["github_repo_url"], str):
+                raise TypeError
+            public_key = load_public_key(payload["public_key"])
+        except (ValueError, KeyError, TypeError):
+            self._send(400, {"status": "error", "message": "Invalid request"})
+            return
+
+        hex_seed = os.urandom(32).hex()
+        encrypted_seed = encrypt_seed(public_key, hex_seed)
+        if options.seeds_out:
+            with self.server.seeds_lock, open(options.seeds_out, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"id": student_id, "hex_seed": hex_seed}) + "\n")
+        self._send(200, {"status": "success", "encrypted_seed": encrypted_seed})
+
+    def _send(self, status: int, body: dict, headers: dict | None = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.options.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of 503/429 answers")
+    parser.add_argument("--seeds-out", help="append issued {id, hex_seed} records here")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    options = parser.parse_args()
+
+    server = ThreadingHTTPServer((options.host, options.port), StubHandler)
+    server.daemon_threads = True
+    server.options = options
+    server.seeds_lock = threading.Lock()
+    print(f"Stub instructor API on http://{options.host}:{options.port}/", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
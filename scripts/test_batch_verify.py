@@ -0,0 +1,177 @@
+"""
+Checks for the batch endpoints:
+
+* /verify-2fa/batch answers 413 above VERIFY_BATCH_MAX_ITEMS items, and
+  the usual 422 for other invalid bodies.
+* NDJSON (/verify-2fa/batch/stream, /decrypt-seed/bulk): an over-long line
+  split across body chunks gives exactly one "invalid" result, and the
+  lines after it still line up with their results.
+* A stream that stays open while the clock moves on verifies each item at
+  the current time, not at the time the stream opened.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+WORKDIR = Path(tempfile.mkdtemp())
+os.environ["SEED_FILE_PATH"] = str(WORKDIR / "seed.txt")
+os.environ["SEED_STORE_PATH"] = str(WORKDIR / "seeds.idx")
+os.environ["JOBS_DIR"] = str(WORKDIR / "jobs")
+os.environ["RATE_LIMIT"] = "0"
+os.environ["VERIFY_BATCH_MAX_ITEMS"] = "10"
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.totp_utils import generate_totp_code
+
+HEX_SEED = "a3dabb1f4264e0b09b2013f5b96b238dd693ba3532b24c58944dba0cec67dd75"
+
+
+class FakeClock:
+    """Stands in for the time module in app.main, with a settable time()."""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+async def post_chunks(path: str, chunks: list[bytes], before_chunk=None) -> list[dict]:
+    """
+    POST `chunks` as separate ASGI body messages; NDJSON response lines.
+    `before_chunk(i)` is called before chunk i is handed to the app.
+    """
+    messages = [{"type": "http.request", "body": c, "more_body": True} for c in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+    body = []
+    sent = 0
+
+    async def receive():
+        nonlocal sent
+        if messages:
+            if before_chunk is not None and sent < len(chunks):
+                before_chunk(sent)
+            sent += 1
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    await main.app(scope, receive, send)
+    return [json.loads(line) for line in b"".join(body).splitlines() if line.strip()]
+
+
+def split_long_line(before: bytes, after: bytes) -> list[list[bytes]]:
+    """Ways of sending `before`, an over-long line, then `after`."""
+    long_line = b'{"code": "' + b"1" * (main._STREAM_MAX_LINE + 10) + b'"}\n'
+    body = before + long_line + after
+    start = len(before)
+    return [
+        [body],  # one chunk: the long line is complete
+        [body[: start + 100], body[start + 100:]],  # cut early in the line
+        [body[: start + main._STREAM_MAX_LINE + 5], body[start + main._STREAM_MAX_LINE + 5:]],
+        [body[i:i + 4096] for i in range(0, len(body), 4096)],  # many small chunks
+        [body[: len(body) - len(after) - 1], body[len(body) - len(after) - 1:]],  # cut just before "\n"
+    ]
+
+
+def main_check():
+    (WORKDIR / "seed.txt").write_text(HEX_SEED, encoding="utf-8")
+    code = generate_totp_code(HEX_SEED)
+    failures = 0
+
+    client = TestClient(main.app)
+    cases = [
+        ([{"code": code}] * 10, 200),
+        ([{"code": code}] * 11, 413),
+        ([{"code": 5}] * 11, 413),
+        ({"code": code}, 422),
+        ([{"code": 5}], 422),
+    ]
+    for body, status in cases:
+        response = client.post("/verify-2fa/batch", json=body)
+        if response.status_code != status:
+            failures += 1
+            print(f"MISMATCH batch of {len(body)}: {response.status_code} {response.text[:200]}")
+        elif status == 413 and response.json() != {"error": "Batch too large"}:
+            failures += 1
+            print(f"MISMATCH 413 body: {response.text}")
+
+    before = json.dumps({"code": code}).encode() + b"\n"
+    after = json.dumps({"code": "000000"}).encode() + b"\n" + json.dumps({"code": code}).encode() + b"\n"
+    expected = [{"valid": True}, {"error": "Invalid item"}, {"valid": False}, {"valid": True}]
+    for chunks in split_long_line(before, after):
+        results = asyncio.run(post_chunks("/verify-2fa/batch/stream", chunks))
+        if results != expected:
+            failures += 1
+            print(f"MISMATCH stream, chunks {[len(c) for c in chunks]}: {results}")
+
+    # A long-lived stream: five minutes pass between the two chunks
+    opened = time.time()
+    later = opened + 300
+    clock = FakeClock(opened)
+    chunks = [
+        json.dumps({"code": generate_totp_code(HEX_SEED, opened)}).encode() + b"\n",
+        (json.dumps({"code": generate_totp_code(HEX_SEED, later)}).encode() + b"\n"
+         + json.dumps({"code": generate_totp_code(HEX_SEED, opened)}).encode() + b"\n"),
+    ]
+
+    def advance(index: int) -> None:
+        clock.now = opened if index == 0 else later
+
+    main.time = clock
+    try:
+        results = asyncio.run(post_chunks("/verify-2fa/batch/stream", chunks, advance))
+    finally:
+        main.time = time
+    if results != [{"valid": True}, {"valid": True}, {"valid": False}]:
+        failures += 1
+        print(f"MISMATCH stream across time steps: {results}")
+
+    # Bulk import: records that fail before any decrypt, so no key is needed
+    after = b'{"id": "bob"}\n'
+    for chunks in split_long_line(b"", after):
+        events = asyncio.run(post_chunks("/decrypt-seed/bulk", chunks))
+        errors = [(e["line"], e["error"]) for e in events if e["event"] == "error"]
+        done = events[-1]
+        if errors != [(1, "Invalid record"), (2, "Invalid record")] or done["read"] != 2:
+            failures += 1
+            print(f"MISMATCH bulk, chunks {[len(c) for c in chunks]}: {events}")
+
+    if failures:
+        raise SystemExit(1)
+    print("Batch size limit and NDJSON line splitting OK ✅")
+
+
+if __name__ == "__main__":
+    main_check()
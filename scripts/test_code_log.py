@@ -0,0 +1,203 @@
+"""
+Checks for the code log (app/code_log.py) on throwaway directories:
+
+* RotatingCodeLog: rotation by time and by record count, pruning to the
+  newest segments, find_at() and iter_range() across segment boundaries,
+  out-of-order entries and a torn last record.
+* GET /code-log ?at= and ?from=&to= on top of it.
+* scripts/log_2fa_cron.py (the default cron path) writing both
+  CODE_LOG_PATH and the segments, and BufferedLineWriter's max_lines.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(PROJECT_ROOT))
+
+WORKDIR = Path(tempfile.mkdtemp())
+os.environ["SEED_FILE_PATH"] = str(WORKDIR / "seed.txt")
+os.environ["SEED_STORE_PATH"] = str(WORKDIR / "seeds.idx")
+os.environ["JOBS_DIR"] = str(WORKDIR / "jobs")
+os.environ["CODE_LOG_PATH"] = str(WORKDIR / "last_code.txt")
+os.environ["CODE_LOG_DIR"] = str(WORKDIR / "segments")
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.code_log import RECORD_SIZE, BufferedLineWriter, RotatingCodeLog, format_code_log_line
+from app.scheduler import code_log_segments
+
+HEX_SEED = "a3dabb1f4264e0b09b2013f5b96b238dd693ba3532b24c58944dba0cec67dd75"
+T0 = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
+ENTRIES = 600  # one a minute: 10 hours
+
+
+def code_at(minute: int) -> str:
+    return f"{minute:06d}"
+
+
+def line_at(minute: int) -> str:
+    return format_code_log_line(T0 + timedelta(minutes=minute), code_at(minute))
+
+
+def check_rotation(failures: list) -> None:
+    log = RotatingCodeLog(WORKDIR / "rotation", segment_seconds=3600, max_records=45, max_segments=100)
+    for minute in range(ENTRIES):
+        log.append(T0 + timedelta(minutes=minute), code_at(minute))
+        if minute % 7 == 0:  # flushed in uneven batches, as the scheduler does
+            log.flush()
+    log.flush()
+
+    # 45 records (45 minutes) per segment: rotated by count
+    segments = log.segments()
+    if len(segments) != 14:
+        failures.append(f"rotation by count: {len(segments)} segments, expected 14")
+    for segment in segments:
+        size = segment.stat().st_size
+        if size % RECORD_SIZE or size // RECORD_SIZE > 45:
+            failures.append(f"rotation by count: {segment.name} has {size} bytes")
+
+    hourly = RotatingCodeLog(WORKDIR / "hourly", segment_seconds=3600, max_records=1000, max_segments=100)
+    for minute in range(ENTRIES):
+        hourly.append(T0 + timedelta(minutes=minute), code_at(minute))
+    hourly.flush()
+    names = [p.name for p in hourly.segments()]
+    if names != [f"codes-20250101T{hour:02d}0000.log" for hour in range(10)]:
+        failures.append(f"rotation by time: {names}")
+
+    # A new instance (e.g. the next cron run) continues the last segment
+    again = RotatingCodeLog(log.directory, segment_seconds=3600, max_records=45, max_segments=100)
+    again.append(T0 + timedelta(minutes=ENTRIES - 1), "999999")  # not newer: dropped
+    again.append(T0 + timedelta(minutes=ENTRIES), code_at(ENTRIES))
+    again.flush()
+    lines = list(again.iter_range(T0, T0 + timedelta(days=1)))
+    expected = [line_at(m) + "\n" for m in range(ENTRIES + 1)]
+    if lines != expected:
+        failures.append(f"rotation: range over all segments returned {len(lines)} lines, expected {len(expected)}")
+
+    # Pruning keeps the newest segments only
+    pruned = RotatingCodeLog(WORKDIR / "pruned", segment_seconds=3600, max_records=45, max_segments=3)
+    for minute in range(ENTRIES):
+        pruned.append(T0 + timedelta(minutes=minute), code_at(minute))
+    pruned.flush()
+    kept = pruned.segments()
+    if len(kept) != 3 or pruned.find_at(T0 + timedelta(minutes=ENTRIES - 1)) != line_at(ENTRIES - 1):
+        failures.append(f"pruning: {len(kept)} segments kept")
+    if pruned.find_at(T0 + timedelta(minutes=60)) is not None:
+        failures.append("pruning: entry from a pruned segment still found")
+
+
+def check_lookups(log: RotatingCodeLog, failures: list) -> None:
+    for minute in (0, 1, 44, 45, 46, 59, 60, 61, 333, ENTRIES - 1):
+        when = T0 + timedelta(minutes=minute)
+        for at, expected in ((when, minute), (when + timedelta(seconds=59), minute)):
+            got = log.find_at(at)
+            if got != line_at(expected):
+                failures.append(f"find_at({at:%H:%M:%S}): {got!r}, expected {line_at(expected)!r}")
+    if log.find_at(T0 - timedelta(seconds=1)) is not None:
+        failures.append("find_at before the first entry found something")
+    if log.find_at(T0 + timedelta(days=30)) != line_at(ENTRIES - 1):
+        failures.append("find_at after the last entry did not return it")
+
+    ranges = [(0, 0), (40, 50), (59, 61), (100, 250), (0, ENTRIES - 1), (ENTRIES - 3, ENTRIES + 10)]
+    for first, last in ranges:
+        got = list(log.iter_range(T0 + timedelta(minutes=first), T0 + timedelta(minutes=last)))
+        expected = [line_at(m) + "\n" for m in range(first, min(last, ENTRIES - 1) + 1)]
+        if got != expected:
+            failures.append(f"iter_range({first}, {last}): {len(got)} lines, expected {len(expected)}")
+    if list(log.iter_range(T0 + timedelta(days=1), T0 + timedelta(days=2))):
+        failures.append("iter_range after the last entry returned lines")
+
+
+def check_endpoint(failures: list) -> None:
+    for minute in range(ENTRIES):
+        code_log_segments.append(T0 + timedelta(minutes=minute), code_at(minute))
+    code_log_segments.flush()
+    check_lookups(code_log_segments, failures)
+
+    # A torn last record (writer interrupted) is ignored
+    last = code_log_segments.segments()[-1]
+    with open(last, "ab") as f:
+        f.write(b"2025-01-02 00:00:00 - 2FA")
+    if code_log_segments.find_at(T0 + timedelta(days=2)) != line_at(ENTRIES - 1):
+        failures.append("torn last record was returned")
+
+    client = TestClient(main.app)
+    cases = [
+        ("/code-log?at=2025-01-01T01:30:30Z", 200, line_at(90) + "\n"),
+        (f"/code-log?at={int((T0 + timedelta(minutes=5)).timestamp())}", 200, line_at(5) + "\n"),
+        ("/code-log?at=2024-12-31T23:59:59Z", 404, None),
+        ("/code-log?from=2025-01-01T02:00:00&to=2025-01-01T02:03:00", 200,
+         "".join(line_at(m) + "\n" for m in range(120, 124))),
+        ("/code-log?from=2025-01-01T09:58:00Z", 200, line_at(598) + "\n" + line_at(599) + "\n"),
+        ("/code-log", 400, None),
+        ("/code-log?at=yesterday", 400, None),
+        # Out of datetime's range, as Unix seconds or once converted to UTC
+        ("/code-log?at=1e20", 400, None),
+        ("/code-log?at=inf", 400, None),
+        ("/code-log?from=1e20", 400, None),
+        ("/code-log?at=0001-01-01T00:00:00%2B05:00", 400, None),
+        ("/code-log?at=9999-12-31T23:59:59-05:00", 400, None),
+        # Years before 1000 still sort before every entry
+        ("/code-log?at=0999-06-01T00:00:00Z", 404, None),
+        ("/code-log?from=0005-01-01T00:00:00Z&to=2025-01-01T00:01:00Z", 200,
+         line_at(0) + "\n" + line_at(1) + "\n"),
+    ]
+    for url, status, body in cases:
+        response = client.get(url)
+        if response.status_code != status or (body is not None and response.text != body):
+            failures.append(f"GET {url}: {response.status_code} {response.text[:80]!r}")
+
+
+def check_cron_script(failures: list) -> None:
+    workdir = WORKDIR / "cron"
+    seed_path = workdir / "seed.txt"
+    workdir.mkdir()
+    seed_path.write_text(HEX_SEED, encoding="utf-8")
+    env = dict(
+        os.environ,
+        SEED_FILE_PATH=str(seed_path),
+        CODE_LOG_PATH=str(workdir / "last_code.txt"),
+        CODE_LOG_DIR=str(workdir / "segments"),
+    )
+    for run in range(2):
+        if run:
+            time.sleep(1.1)  # entries are per second; cron runs a minute apart
+        subprocess.run([sys.executable, str(PROJECT_ROOT / "scripts" / "log_2fa_cron.py")], env=env, check=True)
+
+    lines = (workdir / "last_code.txt").read_text(encoding="utf-8").splitlines()
+    segments = RotatingCodeLog(workdir / "segments")
+    found = segments.find_at(datetime.now(timezone.utc))
+    if len(lines) != 2 or found is None or found != lines[-1]:
+        failures.append(f"cron script: file {lines}, segments {found!r}")
+
+    writer = BufferedLineWriter(workdir / "bounded.txt", max_lines=10)
+    for minute in range(55):
+        writer.write_line(line_at(minute))
+        writer.flush()
+    kept = (workdir / "bounded.txt").read_text(encoding="utf-8").splitlines()
+    if not 10 <= len(kept) <= 20 or kept[-1] != line_at(54) or kept[0] != line_at(55 - len(kept)):
+        failures.append(f"max_lines: {len(kept)} lines kept, last {kept[-1]!r}")
+
+
+def main_check():
+    failures = []
+    check_rotation(failures)
+    check_endpoint(failures)
+    check_cron_script(failures)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("Code log rotation, lookups and cron path OK ✅")
+
+
+if __name__ == "__main__":
+    main_check()
@@ -0,0 +1,255 @@
+"""
+Checks for the background decrypt jobs (app/jobs.py) on a throwaway
+JOBS_DIR, with a stand-in for the decrypt + store step:
+
+* submit, poll and long-poll until done; failures only report
+  "Decryption failed"; ExecutorSaturated is retried; a full queue raises.
+* Finished jobs expire after the TTL (and the sweep removes their files).
+* Another worker process: a job run by a child process is found and
+  long-polled from here through its state file, and a job whose owner
+  died is reported as failed.
+* A restart reusing the owner's pid: the old process's unfinished job is
+  reported as failed; unfinished records nobody updates are swept.
+"""
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(PROJECT_ROOT))
+
+from app.executors import ExecutorSaturated
+from app.jobs import JobManager, JobQueueFull
+
+WORKDIR = Path(tempfile.mkdtemp())
+
+# The "other worker": runs one job (the process step takes DELAY seconds,
+# or hangs with "hang"), prints its id, then stays up until killed
+CHILD = """
+import asyncio, sys
+from pathlib import Path
+sys.path.append({root!r})
+from app.jobs import JobManager
+
+async def process(encrypted_seed_b64, user_id):
+    if encrypted_seed_b64 == "hang":
+        await asyncio.Event().wait()
+    await asyncio.sleep(float(encrypted_seed_b64))
+
+async def main():
+    jobs = JobManager(Path(sys.argv[1]), process, workers=1, max_queued=10, ttl=60, max_wait=10)
+    state = await jobs.submit(sys.argv[2], None)
+    print(state["job_id"], flush=True)
+    await asyncio.sleep(60)
+
+asyncio.run(main())
+"""
+
+
+def manager(directory: Path, process, ttl: float = 60.0, max_queued: int = 10) -> JobManager:
+    return JobManager(directory, process, workers=1, max_queued=max_queued, ttl=ttl, max_wait=10.0)
+
+
+async def check_lifecycle(failures: list) -> None:
+    calls = []
+    saturated = [2]  # the first two attempts find the decrypt pool full
+
+    async def process(encrypted_seed_b64, user_id):
+        if encrypted_seed_b64 == "bad":
+            raise ValueError("internal detail")
+        if encrypted_seed_b64 == "busy" and saturated[0]:
+            saturated[0] -= 1
+            raise ExecutorSaturated()
+        await asyncio.sleep(0.2)
+        calls.append((encrypted_seed_b64, user_id))
+
+    jobs = manager(WORKDIR / "lifecycle", process)
+    try:
+        state = await jobs.submit("ok", "alice")
+        job_id = state["job_id"]
+        if state != {"job_id": job_id, "status": "queued"}:
+            failures.append(f"submit: {state}")
+        polled = await jobs.get(job_id)
+        if polled is None or polled["status"] not in ("queued", "running"):
+            failures.append(f"poll right after submit: {polled}")
+        done = await jobs.get(job_id, wait=5)
+        if done != {"job_id": job_id, "status": "done"} or calls != [("ok", "alice")]:
+            failures.append(f"long-poll: {done}, calls {calls}")
+
+        bad = await jobs.submit("bad", None)
+        failed = await jobs.get(bad["job_id"], wait=5)
+        if failed != {"job_id": bad["job_id"], "status": "failed", "error": "Decryption failed"}:
+            failures.append(f"failed job: {failed}")
+
+        busy = await jobs.submit("busy", None)
+        state = await jobs.get(busy["job_id"], wait=5)
+        if state["status"] != "done" or saturated[0]:
+            failures.append(f"ExecutorSaturated not retried: {state}")
+
+        for job_id in ("unknown", "x" * 22, "../../etc/passwd"):
+            if await jobs.get(job_id) is not None:
+                failures.append(f"get({job_id!r}) found something")
+    finally:
+        await jobs.stop()
+
+    blocked = asyncio.Event()
+
+    async def hang(encrypted_seed_b64, user_id):
+        await blocked.wait()
+
+    full = manager(WORKDIR / "full", hang, max_queued=2)
+    try:
+        await full.submit("a", None)
+        await asyncio.sleep(0.05)  # the worker takes it and hangs
+        await full.submit("b", None)
+        await full.submit("c", None)
+        try:
+            await full.submit("d", None)
+            failures.append("queue full: fourth job accepted")
+        except JobQueueFull:
+            pass
+        if full.queued != 2:
+            failures.append(f"queue full: {full.queued} queued")
+    finally:
+        blocked.set()
+        await full.stop()
+
+
+async def check_expiry(failures: list) -> None:
+    async def process(encrypted_seed_b64, user_id):
+        pass
+
+    directory = WORKDIR / "expiry"
+    jobs = manager(directory, process, ttl=0.3)
+    try:
+        first = await jobs.submit("a", None)
+        second = await jobs.submit("b", None)
+        if (await jobs.get(first["job_id"], wait=5))["status"] != "done":
+            failures.append("expiry: job did not finish")
+        await jobs.get(second["job_id"], wait=5)
+        await asyncio.sleep(0.4)
+        if await jobs.get(first["job_id"]) is not None:
+            failures.append("expiry: job still reported after its TTL")
+        await asyncio.sleep(0.3)  # the sweep runs every ttl seconds
+        left = sorted(p.name for p in directory.iterdir())
+        if left:
+            failures.append(f"expiry: files left after the sweep: {left}")
+    finally:
+        await jobs.stop()
+
+
+def start_child(directory: Path, seed: str) -> tuple[subprocess.Popen, str]:
+    child = subprocess.Popen(
+        [sys.executable, "-c", CHILD.format(root=str(PROJECT_ROOT)), str(directory), seed],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return child, child.stdout.readline().strip()
+
+
+async def check_other_worker(failures: list) -> None:
+    async def process(encrypted_seed_b64, user_id):
+        raise AssertionError("this process runs no jobs")
+
+    directory = WORKDIR / "shared"
+    directory.mkdir()
+    here = manager(directory, process)
+
+    child, job_id = start_child(directory, "0.5")
+    try:
+        state = await here.get(job_id)
+        if state is None or state["status"] not in ("queued", "running"):
+            failures.append(f"other worker: poll {state}")
+        start = time.monotonic()
+        state = await here.get(job_id, wait=5)
+        elapsed = time.monotonic() - start
+        if state != {"job_id": job_id, "status": "done"} or elapsed > 2:
+            failures.append(f"other worker: long-poll {state} after {elapsed:.1f}s")
+    finally:
+        child.kill()
+        child.wait()
+
+    # The owner of an unfinished job dies: the job is reported as failed
+    child, job_id = start_child(directory, "hang")
+    try:
+        state = await here.get(job_id)
+        if state is None or state["status"] in ("done", "failed"):
+            failures.append(f"dead owner: before the kill {state}")
+    finally:
+        os.kill(child.pid, signal.SIGKILL)
+        child.wait()
+    state = await here.get(job_id)
+    if state != {"job_id": job_id, "status": "failed", "error": "Decryption failed"}:
+        failures.append(f"dead owner: {state}")
+
+
+async def check_restart(failures: list) -> None:
+    async def process(encrypted_seed_b64, user_id):
+        pass
+
+    directory = WORKDIR / "restart"
+    jobs = manager(directory, process)
+    directory.mkdir()
+
+    # Written by an earlier process that had this process's pid
+    job_id = "r" * 22
+    record = {"job_id": job_id, "status": "running", "pid": os.getpid(), "started": 1, "expires_at": time.time() + 60}
+    (directory / f"{job_id}.json").write_text(json.dumps(record), encoding="utf-8")
+    state = await jobs.get(job_id)
+    if state != {"job_id": job_id, "status": "failed", "error": "Decryption failed"}:
+        failures.append(f"reused pid: {state}")
+
+    # Unfinished records expire even while their owner looks alive
+    blocked = asyncio.Event()
+
+    async def hang(encrypted_seed_b64, user_id):
+        await blocked.wait()
+
+    stale = JobManager(directory, hang, workers=1, max_queued=10, ttl=0.2, max_wait=10.0, stale_after=0.2)
+    try:
+        queued = await stale.submit("a", None)
+        await asyncio.sleep(0.3)
+        if await stale.get(queued["job_id"]) is not None:
+            failures.append("unfinished record did not expire")
+        if (directory / f"{queued['job_id']}.json").exists():
+            failures.append("expired unfinished record not removed")
+    finally:
+        blocked.set()
+        await stale.stop()
+
+    # A record from before unfinished jobs expired (no expires_at)
+    legacy_id = "l" * 22
+    path = directory / f"{legacy_id}.json"
+    path.write_text(json.dumps({"job_id": legacy_id, "status": "queued", "pid": os.getpid()}), encoding="utf-8")
+    os.utime(path, (time.time() - 7200, time.time() - 7200))
+    if await jobs.get(legacy_id) is not None or path.exists():
+        failures.append("old unfinished record without expiry not swept")
+
+
+async def run_checks() -> list:
+    failures = []
+    await check_lifecycle(failures)
+    await check_expiry(failures)
+    await check_other_worker(failures)
+    await check_restart(failures)
+    return failures
+
+
+def main():
+    failures = asyncio.run(run_checks())
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+    print("Jobs: submit, poll, TTL expiry, cross-worker lookups and restarts OK ✅")
+
+
+if __name__ == "__main__":
+    main()
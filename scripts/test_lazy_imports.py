@@ -0,0 +1,60 @@
+"""
+Checks that the TOTP paths stay free of heavy imports: after importing
+app.main and serving /generate-2fa and /verify-2fa (without the startup
+warm-up, which loads the private key), cryptography and pyotp must not
+have been imported. They are only for the decrypt paths and the
+reference tests. scripts/bench_startup.py checks the same per entry point
+with -X importtime.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+WORKDIR = Path(tempfile.mkdtemp())
+os.environ["SEED_FILE_PATH"] = str(WORKDIR / "seed.txt")
+os.environ["SEED_STORE_PATH"] = str(WORKDIR / "seeds.idx")
+os.environ["JOBS_DIR"] = str(WORKDIR / "jobs")
+
+FORBIDDEN = ("cryptography", "pyotp")
+HEX_SEED = "a3dabb1f4264e0b09b2013f5b96b238dd693ba3532b24c58944dba0cec67dd75"
+
+
+def loaded(names) -> list[str]:
+    return sorted(m for m in sys.modules if m.partition(".")[0] in names)
+
+
+def main():
+    from fastapi.testclient import TestClient
+
+    import app.main
+    from app.seed_store import seed_store
+
+    failures = [f"import app.main: {name}" for name in loaded(FORBIDDEN)]
+
+    (WORKDIR / "seed.txt").write_text(HEX_SEED, encoding="utf-8")
+    seed_store.put("alice", bytes.fromhex(HEX_SEED))
+    client = TestClient(app.main.app)  # no `with`: startup hooks do not run
+    code = client.get("/generate-2fa").json()["code"]
+    responses = [
+        client.get("/generate-2fa?user_id=alice"),
+        client.post("/verify-2fa", json={"code": code}),
+        client.post("/verify-2fa", json={"code": code, "user_id": "alice"}),
+        client.post("/verify-2fa/batch", json=[{"code": code}, {"code": "000000"}]),
+    ]
+    if any(response.status_code != 200 for response in responses):
+        failures.append(f"unexpected responses: {[r.status_code for r in responses]}")
+    failures += [f"after /generate-2fa and /verify-2fa: {name}" for name in loaded(FORBIDDEN)]
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+    print(f"TOTP paths import none of {', '.join(FORBIDDEN)} ✅")
+
+
+if __name__ == "__main__":
+    main()
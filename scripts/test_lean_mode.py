@@ -0,0 +1,109 @@
+"""
+Differential check: lean-mode handlers vs the regular FastAPI endpoints.
+
+Sends the same requests to both and compares status code, body and
+content type. Runs against a throwaway seed file and seed store, with
+and without a seed present.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+WORKDIR = Path(tempfile.mkdtemp())
+os.environ["SEED_FILE_PATH"] = str(WORKDIR / "seed.txt")
+os.environ["SEED_STORE_PATH"] = str(WORKDIR / "seeds.idx")
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.lean import LeanRoutesMiddleware
+from app.seed_cache import seed_cache
+from app.seed_store import seed_store
+from app.totp_utils import generate_totp_code
+
+HEX_SEED = "a3dabb1f4264e0b09b2013f5b96b238dd693ba3532b24c58944dba0cec67dd75"
+
+
+def requests_to_compare(code: str) -> list[tuple[str, str, dict]]:
+    generate = [
+        "/generate-2fa",
+        "/generate-2fa?user_id=alice",
+        "/generate-2fa?user_id=nobody",
+        "/generate-2fa?user_id=",
+        "/generate-2fa?user_id=nobody&user_id=alice",
+        "/generate-2fa?other=1",
+        "/generate-2fa?user_id=%61lice",
+    ]
+    verify_bodies = [
+        {"json": {"code": code}},
+        {"json": {"code": "000000"}},
+        {"json": {"code": code, "user_id": "alice"}},
+        {"json": {"code": code, "user_id": "nobody"}},
+        {"json": {"code": ""}},
+        {"json": {"code": None}},
+        {"json": {}},
+        {"json": {"user_id": "alice"}},
+        {"json": {"code": 123456}},
+        {"json": {"code": code, "user_id": 5}},
+        {"json": [code]},
+        {"json": "123456"},
+        {"json": {"code": "１２３４５６"}},
+        {"content": b"{not json"},
+        {"content": b""},
+        {"content": b'{"code": "123456"}', "headers": {"content-type": "text/plain"}},
+        {"content": b'{"code": "123456"}', "headers": {"content-type": "application/json; charset=utf-8"}},
+        {"content": b'{"code": "123456"}', "headers": {"content-type": "application/vnd.api+json"}},
+    ]
+    return [("GET", url, {}) for url in generate] + [("POST", "/verify-2fa", kw) for kw in verify_bodies]
+
+
+def main_check():
+    regular = TestClient(main.app)
+    lean_app = LeanRoutesMiddleware(
+        main.app,
+        generate=main._generate_code,
+        verify=main._verify_code,
+        routes={
+            ("GET", "/generate-2fa"): main._route("GET", "/generate-2fa"),
+            ("POST", "/verify-2fa"): main._route("POST", "/verify-2fa"),
+        },
+    )
+    lean = TestClient(lean_app)
+
+    mismatches = 0
+    checks = 0
+    for with_seed in (False, True):
+        if with_seed:
+            main._save_hex_seed(HEX_SEED, None)
+            seed_store.put("alice", bytes.fromhex(HEX_SEED))
+        else:
+            seed_cache.invalidate()
+
+        code = generate_totp_code(HEX_SEED)
+        for method, url, kwargs in requests_to_compare(code):
+            expected = regular.request(method, url, **kwargs)
+            actual = lean.request(method, url, **kwargs)
+            checks += 1
+            same = (
+                actual.status_code == expected.status_code
+                and actual.content == expected.content
+                and actual.headers.get("content-type") == expected.headers.get("content-type")
+            )
+            if not same:
+                mismatches += 1
+                print(f"MISMATCH {method} {url} {kwargs}:")
+                print(f"  fastapi: {expected.status_code} {expected.content!r}")
+                print(f"  lean:    {actual.status_code} {actual.content!r}")
+
+    print(f"Compared {checks} responses: {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+    print("Lean mode matches the FastAPI endpoints ✅")
+
+
+if __name__ == "__main__":
+    main_check()
@@ -0,0 +1,110 @@
+"""
+Checks for the memory-mapped seed store (app/seed_store.py) on a throwaway
+file: lookups across table growth, overwriting a user, a second instance
+(as another worker would have) following the "moved" flag, and a reader
+thread running while the table grows under it.
+"""
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.seed_store import MAX_LOAD, SeedStore
+
+USERS = 2000
+
+
+def seed_for(user_id: str, version: int = 0) -> bytes:
+    return (f"{user_id}/{version}".encode() * 32)[:32]
+
+
+def main():
+    workdir = Path(tempfile.mkdtemp())
+    path = workdir / "seeds.idx"
+    failures = []
+
+    writer = SeedStore(path, initial_capacity=16)
+    reader = SeedStore(path, initial_capacity=16)  # another worker's view
+
+    if reader.get("nobody") is not None or len(reader) != 0:
+        failures.append("empty store returned a seed")
+
+    writer.put("user-0", seed_for("user-0"))
+    if reader.get("user-0") != seed_for("user-0"):
+        failures.append("second instance does not see the first insert")
+    first_capacity = reader.capacity
+
+    # Insert one at a time (many grows), then in batches
+    for i in range(1, USERS // 2):
+        writer.put(f"user-{i}", seed_for(f"user-{i}"))
+    writer.put_many((f"user-{i}", seed_for(f"user-{i}")) for i in range(USERS // 2, USERS))
+
+    if writer.capacity <= first_capacity:
+        failures.append(f"table did not grow ({writer.capacity} slots)")
+    if len(writer) > writer.capacity * MAX_LOAD:
+        failures.append(f"load above {MAX_LOAD}: {len(writer)}/{writer.capacity}")
+    for store, name in ((writer, "writer"), (reader, "reader"), (SeedStore(path), "reopened")):
+        if len(store) != USERS:
+            failures.append(f"{name}: {len(store)} users, expected {USERS}")
+        missing = [i for i in range(USERS) if store.get(f"user-{i}") != seed_for(f"user-{i}")]
+        if missing:
+            failures.append(f"{name}: {len(missing)} wrong lookups after growth, e.g. user-{missing[0]}")
+        if store.get("nobody") is not None:
+            failures.append(f"{name}: unknown user found")
+
+    # Overwrite: same slot, no new entry, visible to the other instance
+    capacity = writer.capacity
+    writer.put("user-7", seed_for("user-7", 1))
+    writer.put_many([("user-8", seed_for("user-8", 1)), ("user-8", seed_for("user-8", 2))])
+    if len(reader) != USERS or writer.capacity != capacity:
+        failures.append(f"overwrite added an entry ({len(reader)} users, {writer.capacity} slots)")
+    if reader.get("user-7") != seed_for("user-7", 1) or reader.get("user-8") != seed_for("user-8", 2):
+        failures.append("overwritten seed not visible to the other instance")
+
+    try:
+        writer.put("user-9", b"short")
+        failures.append("accepted a seed that is not 32 bytes")
+    except ValueError:
+        pass
+
+    # A reader thread keeps looking up known users while the table grows
+    bad_reads = []
+    done = threading.Event()
+
+    def read_loop():
+        concurrent = SeedStore(path)
+        while not done.is_set():
+            for i in range(0, USERS, 97):
+                seed = concurrent.get(f"user-{i}")
+                expected = {seed_for(f"user-{i}"), seed_for(f"user-{i}", 1), seed_for(f"user-{i}", 2)}
+                if seed not in expected:
+                    bad_reads.append(i)
+
+    thread = threading.Thread(target=read_loop)
+    thread.start()
+    try:
+        writer.put_many((f"more-{i}", seed_for(f"more-{i}")) for i in range(USERS * 3))
+    finally:
+        done.set()
+        thread.join()
+    if bad_reads:
+        failures.append(f"{len(bad_reads)} lookups failed during growth, e.g. user-{bad_reads[0]}")
+    if len(reader) != USERS * 4 or reader.get(f"more-{USERS * 3 - 1}") is None:
+        failures.append(f"after concurrent growth: {len(reader)} users")
+
+    leftovers = sorted(p.name for p in workdir.iterdir() if p.name not in ("seeds.idx", "seeds.idx.lock"))
+    if leftovers:
+        failures.append(f"files left behind: {leftovers}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+    print(f"Seed store: {USERS * 4} users, {reader.capacity} slots, lookups consistent across growth ✅")
+
+
+if __name__ == "__main__":
+    main()
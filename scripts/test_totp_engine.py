@@ -0,0 +1,76 @@
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import pyotp
+
+from app.totp_utils import _hex_to_base32, generate_totp_code, verify_totp_code
+
+# pyotp turns integer timestamps into naive local datetimes; pin UTC so the
+# reference path is deterministic (the container runs with TZ=UTC too).
+os.environ["TZ"] = "UTC"
+time.tzset()
+
+NUM_SEEDS = 200
+TIMES_PER_SEED = 50
+
+
+def pyotp_generate(hex_seed: str, for_time: int) -> str:
+    """Reference: the original hex -> base32 -> pyotp.TOTP path."""
+    return pyotp.TOTP(_hex_to_base32(hex_seed), interval=30, digits=6).at(for_time)
+
+
+def pyotp_verify(hex_seed: str, code: str, for_time: int, valid_window: int) -> bool:
+    totp = pyotp.TOTP(_hex_to_base32(hex_seed), interval=30, digits=6)
+    return totp.verify(code, for_time=for_time, valid_window=valid_window)
+
+
+def main():
+    rng = random.Random(6238)
+    mismatches = 0
+    checks = 0
+
+    # Fixed edge timestamps plus random ones up to year 2100
+    edge_times = [90, 119, 120, 1111111109, 1234567890, 2000000000, 2**32 - 1]
+
+    for _ in range(NUM_SEEDS):
+        hex_seed = rng.randbytes(32).hex()
+        times = edge_times + [rng.randrange(90, 4102444800) for _ in range(TIMES_PER_SEED)]
+
+        for t in times:
+            expected = pyotp_generate(hex_seed, t)
+            actual = generate_totp_code(hex_seed, for_time=t)
+            checks += 1
+            if actual != expected:
+                mismatches += 1
+                print(f"MISMATCH generate seed={hex_seed} t={t}: {actual} != {expected}")
+
+            # Verify: the current code, neighbours, and a random code
+            candidates = [
+                expected,
+                pyotp_generate(hex_seed, t - 30),
+                pyotp_generate(hex_seed, t + 60),
+                f"{rng.randrange(10**6):06d}",
+            ]
+            for code in candidates:
+                for window in (0, 1, 2):
+                    ref = pyotp_verify(hex_seed, code, t, window)
+                    got = verify_totp_code(hex_seed, code, valid_window=window, for_time=t)
+                    checks += 1
+                    if got != ref:
+                        mismatches += 1
+                        print(f"MISMATCH verify seed={hex_seed} t={t} code={code} w={window}: {got} != {ref}")
+
+    print(f"Compared {checks} results over {NUM_SEEDS} seeds: {mismatches} mismatches")
+    if mismatches:
+        raise SystemExit(1)
+    print("Native TOTP engine matches pyotp ✅")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Checks for the binary verification protocol on a Unix socket
+(app/uds_protocol.py, app/uds_server.py, app/uds_client.py), with the
+server running in-process on a throwaway seed:
+
+* Round trip: ping, verify and batch statuses match POST /verify-2fa.
+* Framing: frames split into single bytes, many frames in one write, a
+  frame over MAX_FRAME closing the connection.
+* Error replies: unknown op, empty or malformed payloads, a batch over
+  the limit; the connection stays usable after each.
+* Pipelining: enough requests that their replies overflow the socket
+  buffers, in order, without deadlocking.
+* The client raises ProtocolError for malformed replies (empty payload,
+  an error reply without its error byte, the wrong op, no status).
+"""
+import asyncio
+import os
+import socket
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root to PYTHONPATH (same trick as test_decrypt_seed.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+WORKDIR = Path(tempfile.mkdtemp())
+os.environ["SEED_FILE_PATH"] = str(WORKDIR / "seed.txt")
+os.environ["SEED_STORE_PATH"] = str(WORKDIR / "seeds.idx")
+os.environ["JOBS_DIR"] = str(WORKDIR / "jobs")
+
+from app import main
+from app.seed_store import seed_store
+from app.totp_utils import generate_totp_code
+from app.uds_client import VerifyClient
+from app.uds_protocol import (
+    COUNT,
+    ERROR_BATCH_TOO_LARGE,
+    ERROR_MALFORMED,
+    ERROR_UNKNOWN_OP,
+    LENGTH,
+    MAX_FRAME,
+    OP_ERROR,
+    OP_PING,
+    OP_VERIFY,
+    OP_VERIFY_BATCH,
+    STATUS_INVALID,
+    STATUS_MISSING_CODE,
+    STATUS_SEED_MISSING,
+    STATUS_VALID,
+    ProtocolError,
+    encode_frame,
+    encode_item,
+    encode_verify,
+)
+from app.uds_server import UDSVerifyServer
+
+HEX_SEED = "a3dabb1f4264e0b09b2013f5b96b238dd693ba3532b24c58944dba0cec67dd75"
+MAX_BATCH = 10
+# Replies to this many requests (6 bytes each) are far more than the socket
+# buffers hold, so sending them all before reading would deadlock
+PIPELINED = 200_000
+
+
+def start_server(path: Path) -> tuple[UDSVerifyServer, asyncio.AbstractEventLoop, threading.Thread]:
+    server = UDSVerifyServer(path, verify=main._verify_code, new_batch=main._BatchVerifier, max_batch=MAX_BATCH)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait(5)
+    return server, loop, thread
+
+
+def read_frame(sock: socket.socket) -> bytes | None:
+    """One reply payload, or None if the server closed the connection."""
+    data = b""
+    while len(data) < LENGTH.size:
+        chunk = sock.recv(LENGTH.size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    (length,) = LENGTH.unpack(data)
+    payload = b""
+    while len(payload) < length:
+        chunk = sock.recv(length - len(payload))
+        if not chunk:
+            return None
+        payload += chunk
+    return payload
+
+
+def check_round_trip(path: Path, failures: list) -> None:
+    code = generate_totp_code(HEX_SEED)
+    cases = [
+        (code, None, STATUS_VALID),
+        (code, "alice", STATUS_VALID),
+        ("000000", None, STATUS_INVALID),
+        ("", None, STATUS_MISSING_CODE),
+        (code, "nobody", STATUS_SEED_MISSING),
+    ]
+    with VerifyClient(path) as client:
+        client.ping()
+        for code_, tenant, expected in cases:
+            status = client.verify(code_, tenant)
+            if status != expected:
+                failures.append(f"verify({code_!r}, {tenant!r}): status {status}, expected {expected}")
+        batch = client.verify_batch([(c, t) for c, t, _ in cases])
+        if batch != [expected for _, _, expected in cases]:
+            failures.append(f"verify_batch: {batch}")
+        if client.verify_batch([]) != []:
+            failures.append("empty batch did not return an empty reply")
+
+
+def check_framing(path: Path, failures: list) -> None:
+    code = generate_totp_code(HEX_SEED)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(str(path))
+
+        # One frame delivered a byte at a time
+        for byte in encode_verify(code):
+            sock.sendall(bytes((byte,)))
+        if read_frame(sock) != bytes((OP_VERIFY, STATUS_VALID)):
+            failures.append("frame split into single bytes")
+
+        # Many frames (of every kind) in one write, answered in order
+        frames = [encode_frame(bytes((OP_PING,))), encode_verify("000000"), encode_verify(code, "alice")]
+        sock.sendall(b"".join(frames * 50))
+        expected = [bytes((OP_PING,)), bytes((OP_VERIFY, STATUS_INVALID)), bytes((OP_VERIFY, STATUS_VALID))] * 50
+        got = [read_frame(sock) for _ in expected]
+        if got != expected:
+            failures.append("frames sent in one write: replies out of order or wrong")
+
+    # A frame over MAX_FRAME closes the connection
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(str(path))
+        sock.sendall(LENGTH.pack(MAX_FRAME + 1) + b"\x01")
+        if read_frame(sock) is not None:
+            failures.append("oversized frame: connection not closed")
+
+
+def check_errors(path: Path, failures: list) -> None:
+    item = encode_item("123456")
+    cases = [
+        ("unknown op", bytes((0x7F,)), ERROR_UNKNOWN_OP),
+        ("empty payload", b"", ERROR_MALFORMED),
+        ("ping with arguments", bytes((OP_PING, 0)), ERROR_MALFORMED),
+        ("verify without item", bytes((OP_VERIFY,)), ERROR_MALFORMED),
+        ("truncated item", bytes((OP_VERIFY,)) + item[:-2], ERROR_MALFORMED),
+        ("trailing bytes", bytes((OP_VERIFY,)) + item + b"x", ERROR_MALFORMED),
+        ("invalid UTF-8", bytes((OP_VERIFY, 0, 2, 0xFF, 0xFE)), ERROR_MALFORMED),
+        ("batch without count", bytes((OP_VERIFY_BATCH, 0)), ERROR_MALFORMED),
+        ("batch count too high", bytes((OP_VERIFY_BATCH,)) + COUNT.pack(2) + item, ERROR_MALFORMED),
+        ("batch over the limit", bytes((OP_VERIFY_BATCH,)) + COUNT.pack(MAX_BATCH + 1) + item * (MAX_BATCH + 1),
+         ERROR_BATCH_TOO_LARGE),
+    ]
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(5)
+        sock.connect(str(path))
+        for label, payload, error in cases:
+            sock.sendall(encode_frame(payload))
+            reply = read_frame(sock)
+            if reply != bytes((OP_ERROR, error)):
+                failures.append(f"{label}: reply {reply!r}")
+            # The connection is still usable
+            sock.sendall(encode_frame(bytes((OP_PING,))))
+            if read_frame(sock) != bytes((OP_PING,)):
+                failures.append(f"{label}: connection unusable afterwards")
+
+    with VerifyClient(path) as client:
+        try:
+            client.verify_batch([("123456", None)] * (MAX_BATCH + 1))
+            failures.append("client: batch over the limit did not raise")
+        except ProtocolError:
+            pass
+        client.ping()
+
+
+def check_pipelining(path: Path, failures: list) -> None:
+    code = generate_totp_code(HEX_SEED)
+    items = [(code if i % 3 else "000000", "alice" if i % 2 else None) for i in range(PIPELINED)]
+    expected = [STATUS_VALID if i % 3 else STATUS_INVALID for i in range(PIPELINED)]
+    with VerifyClient(path, timeout=10) as client:
+        try:
+            statuses = client.verify_pipelined(items)
+        except (TimeoutError, socket.timeout):
+            failures.append(f"pipelining {PIPELINED} requests timed out (deadlock)")
+            return
+        if statuses != expected:
+            failures.append(f"pipelining: {sum(a != b for a, b in zip(statuses, expected))} wrong statuses")
+        if client.verify_pipelined(items[:5], window=2) != expected[:5]:
+            failures.append("pipelining with a small window")
+        client.ping()
+
+
+def check_client_replies(failures: list) -> None:
+    # A misbehaving server: answers each request with the next canned reply
+    path = WORKDIR / "bad.sock"
+    replies = [b"", bytes((OP_ERROR,)), bytes((OP_PING,)), bytes((OP_VERIFY,))]
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(str(path))
+    listener.listen(1)
+
+    def serve():
+        conn, _ = listener.accept()
+        with conn:
+            for reply in replies:
+                if read_frame(conn) is None:
+                    return
+                conn.sendall(encode_frame(reply))
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    try:
+        with VerifyClient(path) as client:
+            for reply in replies:
+                try:
+                    client.verify("123456")
+                    failures.append(f"client: reply {reply!r} accepted")
+                except ProtocolError:
+                    pass
+                except Exception as e:
+                    failures.append(f"client: reply {reply!r} raised {type(e).__name__}")
+    finally:
+        thread.join(5)
+        listener.close()
+
+
+def main_check():
+    (WORKDIR / "seed.txt").write_text(HEX_SEED, encoding="utf-8")
+    seed_store.put("alice", bytes.fromhex(HEX_SEED))
+    path = WORKDIR / "verify.sock"
+    server, loop, thread = start_server(path)
+
+    failures = []
+    try:
+        check_round_trip(path, failures)
+        check_framing(path, failures)
+        check_errors(path, failures)
+        check_pipelining(path, failures)
+        check_client_replies(failures)
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+    if path.exists():
+        failures.append("socket file left behind")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        raise SystemExit(1)
+    print(f"UDS protocol: round trips, framing, error replies, {PIPELINED:,} pipelined requests ✅")
+
+
+if __name__ == "__main__":
+    main_check()
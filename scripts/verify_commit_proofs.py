@@ -0,0 +1,154 @@
+"""
+Check commit proofs written by scripts/commit_proof.py --range.
+
+Each JSONL line {"commit": ..., "proof": ...} is base64-decoded, decrypted
+with the instructor private key (RSA/OAEP-SHA256) and the result verified
+as the student's RSA-PSS-SHA256 signature of the commit hash. With
+--range, the commits must also be exactly `git rev-list <range>`, in
+order.
+
+    python scripts/verify_commit_proofs.py proofs.jsonl \
+        --instructor-private-key instructor_private.pem --range main
+
+Lines are checked on a process pool (keys loaded once per worker), in
+bounded chunks like the signing side. Prints every failure and a summary
+with throughput; exits 1 if any line fails or a commit has no proof.
+"""
+import argparse
+import base64
+import binascii
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+sys.path.append(str(PROJECT_ROOT / "scripts"))
+
+from app.crypto_utils import load_private_key
+from commit_proof import iter_commit_hashes, map_ordered
+
+STUDENT_PUBLIC_KEY_PATH = PROJECT_ROOT / "student_public.pem"
+
+
+def verify_commit_proof(commit_hash: str, proof_b64: str, instructor_private_key, student_public_key) -> str | None:
+    """None if `proof_b64` is a valid proof for `commit_hash`, else the reason."""
+    try:
+        encrypted_signature = base64.b64decode(proof_b64, validate=True)
+    except (binascii.Error, ValueError):
+        return "proof is not valid base64"
+    try:
+        signature = instructor_private_key.decrypt(
+            encrypted_signature,
+            padding.OAEP(
+                mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                algorithm=hashes.SHA256(),
+                label=None,
+            ),
+        )
+    except ValueError:
+        return "proof does not decrypt with the instructor key"
+    try:
+        student_public_key.verify(
+            signature,
+            commit_hash.encode("utf-8"),
+            padding.PSS(
+                mgf=padding.MGF1(hashes.SHA256()),
+                salt_length=padding.PSS.MAX_LENGTH,
+            ),
+            hashes.SHA256(),
+        )
+    except InvalidSignature:
+        return "signature does not match the commit"
+    return None
+
+
+# Set in each pool worker by _init_verify_worker
+_worker_keys = None
+
+
+def _init_verify_worker(instructor_private_key_path: Path, student_public_key_path: Path) -> None:
+    global _worker_keys
+    _worker_keys = (
+        load_private_key(instructor_private_key_path),
+        serialization.load_pem_public_key(student_public_key_path.read_bytes()),
+    )
+
+
+def _verify_chunk(lines: list[tuple[int, str]]) -> list[tuple[int, str | None, str | None]]:
+    """(line number, commit or None, failure reason or None) per line."""
+    instructor_private_key, student_public_key = _worker_keys
+    results = []
+    for number, line in lines:
+        try:
+            record = json.loads(line)
+            commit, proof = record["commit"], record["proof"]
+            if not isinstance(commit, str) or not isinstance(proof, str):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            results.append((number, None, "not a {\"commit\", \"proof\"} JSON object"))
+            continue
+        results.append((number, commit, verify_commit_proof(commit, proof, instructor_private_key, student_public_key)))
+    return results
+
+
+def _numbered_lines(source):
+    for number, line in enumerate(source, 1):
+        if line.strip():
+            yield number, line
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("proofs", help="JSONL file from commit_proof.py --range, or - for stdin")
+    parser.add_argument("--instructor-private-key", type=Path, required=True)
+    parser.add_argument("--student-public-key", type=Path, default=STUDENT_PUBLIC_KEY_PATH)
+    parser.add_argument("--range", help="also require exactly the commits of git rev-list RANGE, in order")
+    parser.add_argument("--repo", type=Path, default=PROJECT_ROOT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=32, help="lines per pool task")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.proofs == "-" else open(args.proofs, encoding="utf-8")
+    expected = iter_commit_hashes(args.range, args.repo) if args.range else None
+    checked = failed = missing = 0
+    started = time.perf_counter()
+    with source, ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_verify_worker,
+        initargs=(args.instructor_private_key, args.student_public_key),
+    ) as pool:
+        for results in map_ordered(pool, _verify_chunk, _numbered_lines(source), args.chunk_size, 2 * args.workers):
+            for number, commit, reason in results:
+                checked += 1
+                if expected is not None:
+                    wanted = next(expected, None)
+                    if reason is None and commit != wanted:
+                        reason = f"expected commit {wanted}" if wanted else "more proofs than commits in range"
+                if reason is not None:
+                    failed += 1
+                    print(f"line {number}: {commit or '-'}: {reason}")
+
+    if expected is not None:
+        missing = sum(1 for _ in expected)
+        if missing:
+            print(f"{missing} commits of {args.range} have no proof")
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Checked {checked} proofs in {elapsed:.2f}s ({checked / elapsed:.1f} proofs/s, "
+        f"{args.workers} workers): {checked - failed} valid, {failed} failed"
+    )
+    if failed or missing:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()